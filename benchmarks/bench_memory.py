@@ -0,0 +1,101 @@
+"""Measure the memory held per parsed request.
+
+The sample looks like a load-test corpus: a handful of endpoints called with varying ids,
+all with the same five headers. "before" copies every parsed request into a plain
+dataclass with an instance __dict__, its own headers dict and its own copies of every
+string, which is how requests were held before they were slotted and shared. "after" is
+parse_rest_file as it is. Sizes are measured with tracemalloc and exclude the text.
+
+Usage: python benchmarks/bench_memory.py [--requests N]
+"""
+
+import argparse
+import dataclasses
+import gc
+import tracemalloc
+from typing import Optional
+
+from pyrestfile import parse_rest_file
+
+ENDPOINTS = [
+    ("GET", "https://api.example.com/v1/users/{id}"),
+    ("GET", "https://api.example.com/v1/users/{id}/orders"),
+    ("GET", "https://api.example.com/v1/products?page={id}"),
+    ("POST", "https://api.example.com/v1/orders"),
+    ("DELETE", "https://api.example.com/v1/carts/{id}"),
+]
+HEADERS = """Accept: application/json
+Authorization: Bearer {{token}}
+User-Agent: locust/2.0
+X-Client: web
+Accept-Encoding: gzip"""
+
+
+@dataclasses.dataclass
+class LegacyHTTPRequest:
+    description: str
+    method: str
+    url: str
+    http_version: str = ""
+    headers: dict = dataclasses.field(default_factory=dict)
+    content_type: str = ""
+    body: str = ""
+    annotations: dict = dataclasses.field(default_factory=dict)
+    body_file: Optional[object] = None
+    _validation: str = "off"
+    _json_cache: Optional[tuple] = None
+    _wire_cache: Optional[tuple] = None
+
+
+def _copy(value: str) -> str:
+    return value.encode().decode()
+
+
+def _legacy(request) -> LegacyHTTPRequest:
+    return LegacyHTTPRequest(
+        description=_copy(request.description),
+        method=_copy(request.method),
+        url=_copy(request.url),
+        http_version=_copy(request.http_version),
+        headers={_copy(name): _copy(value) for name, value in request.headers.items()},
+        content_type=_copy(request.content_type),
+        body=_copy(request.body),
+        annotations=dict(request.annotations),
+    )
+
+
+def build_sample(count: int) -> str:
+    blocks = ["@token = abc123\n"]
+    for index in range(count):
+        method, url = ENDPOINTS[index % len(ENDPOINTS)]
+        blocks.append(f"### Request {index}\n{method} {url.format(id=index % 1000)} HTTP/1.1\n{HEADERS}\n")
+    return "\n".join(blocks)
+
+
+def measure(build) -> tuple[int, object]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100_000)
+    args = parser.parse_args()
+
+    text = build_sample(args.requests)
+    after_bytes, requests = measure(lambda: parse_rest_file(text, validation="lazy"))
+    before_bytes, _ = measure(lambda: [_legacy(request) for request in requests])
+
+    print(f"before: {before_bytes / args.requests:8,.0f} bytes/request")
+    print(f"after:  {after_bytes / args.requests:8,.0f} bytes/request")
+    print(f"saved:  {1 - after_bytes / before_bytes:8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Time each phase of parse_rest_file on generated corpora and gate on regressions.
+
+The phases are the steps parse_rest_file runs in order:
+
+  vars    collect_var_values + strip_var_declarations
+  split   split_along_delimiters
+  parse   parse_block on every block
+  unpack  unpack_request_block on every block, with the default strict validation
+  render  Renderer.render on every request, plus the strict validation deferred until a
+          templated body is rendered
+
+Each profile's corpus is parsed `--repeat` times and the fastest time of each phase is
+kept, which filters out most scheduler noise. Throughput is reported in requests/s and in
+MB/s of corpus text.
+
+Usage:
+  python benchmarks/bench_parse.py [--output results.json]
+  python benchmarks/bench_parse.py --save-baseline benchmarks/baseline.json
+  python benchmarks/bench_parse.py --baseline benchmarks/baseline.json [--threshold 0.25]
+
+With `--baseline`, the script exits with status 1 if any phase of any profile got slower
+than the baseline by more than `--threshold` (a fraction; 0.25 means 25%). Baselines are
+machine-specific: record one on the machine that runs the gate.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from dataclasses import asdict
+
+from corpus import CorpusSpec, generate_corpus
+
+from pyrestfile.parser import _render_and_validate
+from pyrestfile.request_block_grammar import unpack_request_block
+from pyrestfile.top_level_grammar import parse_block, split_along_delimiters
+from pyrestfile.vars import Renderer, collect_var_values, strip_var_declarations
+
+RESULTS_FORMAT_VERSION = 1
+PHASES = ("vars", "split", "parse", "unpack", "render")
+PROFILES = {
+    "default": CorpusSpec(),
+    "large-bodies": CorpusSpec(requests=200, body_bytes=16 * 1024),
+    "many-headers": CorpusSpec(headers=24),
+    "comment-heavy": CorpusSpec(comment_density=0.9),
+    "variable-heavy": CorpusSpec(variable_density=0.9),
+}
+ENV = {"host": "api.example.com"}
+
+
+def time_phases(text: str) -> tuple[dict[str, float], int]:
+    """Runs the parse pipeline once; returns the seconds spent per phase and the request count."""
+    seconds = {}
+
+    started = time.perf_counter()
+    inline_vars = collect_var_values(text)
+    cleaned_text = strip_var_declarations(text)
+    seconds["vars"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    unprocessed_blocks = split_along_delimiters(cleaned_text)
+    seconds["split"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    blocks = [parse_block(block) for block in unprocessed_blocks]
+    seconds["parse"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    requests = [unpack_request_block(block) for block in blocks]
+    seconds["unpack"] = time.perf_counter() - started
+
+    renderer = Renderer({**ENV, **inline_vars})
+    started = time.perf_counter()
+    for request in requests:
+        _render_and_validate(renderer, request)
+    seconds["render"] = time.perf_counter() - started
+
+    return seconds, len(requests)
+
+
+def run_profile(spec: CorpusSpec, repeat: int) -> dict:
+    text = generate_corpus(spec)
+    megabytes = len(text.encode("utf-8")) / 1_000_000
+    best = {phase: float("inf") for phase in PHASES}
+    for _ in range(repeat):
+        seconds, request_count = time_phases(text)
+        for phase, value in seconds.items():
+            best[phase] = min(best[phase], value)
+    best["total"] = sum(best[phase] for phase in PHASES)
+
+    phases = {}
+    for phase, value in best.items():
+        value = max(value, 1e-9)
+        phases[phase] = {
+            "seconds": value,
+            "requests_per_s": request_count / value,
+            "mb_per_s": megabytes / value,
+        }
+    return {"spec": asdict(spec), "requests": request_count, "megabytes": megabytes, "phases": phases}
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Describes every profile phase that is more than `threshold` slower than in `baseline`."""
+    regressions = []
+    for name, profile in results["profiles"].items():
+        baseline_profile = baseline["profiles"].get(name)
+        if baseline_profile is None or baseline_profile["spec"] != profile["spec"]:
+            continue
+        for phase, measurement in profile["phases"].items():
+            baseline_phase = baseline_profile["phases"].get(phase)
+            if baseline_phase is None:
+                continue
+            change = measurement["seconds"] / baseline_phase["seconds"] - 1
+            if change > threshold:
+                regressions.append(
+                    f"{name}/{phase}: {change:+.0%} ({baseline_phase['seconds'] * 1000:.2f} ms -> "
+                    f"{measurement['seconds'] * 1000:.2f} ms)"
+                )
+    return regressions
+
+
+def format_table(results: dict) -> str:
+    lines = [f"{'profile':<16}{'phase':<8}{'ms':>10}{'requests/s':>14}{'MB/s':>10}"]
+    for name, profile in results["profiles"].items():
+        for phase, measurement in profile["phases"].items():
+            lines.append(
+                f"{name:<16}{phase:<8}{measurement['seconds'] * 1000:>10.2f}"
+                f"{measurement['requests_per_s']:>14,.0f}{measurement['mb_per_s']:>10.1f}"
+            )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profile", action="append", choices=sorted(PROFILES), help="run only these profiles")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per profile; the fastest is kept")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write the results as the new baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against this baseline and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown per phase, as a fraction")
+    args = parser.parse_args()
+
+    results = {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "profiles": {name: run_profile(PROFILES[name], args.repeat) for name in args.profile or PROFILES},
+    }
+    print(format_table(results))
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}:", file=sys.stderr)
+            for regression in regressions:
+                print("  " + regression, file=sys.stderr)
+            sys.exit(1)
+        print(f"\nNo phase regressed beyond {args.threshold:.0%} of {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Measure the throughput of the stub server.
+
+The server runs in worker processes (see server.serve) on a local port and answers the
+routes of a small API file. The client opens `--connections` keep-alive connections and
+keeps `--depth` pipelined GETs in flight on each, alternating between a literal and a
+wildcard route, for `--seconds`. Client and server share the machine, so the figure is a
+lower bound on what the server alone sustains.
+
+Usage: python benchmarks/bench_server.py [--workers N] [--connections N] [--depth N] [--seconds S]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import socket
+import time
+
+from pyrestfile.server import RouteIndex, serve
+
+API = """### List
+# @response 200 [{"id": 1}, {"id": 2}]
+GET {{base}}/v1/users
+
+### Get
+# @response 200 {"id": 1, "name": "Ada"}
+GET {{base}}/v1/users/{{id}}
+"""
+REQUESTS = [b"GET /v1/users HTTP/1.1\r\nHost: bench\r\n\r\n", b"GET /v1/users/42 HTTP/1.1\r\nHost: bench\r\n\r\n"]
+
+
+async def _connection(port: int, depth: int, deadline: float) -> int:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    batch = b"".join(REQUESTS[index % 2] for index in range(depth))
+    completed = 0
+    while time.perf_counter() < deadline:
+        writer.write(batch)
+        for _ in range(depth):
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(head.split(b"Content-Length: ", 1)[1].split(b"\r\n", 1)[0])
+            await reader.readexactly(length)
+        completed += depth
+    writer.close()
+    return completed
+
+
+async def _client(port: int, connections: int, depth: int, seconds: float) -> int:
+    deadline = time.perf_counter() + seconds
+    return sum(await asyncio.gather(*(_connection(port, depth, deadline) for _ in range(connections))))
+
+
+def _wait_for(port: int) -> None:
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port)).close()
+            return
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+    raise RuntimeError("server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--depth", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    routes = RouteIndex.from_text(API)
+    server = multiprocessing.Process(target=serve, args=(routes, "127.0.0.1", port, args.workers), daemon=True)
+    server.start()
+    try:
+        _wait_for(port)
+        completed = asyncio.run(_client(port, args.connections, args.depth, args.seconds))
+    finally:
+        server.terminate()
+        server.join()
+    print(f"{completed / args.seconds:,.0f} requests/s ({args.workers} worker(s), {args.connections} connections)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Deterministic synthetic .rest corpora for the benchmarks.
+
+`generate_corpus` builds a file with a given number of requests, body size, header count,
+comment density and variable density. The same arguments and seed always produce the same
+text, so timings taken on different commits parse identical input.
+
+Usage: python benchmarks/corpus.py [--requests N] [--body-bytes N] ... > corpus.rest
+"""
+
+import argparse
+import random
+import sys
+from dataclasses import asdict, dataclass
+
+METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+METHODS_WITH_BODY = ("POST", "PUT", "PATCH")
+VARIABLE_COUNT = 8
+WORDS = ("alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliet")
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """Shape of a generated corpus."""
+
+    requests: int = 1000
+    body_bytes: int = 256
+    headers: int = 4
+    comment_density: float = 0.1
+    variable_density: float = 0.2
+    seed: int = 0
+
+
+def _value(rng: random.Random, variable_density: float) -> str:
+    if rng.random() < variable_density:
+        return "{{var%d}}" % rng.randrange(VARIABLE_COUNT)
+    return rng.choice(WORDS) + str(rng.randrange(1000))
+
+
+def _comments(rng: random.Random, comment_density: float) -> list[str]:
+    if rng.random() < comment_density:
+        return [rng.choice(("# ", "// ")) + " ".join(rng.choices(WORDS, k=6))]
+    return []
+
+
+def _body(rng: random.Random, spec: CorpusSpec) -> list[str]:
+    lines = ["{"]
+    size = 2
+    field_index = 0
+    while size < spec.body_bytes:
+        line = '  "field%d": "%s",' % (field_index, _value(rng, spec.variable_density))
+        lines.append(line)
+        size += len(line) + 1
+        field_index += 1
+    if len(lines) > 1:
+        lines[-1] = lines[-1].rstrip(",")
+    lines.append("}")
+    return lines
+
+
+def generate_corpus(spec: CorpusSpec) -> str:
+    """Returns the .rest text described by `spec`."""
+    rng = random.Random(spec.seed)
+    lines = ["@var%d = value%d" % (index, index) for index in range(VARIABLE_COUNT)]
+    lines.append("")
+    for index in range(spec.requests):
+        method = rng.choice(METHODS)
+        lines.append(f"### Request {index}")
+        lines += _comments(rng, spec.comment_density)
+        path = "/".join(_value(rng, spec.variable_density) for _ in range(3))
+        lines.append(f"{method} https://{{{{host}}}}/v1/{path}?page={index} HTTP/1.1")
+        for header_index in range(spec.headers):
+            lines += _comments(rng, spec.comment_density / 4)
+            lines.append(f"X-Header-{header_index}: {_value(rng, spec.variable_density)}")
+        if method in METHODS_WITH_BODY:
+            lines.append("Content-Type: application/json")
+            lines.append("")
+            lines += _body(rng, spec)
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    defaults = CorpusSpec()
+    for name, value in asdict(defaults).items():
+        parser.add_argument("--" + name.replace("_", "-"), type=type(value), default=value)
+    sys.stdout.write(generate_corpus(CorpusSpec(**vars(parser.parse_args()))))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,119 @@
-from importlib.metadata import version, PackageNotFoundError
+from importlib import import_module
+from typing import TYPE_CHECKING
 
-from pyrestfile.parser import parse_rest_file
+from pyrestfile.batch import render_many
+from pyrestfile.compression import CompressionCache, compress_request
+from pyrestfile.directory import DirectoryParseResult, parse_rest_directory
+from pyrestfile.document import BlockInfo, RestDocument
+from pyrestfile.environments import EnvironmentMatrix, load_environments
+from pyrestfile.headers import Headers
+from pyrestfile.includes import FileBody, IncludeCache
+from pyrestfile.index import RestIndex
+from pyrestfile.mapped import MappedHTTPRequest, MappedRestFile, map_rest_file
+from pyrestfile.multipart import MultipartBody
+from pyrestfile.parser import iter_rest_file, parse_rest_file, parse_rest_path
 from pyrestfile.request_block_grammar import HTTPRequest
+from pyrestfile.stats import ParseStats
+from pyrestfile.templates import RequestTemplate, compile_rest_file
+from pyrestfile.vars import VariableCycleError
+from pyrestfile.wire import iter_wire_chunks
+
+if TYPE_CHECKING:
+    from pyrestfile.chain import ChainResult, run_chain
+    from pyrestfile.load import LatencyHistogram, LoadResult, Stage, run_load
+    from pyrestfile.runner import RunResult, run_requests
+    from pyrestfile.server import RouteIndex, serve
+    from pyrestfile.shards import ShardFile, shard, write_shards
+    from pyrestfile.watch import RequestSet, RestFileWatcher
+
+# The network, load, server, shard and watch modules pull in asyncio, ssl and threading,
+# so they are imported on first use rather than with the package.
+_LAZY_EXPORTS = {
+    "run_chain": "pyrestfile.chain",
+    "ChainResult": "pyrestfile.chain",
+    "run_load": "pyrestfile.load",
+    "Stage": "pyrestfile.load",
+    "LoadResult": "pyrestfile.load",
+    "LatencyHistogram": "pyrestfile.load",
+    "run_requests": "pyrestfile.runner",
+    "RunResult": "pyrestfile.runner",
+    "RouteIndex": "pyrestfile.server",
+    "serve": "pyrestfile.server",
+    "shard": "pyrestfile.shards",
+    "write_shards": "pyrestfile.shards",
+    "ShardFile": "pyrestfile.shards",
+    "RestFileWatcher": "pyrestfile.watch",
+    "RequestSet": "pyrestfile.watch",
+}
+
+
+def _version() -> str:
+    # importlib.metadata is slow to import (it brings in zipfile and threading).
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version(__package__ or "pyrestfile")
+    except PackageNotFoundError:
+        return "0.0.0"
+
+
+def __getattr__(name: str):
+    if name == "__version__":
+        value = globals()["__version__"] = _version()
+        return value
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_EXPORTS) | {"__version__"})
 
-try:
-    __version__ = version(__package__ or "pyrestfile")
-except PackageNotFoundError:
-    __version__ = "0.0.0"
 
 __all__ = [
     "__version__",
     "parse_rest_file",
+    "iter_rest_file",
+    "parse_rest_path",
+    "parse_rest_directory",
+    "DirectoryParseResult",
+    "map_rest_file",
+    "MappedRestFile",
+    "MappedHTTPRequest",
     "HTTPRequest",
+    "compile_rest_file",
+    "RequestTemplate",
+    "iter_wire_chunks",
+    "run_requests",
+    "RunResult",
+    "run_load",
+    "Stage",
+    "LoadResult",
+    "LatencyHistogram",
+    "ParseStats",
+    "FileBody",
+    "IncludeCache",
+    "RestDocument",
+    "BlockInfo",
+    "RestFileWatcher",
+    "RequestSet",
+    "RestIndex",
+    "render_many",
+    "VariableCycleError",
+    "EnvironmentMatrix",
+    "load_environments",
+    "run_chain",
+    "ChainResult",
+    "shard",
+    "write_shards",
+    "ShardFile",
+    "Headers",
+    "MultipartBody",
+    "compress_request",
+    "CompressionCache",
+    "RouteIndex",
+    "serve",
 ]
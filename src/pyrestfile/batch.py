@@ -0,0 +1,162 @@
+"""Rendering one request many times.
+
+`render_many` renders a RequestTemplate (or an unrendered HTTPRequest) once per row of
+variables. The template is split into literals and placeholders once, and every
+placeholder is bound up front to where its value comes from: a row column, the fixed
+`env`, or a builtin. Builtins are generated in bulk: UUIDs are formatted from one batch of
+random bytes per `batch_size` rows, and `{{$timestamp}}` reads the clock once per batch
+unless `exact_timestamps` is set. As with Renderer, every `{{$uuid}}` occurrence gets its
+own value.
+"""
+
+import os
+import time
+from itertools import count, islice
+from typing import Iterable, Iterator, Mapping, Optional, Sequence, Union
+
+from pyrestfile.compression import DEFAULT_ENCODING, compress_request
+from pyrestfile.headers import Headers
+from pyrestfile.request_block_grammar import VALIDATION_STRICT, HTTPRequest
+from pyrestfile.templates import Placeholder, RequestTemplate, TemplateString, compile_request
+
+DEFAULT_BATCH_SIZE = 1024
+UUID_BUILTIN = "$uuid"
+TIMESTAMP_BUILTIN = "$timestamp"
+_UUID_VARIANT = {digit: "89ab"[int(digit, 16) & 3] for digit in "0123456789abcdef"}
+
+EnvRows = Union[Iterable[Mapping[str, str]], Mapping[str, Sequence[str]]]
+
+
+def generate_uuids(number: int) -> list[str]:
+    """Returns `number` random (version 4) UUID strings, drawn from a single read of random bytes."""
+    digits = os.urandom(16 * number).hex()
+    variant = _UUID_VARIANT
+    return [
+        f"{digits[o : o + 8]}-{digits[o + 8 : o + 12]}-4{digits[o + 13 : o + 16]}-"
+        f"{variant[digits[o + 16]]}{digits[o + 17 : o + 20]}-{digits[o + 20 : o + 32]}"
+        for o in range(0, 32 * number, 32)
+    ]
+
+
+def _template_fields(template: RequestTemplate) -> list:
+    return [template.method, template.url, *(value for _, value in template.headers), template.body]
+
+
+def render_many(
+    template: Union[RequestTemplate, HTTPRequest],
+    n: Optional[int] = None,
+    env_rows: Optional[EnvRows] = None,
+    env: Optional[Mapping[str, str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    exact_timestamps: bool = False,
+) -> Iterator[HTTPRequest]:
+    """
+    Yields rendered requests, one per row. `env_rows` is either an iterable of dicts or a
+    mapping of variable name to a column of values; row values override `env`. Without
+    `env_rows`, `n` requests are rendered from `env` alone; with it, rendering stops when
+    the rows run out or after `n` rows, whichever comes first. A static template yields
+    its shared, read-only `static_request` for every row.
+    """
+    if isinstance(template, HTTPRequest):
+        template = compile_request(template)
+    if n is None and env_rows is None:
+        raise ValueError("render_many needs `n`, `env_rows`, or both")
+    env = env or {}
+
+    if isinstance(env_rows, Mapping):
+        columns = env_rows
+        rows: Iterable = count() if not columns else range(min(len(column) for column in columns.values()))
+    else:
+        columns = None
+        rows = count() if env_rows is None else env_rows
+    if n is not None:
+        rows = islice(rows, n)
+
+    if template.is_static:
+        for _ in rows:
+            yield template.static_request
+        return
+
+    fields = _template_fields(template)
+    placeholders = [p for field in fields if isinstance(field, TemplateString) for p in field.placeholders]
+    sources = [
+        _bind(placeholder, env, columns, by_row=columns is None and env_rows is not None)
+        for placeholder in placeholders
+    ]
+    uuids_per_row = sum(1 for kind, _ in sources if kind == UUID_BUILTIN)
+    header_names = [name for name, _ in template.headers]
+    validate = template.validation == VALIDATION_STRICT and isinstance(template.body, TemplateString)
+    encoding = template.annotations.get("compress")
+
+    uuids: list[str] = []
+    timestamp = ""
+    for index, row in enumerate(rows):
+        if index % batch_size == 0:
+            if uuids_per_row:
+                uuids = generate_uuids(uuids_per_row * batch_size)
+            timestamp = str(int(time.time()))
+        uuid_position = (index % batch_size) * uuids_per_row
+
+        values = []
+        for kind, source in sources:
+            if kind == "value":
+                values.append(source)
+            elif kind == "row":
+                values.append(row.get(source[0], source[1]))
+            elif kind == "column":
+                values.append(source[row])
+            elif kind == UUID_BUILTIN:
+                values.append(uuids[uuid_position])
+                uuid_position += 1
+            elif kind == TIMESTAMP_BUILTIN:
+                values.append(str(int(time.time())) if exact_timestamps else timestamp)
+            else:
+                values.append(source())
+
+        rendered = []
+        position = 0
+        for field in fields:
+            if isinstance(field, str):
+                rendered.append(field)
+                continue
+            literals = field.literals
+            parts = [literals[0]]
+            for literal_index in range(1, len(literals)):
+                parts.append(values[position])
+                parts.append(literals[literal_index])
+                position += 1
+            rendered.append("".join(parts))
+
+        request = HTTPRequest(
+            description=template.description,
+            method=rendered[0],
+            url=rendered[1],
+            http_version=template.http_version,
+            headers=Headers(tuple(zip(header_names, rendered[2:-1]))),
+            content_type=template.content_type,
+            body=rendered[-1],
+            annotations=dict(template.annotations),
+            body_file=template.body_file,
+        )
+        request._validation = template.validation
+        if validate:
+            request.validate()
+        if encoding is not None:
+            compress_request(request, encoding or DEFAULT_ENCODING)
+        yield request
+
+
+def _bind(
+    placeholder: Placeholder, env: Mapping[str, str], columns: Optional[Mapping[str, Sequence[str]]], by_row: bool
+) -> tuple[str, object]:
+    """Decides once where a placeholder's value comes from for every row."""
+    if placeholder.name in (UUID_BUILTIN, TIMESTAMP_BUILTIN):
+        return placeholder.name, None
+    if placeholder.builtin is not None:
+        return "builtin", placeholder.builtin
+    default = env.get(placeholder.name, placeholder.raw)
+    if columns is not None and placeholder.name in columns:
+        return "column", columns[placeholder.name]
+    if by_row:
+        return "row", (placeholder.name, default)
+    return "value", default
@@ -0,0 +1,139 @@
+"""On-disk cache of unrendered parse results.
+
+Entries are keyed by a hash of the file content, the library version and the record
+format, and hold the variable declarations plus the unpacked (not yet rendered) requests
+of one .rest file. A warm load therefore skips tokenization and body validation.
+
+The cache directory may be shared by many processes: entries are written to a temporary
+file and atomically renamed into place, reads refresh the entry's mtime, and the least
+recently used entries are evicted once the directory grows beyond `max_bytes`. The size of
+each directory is scanned once per process and then kept as a running total; it is
+rescanned when the total goes over budget and every EVICTION_RESCAN_STORES stores, to
+pick up entries written by other processes.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Optional
+
+from pyrestfile.request_block_grammar import HTTPRequest
+from pyrestfile.compact import StringPool
+from pyrestfile.serialization import RECORD_FORMAT_VERSION, request_from_record, request_to_record
+
+DEFAULT_MAX_CACHE_BYTES = 256 * 1024 * 1024
+CACHE_ENTRY_SUFFIX = ".json"
+
+
+EVICTION_RESCAN_STORES = 256
+
+_directory_sizes: dict[str, int] = {}
+_stores_since_scan: dict[str, int] = {}
+_salt: Optional[bytes] = None
+
+
+def _cache_salt() -> bytes:
+    """The library version and record format, computed on first use."""
+    global _salt
+    if _salt is None:
+        from pyrestfile import __version__
+
+        _salt = f"{__version__}:{RECORD_FORMAT_VERSION}".encode()
+    return _salt
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """Writes `data` to a temporary file next to `path` and renames it into place."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ParseCache:
+    """Size-bounded LRU cache of parse results stored as files in `cache_dir`."""
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._salt = _cache_salt()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, content: bytes, *options: str) -> str:
+        """Returns the cache key for the raw file content parsed with the given options."""
+        digest = hashlib.sha256(self._salt)
+        for option in options:
+            digest.update(b"\0" + option.encode())
+        digest.update(b"\0")
+        digest.update(content)
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + CACHE_ENTRY_SUFFIX)
+
+    def load(self, key: str) -> Optional[tuple[dict[str, str], list[HTTPRequest]]]:
+        """Returns the cached (variables, requests) pair, or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                variables, records = json.loads(f.read())
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        strings = StringPool()
+        return variables, [request_from_record(record, strings) for record in records]
+
+    def store(self, key: str, variables: dict[str, str], requests: list[HTTPRequest]) -> None:
+        """Writes an entry atomically, then evicts old entries if the cache is over budget."""
+        payload = json.dumps([variables, [request_to_record(r) for r in requests]], separators=(",", ":")).encode()
+        path = self._entry_path(key)
+        directory = os.path.abspath(self.cache_dir)
+        if directory not in _directory_sizes:
+            self.evict()
+        try:
+            replaced = os.stat(path).st_size
+        except OSError:
+            replaced = 0
+        write_atomic(path, payload)
+        _directory_sizes[directory] += len(payload) - replaced
+        _stores_since_scan[directory] += 1
+        if _directory_sizes[directory] > self.max_bytes or _stores_since_scan[directory] >= EVICTION_RESCAN_STORES:
+            self.evict()
+
+    def evict(self) -> None:
+        """
+        Scans the cache directory and deletes least recently used entries until the cache
+        fits in `max_bytes`. Resets the running size total.
+        """
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(CACHE_ENTRY_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total += stat.st_size
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        directory = os.path.abspath(self.cache_dir)
+        _directory_sizes[directory] = total
+        _stores_since_scan[directory] = 0
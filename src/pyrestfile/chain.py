@@ -0,0 +1,234 @@
+"""Running request flows that use values from earlier responses.
+
+A request can refer to the response of a named request (`# @name login`):
+
+    Authorization: Bearer {{login.response.body.token}}
+    X-Session: {{login.response.headers.X-Session-Id}}
+
+`body` alone is the whole response body; `body.<path>` walks the decoded JSON body, with
+numeric segments indexing into lists; `headers.<Name>` is a response header. Values that
+are not strings are inserted as JSON.
+
+`run_chain` builds a dependency graph from these references and sends every request as
+soon as the requests it refers to have completed, with at most `concurrency` in flight.
+A request whose dependency failed is not sent; its result records why.
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional, Union
+
+from pyrestfile.headers import header_pairs
+from pyrestfile.parser import _render_and_validate, unpack_rest_file_text
+from pyrestfile.request_block_grammar import VALIDATION_OFF, VALIDATION_STRICT, HTTPRequest, needs_rendering
+from pyrestfile.runner import DEFAULT_CONCURRENCY, DEFAULT_TIMEOUT, ConnectionPool, Response, RunResult
+from pyrestfile.vars import VAR_REFERENCE_PATTERN, Renderer
+
+RESPONSE_REFERENCE_PATTERN = re.compile(r"([\w-]+)\.response\.(body|headers)(?:\.(.+))?")
+
+
+def _fields(request: HTTPRequest) -> list[str]:
+    return [request.method, request.url, request.body, *(value for _, value in header_pairs(request.headers))]
+
+
+def response_references(request: HTTPRequest) -> set[str]:
+    """The `{{name.response...}}` references left in a rendered request."""
+    return {
+        reference
+        for value in _fields(request)
+        for reference in VAR_REFERENCE_PATTERN.findall(value)
+        if RESPONSE_REFERENCE_PATTERN.fullmatch(reference)
+    }
+
+
+def extract_response_value(response: Response, reference: str) -> str:
+    """Returns the value a `name.response.body...` or `name.response.headers...` reference selects."""
+    _, part, path = RESPONSE_REFERENCE_PATTERN.fullmatch(reference).groups()
+    if part == "headers":
+        value = response.header(path or "")
+        if value is None:
+            raise ValueError(f"{reference}: response has no {path!r} header")
+        return value
+    text = response.body.decode("utf-8", errors="replace")
+    if path is None:
+        return text
+    try:
+        value = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{reference}: response body is not JSON: {e}")
+    for key in path.split("."):
+        if isinstance(value, list) and key.lstrip("-").isdigit() and -len(value) <= int(key) < len(value):
+            value = value[int(key)]
+        elif isinstance(value, dict) and key in value:
+            value = value[key]
+        else:
+            raise ValueError(f"{reference}: no {key!r} in the response body")
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+@dataclass
+class ChainStep:
+    """One request of a flow and the named requests whose responses it needs."""
+
+    index: int
+    request: HTTPRequest
+    references: frozenset[str] = frozenset()
+    dependencies: frozenset[str] = frozenset()
+    validate: bool = False
+
+
+@dataclass
+class ChainResult:
+    """Results in request order, plus the response of every named request that completed."""
+
+    results: list[RunResult]
+    responses: dict[str, Response] = field(default_factory=dict)
+
+
+def plan_chain(
+    text: str,
+    env: Optional[dict[str, str]] = None,
+    validation: str = VALIDATION_STRICT,
+    base_dir: Optional[Union[str, os.PathLike]] = None,
+) -> list[ChainStep]:
+    """
+    Parses and renders the .rest text, leaving response references in place, and returns
+    one ChainStep per request. Raises ValueError if a reference names an unknown request
+    or the references form a cycle.
+    """
+    inline_vars, requests = unpack_rest_file_text(text, validation)
+    renderer = Renderer({**(env or {}), **inline_vars})
+    steps = []
+    for index, request in enumerate(requests):
+        deferred = request._validation == VALIDATION_STRICT and needs_rendering(request.body)
+        request._validation = VALIDATION_OFF
+        _render_and_validate(renderer, request, base_dir)
+        request._validation = validation
+        references = frozenset(response_references(request))
+        dependencies = frozenset(RESPONSE_REFERENCE_PATTERN.fullmatch(ref).group(1) for ref in references)
+        if deferred and not references:
+            request.validate()
+        steps.append(ChainStep(index, request, references, dependencies, validate=deferred and bool(references)))
+
+    by_name: dict[str, ChainStep] = {}
+    for step in steps:
+        if step.request.name is not None:
+            by_name.setdefault(step.request.name, step)
+    for step in steps:
+        for name in step.dependencies:
+            if name not in by_name:
+                raise ValueError(f"Request {step.index} refers to the response of unknown request {name!r}")
+    _check_cycles(by_name)
+    return steps
+
+
+def _check_cycles(by_name: dict[str, ChainStep]) -> None:
+    done: set[str] = set()
+    chain: list[str] = []
+
+    def visit(name: str) -> None:
+        if name in done:
+            return
+        if name in chain:
+            cycle = chain[chain.index(name) :] + [name]
+            raise ValueError("Request cycle: " + " -> ".join(cycle))
+        chain.append(name)
+        for dependency in by_name[name].dependencies:
+            visit(dependency)
+        chain.pop()
+        done.add(name)
+
+    for name in by_name:
+        visit(name)
+
+
+def _fill(request: HTTPRequest, values: dict[str, str]) -> None:
+    def substitute(match) -> str:
+        return values.get(match.group(1), match.group(0))
+
+    request.method = VAR_REFERENCE_PATTERN.sub(substitute, request.method)
+    request.url = VAR_REFERENCE_PATTERN.sub(substitute, request.url)
+    request.body = VAR_REFERENCE_PATTERN.sub(substitute, request.body)
+    request.headers = request.headers.render(lambda value: VAR_REFERENCE_PATTERN.sub(substitute, value))
+    request._json_cache = request._wire_cache = None
+
+
+async def run_chain_async(
+    steps: Iterable[ChainStep],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+    on_result: Optional[Callable[[RunResult], None]] = None,
+    pool: Optional[ConnectionPool] = None,
+) -> ChainResult:
+    """
+    Sends the planned steps, each as soon as its dependencies have completed, with at most
+    `concurrency` requests in flight. Steps are sent in file order among those that are ready.
+    """
+    steps = list(steps)
+    own_pool = pool is None
+    pool = pool or ConnectionPool()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    by_name = {}
+    for step in steps:
+        if step.request.name is not None:
+            by_name.setdefault(step.request.name, step)
+    finished = {step.index: asyncio.Event() for step in steps}
+    responses: dict[str, Response] = {}
+    results: list[Optional[RunResult]] = [None] * len(steps)
+
+    async def run(position: int, step: ChainStep) -> None:
+        request = step.request
+        for name in step.dependencies:
+            await finished[by_name[name].index].wait()
+        result = RunResult(index=step.index, description=request.description, method=request.method, url=request.url)
+        try:
+            failed = [name for name in sorted(step.dependencies) if name not in responses]
+            if failed:
+                raise ValueError(f"not sent: dependency {failed[0]!r} failed")
+            values = {ref: extract_response_value(responses[ref.split(".", 1)[0]], ref) for ref in step.references}
+            if values:
+                _fill(request, values)
+                result.method, result.url = request.method, request.url
+                if step.validate:
+                    request.validate()
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await asyncio.wait_for(pool.send(request), timeout)
+                finally:
+                    result.elapsed = time.perf_counter() - started
+            result.status = response.status
+            result.response_bytes = len(response.body)
+            if request.name is not None and by_name.get(request.name) is step:
+                responses[request.name] = response
+        except asyncio.TimeoutError:
+            result.error = f"timed out after {timeout}s"
+        except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+            result.error = f"{type(e).__name__}: {e}"
+        results[position] = result
+        finished[step.index].set()
+        if on_result is not None:
+            on_result(result)
+
+    try:
+        await asyncio.gather(*(run(position, step) for position, step in enumerate(steps)))
+    finally:
+        if own_pool:
+            await pool.close()
+    return ChainResult(results=results, responses=responses)
+
+
+def run_chain(
+    text: str,
+    env: Optional[dict[str, str]] = None,
+    validation: str = VALIDATION_STRICT,
+    base_dir: Optional[Union[str, os.PathLike]] = None,
+    **kwargs,
+) -> ChainResult:
+    """Plans the .rest text with plan_chain and runs it; keyword arguments go to run_chain_async."""
+    steps = plan_chain(text, env, validation, base_dir)
+    return asyncio.run(run_chain_async(steps, **kwargs))
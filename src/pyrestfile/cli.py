@@ -0,0 +1,157 @@
+"""Command line interface: `pyrest run api.rest`, `pyrest serve api.rest`."""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import Optional, Sequence
+
+from pyrestfile.chain import plan_chain, run_chain_async
+from pyrestfile.load import Stage, run_load
+from pyrestfile.parser import parse_rest_path
+from pyrestfile.runner import DEFAULT_CONCURRENCY, DEFAULT_TIMEOUT, RunResult, run_requests
+from pyrestfile.server import DEFAULT_HOST, DEFAULT_PORT, RouteIndex, serve
+from pyrestfile.shards import SHARD_SUFFIX, STRATEGIES, STRATEGY_ROUND_ROBIN, ShardFile, write_shards
+
+
+def _env_pair(pair: str) -> tuple[str, str]:
+    name, separator, value = pair.partition("=")
+    if not separator:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got {pair!r}")
+    return name, value
+
+
+def _stage(spec: str) -> Stage:
+    duration, separator, target_rps = spec.partition(":")
+    try:
+        return Stage(duration=float(duration), target_rps=float(target_rps))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected SECONDS:RPS, got {spec!r}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="pyrest", description="Work with VS Code REST-Client .rest files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="send every request in a .rest file and print JSON-lines results")
+    run.add_argument("path", help="the .rest file to run")
+    run.add_argument(
+        "-e", "--env", action="append", type=_env_pair, default=[], metavar="NAME=VALUE", help="set a variable"
+    )
+    run.add_argument("-c", "--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="requests in flight")
+    run.add_argument("-t", "--timeout", type=float, default=DEFAULT_TIMEOUT, help="per-request timeout in seconds")
+    run.add_argument("-n", "--repeat", type=int, default=1, help="send the whole file this many times")
+    run.add_argument(
+        "--chain", action="store_true", help="fill in {{name.response...}} references, sending each request when ready"
+    )
+
+    load = commands.add_parser("load", help="send weighted requests at a target arrival rate and print latencies")
+    load.add_argument("path", help="the .rest file (or .shard file) to load-test")
+    load.add_argument("-e", "--env", action="append", type=_env_pair, default=[], metavar="NAME=VALUE")
+    load.add_argument(
+        "-s",
+        "--stage",
+        action="append",
+        type=_stage,
+        required=True,
+        metavar="SECONDS:RPS",
+        help="ramp linearly to RPS over SECONDS; repeat for more stages",
+    )
+    load.add_argument("--start-rps", type=float, default=0.0, help="arrival rate at the start of the first stage")
+    load.add_argument("-t", "--timeout", type=float, default=DEFAULT_TIMEOUT, help="per-request timeout in seconds")
+    load.add_argument("--seed", type=int, default=None, help="seed for weighted request selection")
+    load.add_argument("--json", action="store_true", help="print mergeable JSON results instead of a table")
+
+    shard = commands.add_parser("shard", help="split the requests of .rest files into shard files")
+    shard.add_argument("paths", nargs="+", help="the .rest files to shard")
+    shard.add_argument("-e", "--env", action="append", type=_env_pair, default=[], metavar="NAME=VALUE")
+    shard.add_argument("-n", "--shards", type=int, required=True, help="number of shards")
+    shard.add_argument("--strategy", choices=STRATEGIES, default=STRATEGY_ROUND_ROBIN)
+    shard.add_argument("--seed", type=int, default=0, help="seed for reproducible shards")
+    shard.add_argument("-o", "--output", default=".", help="directory to write the shard files to")
+
+    stub = commands.add_parser("serve", help="answer the requests of a .rest file with canned responses")
+    stub.add_argument("path", help="the .rest file to serve")
+    stub.add_argument("-e", "--env", action="append", type=_env_pair, default=[], metavar="NAME=VALUE")
+    stub.add_argument("--host", default=DEFAULT_HOST, help="address to listen on")
+    stub.add_argument("-p", "--port", type=int, default=DEFAULT_PORT, help="port to listen on")
+    stub.add_argument("-w", "--workers", type=int, default=1, help="processes sharing the port (SO_REUSEPORT)")
+    return parser
+
+
+def run_command(args: argparse.Namespace) -> int:
+    failures = 0
+
+    def emit(result: RunResult) -> None:
+        nonlocal failures
+        failures += result.error is not None
+        sys.stdout.write(json.dumps(result.to_dict()) + "\n")
+
+    if args.chain:
+        with open(args.path, encoding="utf-8") as f:
+            text = f.read()
+        base_dir = os.path.dirname(os.path.abspath(args.path))
+        for _ in range(args.repeat):
+            steps = plan_chain(text, dict(args.env), base_dir=base_dir)
+            asyncio.run(run_chain_async(steps, concurrency=args.concurrency, timeout=args.timeout, on_result=emit))
+        sys.stdout.flush()
+        return 1 if failures else 0
+
+    requests = parse_rest_path(args.path, env=dict(args.env))
+    run_requests(
+        (request for _ in range(args.repeat) for request in requests),
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        on_result=emit,
+        collect=False,
+    )
+    sys.stdout.flush()
+    return 1 if failures else 0
+
+
+def load_command(args: argparse.Namespace) -> int:
+    if args.path.endswith(SHARD_SUFFIX):
+        with ShardFile(args.path) as shard_file:
+            requests = list(shard_file)
+    else:
+        requests = parse_rest_path(args.path, env=dict(args.env))
+    result = run_load(requests, args.stage, start_rps=args.start_rps, timeout=args.timeout, seed=args.seed)
+    if args.json:
+        sys.stdout.write(json.dumps(result.to_dict()) + "\n")
+    else:
+        sys.stdout.write(result.format_summary() + "\n")
+    return 0
+
+
+def shard_command(args: argparse.Namespace) -> int:
+    requests = [request for path in args.paths for request in parse_rest_path(path, env=dict(args.env))]
+    for path in write_shards(requests, args.output, args.shards, args.strategy, args.seed):
+        sys.stdout.write(path + "\n")
+    return 0
+
+
+def serve_command(args: argparse.Namespace) -> int:
+    routes = RouteIndex.from_path(args.path, env=dict(args.env))
+    sys.stderr.write(
+        f"Serving {len(routes.routes)} routes on http://{args.host}:{args.port} with {args.workers} worker(s)\n"
+    )
+    serve(routes, args.host, args.port, args.workers)
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "run":
+        return run_command(args)
+    if args.command == "load":
+        return load_command(args)
+    if args.command == "shard":
+        return shard_command(args)
+    if args.command == "serve":
+        return serve_command(args)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
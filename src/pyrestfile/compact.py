@@ -0,0 +1,37 @@
+"""Sharing strings and headers between parsed requests.
+
+Requests parsed from one file mostly repeat the same methods, URLs and headers. A
+StringPool interns those strings for the duration of a parse, so equal values are stored
+once, and hands out Headers that share one HeaderBlock (and its cached encoding) with
+every request whose headers are equal. A request's headers stop sharing the block the
+first time they are modified.
+"""
+
+from pyrestfile.headers import HeaderBlock, HeaderPairs, Headers, header_pairs
+
+
+class _InternTable(dict):
+    def __missing__(self, key: str) -> str:
+        self[key] = key
+        return key
+
+
+class StringPool:
+    """Interns strings and header mappings for one parse."""
+
+    def __init__(self):
+        self._strings = _InternTable()
+        self._headers: dict[tuple, HeaderBlock] = {}
+        self.intern = self._strings.__getitem__
+
+    def headers(self, headers: HeaderPairs) -> Headers:
+        """Returns Headers backed by the pool's block for header lines equal to `headers`."""
+        key = header_pairs(headers)
+        block = self._headers.get(key)
+        if block is None:
+            strings = self._strings
+            block = self._headers[key] = HeaderBlock(tuple((strings[name], strings[value]) for name, value in key))
+        return Headers(block)
+
+    def __len__(self) -> int:
+        return len(self._strings)
@@ -0,0 +1,326 @@
+"""Incrementally re-parsed .rest documents.
+
+A RestDocument splits its text into segments at delimiter lines and keeps the offsets,
+variable declarations, parsed request and rendered request of every segment.
+`apply_edit` re-tokenizes only the segments an edit touches. Rendered requests are reused
+until a variable they reference changes value, so after a one-line edit the work done is
+proportional to the edited block rather than to the file.
+
+The requests are the same as parse_rest_file would produce for `text`: variables are
+file-global and the last declaration of a name wins. Offsets are indices into `text` and
+line numbers are 0-based. Builtins such as `{{$uuid}}` are evaluated when a block is
+rendered, so a block keeps its value until it is edited or its variables change.
+"""
+
+import bisect
+import copy
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+from pyrestfile.headers import header_pairs
+from pyrestfile.parser import _render_and_validate
+from pyrestfile.request_block_grammar import VALIDATION_STRICT, HTTPRequest, unpack_request_block
+from pyrestfile.includes import parse_include
+from pyrestfile.multipart import has_include_parts
+from pyrestfile.top_level_grammar import DELIMITER_LINE_MATCHER, RequestBlock, parse_block_lines
+from pyrestfile.vars import BUILTINS, VAR_DECLARATION_PATTERN, VAR_REFERENCE_PATTERN, Renderer, VariableCycleError
+
+LINE_PATTERN = re.compile(r"[^\n]*\n|[^\n]+\Z")
+
+
+@dataclass(frozen=True)
+class BlockInfo:
+    """Position of one request block in the document. `end` is exclusive; `end_line` inclusive."""
+
+    index: int
+    description: Optional[str]
+    start: int
+    end: int
+    start_line: int
+    end_line: int
+
+
+@dataclass(frozen=True)
+class VariableDeclaration:
+    """An `@name = value` line and its position in the document."""
+
+    name: str
+    value: str
+    start: int
+    end: int
+    line: int
+
+
+@dataclass(eq=False)
+class _Segment:
+    """A delimiter line (or the start of the file) and every line up to the next delimiter."""
+
+    text: str
+    start: int = 0
+    start_line: int = 0
+    declarations: list[tuple[str, str, int, int, int]] = field(default_factory=list)
+    block: Optional[RequestBlock] = None
+    request: Optional[HTTPRequest] = None
+    error: Optional[Exception] = None
+    references: Optional[frozenset[str]] = frozenset()
+    rendered: Optional[HTTPRequest] = None
+
+    @property
+    def line_count(self) -> int:
+        return self.text.count("\n")
+
+
+def split_segments(text: str) -> list[str]:
+    """Splits text into segments, each starting at a delimiter line (except possibly the first)."""
+    segments = []
+    current: list[str] = []
+    for line in LINE_PATTERN.findall(text):
+        if current and DELIMITER_LINE_MATCHER.match(line.rstrip("\r\n")):
+            segments.append("".join(current))
+            current = []
+        current.append(line)
+    if current or not segments:
+        segments.append("".join(current))
+    return segments
+
+
+def _starts_with_delimiter(text: str) -> bool:
+    return bool(DELIMITER_LINE_MATCHER.match(text.split("\n", 1)[0].rstrip("\r")))
+
+
+def _references(request: HTTPRequest) -> Optional[frozenset[str]]:
+    """Variable names a request refers to, or None if it includes a file that may refer to any."""
+    if parse_include(request.body) is not None or has_include_parts(request.body):
+        return None
+    fields = [request.method, request.url, request.body, *(value for _, value in header_pairs(request.headers))]
+    return frozenset(name for value in fields for name in VAR_REFERENCE_PATTERN.findall(value) if name not in BUILTINS)
+
+
+class RestDocument:
+    """A .rest document that can be edited in place and re-parsed incrementally."""
+
+    def __init__(
+        self,
+        text: str,
+        env: Optional[dict[str, str]] = None,
+        validation: str = VALIDATION_STRICT,
+        base_dir: Optional[Union[str, os.PathLike]] = None,
+    ):
+        self.env = dict(env or {})
+        self.validation = validation
+        self.base_dir = base_dir
+        self._segments: list[_Segment] = []
+        self._starts: list[int] = []
+        self._length = 0
+        self._referencing: dict[str, set[_Segment]] = {}
+        self._referencing_all: set[_Segment] = set()
+        self.variables: dict[str, str] = {}
+        self._renderer = Renderer(self.variables)
+        self._variables_error: Optional[VariableCycleError] = None
+        self._replace_segments(0, 0, split_segments(text))
+        self._update_variables()
+
+    @property
+    def text(self) -> str:
+        return "".join(segment.text for segment in self._segments)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def apply_edit(self, start: int, end: int, new_text: str) -> None:
+        """Replaces text[start:end] with `new_text` and re-parses the blocks it touches."""
+        if not 0 <= start <= end <= self._length:
+            raise ValueError(f"Edit range {start}:{end} is outside the document (length {self._length})")
+        first = max(0, bisect.bisect_right(self._starts, start) - 1)
+        last = max(0, bisect.bisect_right(self._starts, end) - 1)
+        if last < len(self._segments) - 1 and end == self._starts[last + 1]:
+            last += 1
+
+        region_start = self._starts[first]
+        region = "".join(segment.text for segment in self._segments[first : last + 1])
+        region = region[: start - region_start] + new_text + region[end - region_start :]
+        pieces = split_segments(region)
+        if pieces == [""] and last - first + 1 < len(self._segments):
+            pieces = []
+        elif first > 0 and not _starts_with_delimiter(pieces[0]):
+            first -= 1
+            pieces[0] = self._segments[first].text + pieces[0]
+
+        had_declarations = any(segment.declarations for segment in self._segments[first : last + 1])
+        new_segments = self._replace_segments(first, last + 1, pieces)
+        if had_declarations or any(segment.declarations for segment in new_segments):
+            self._update_variables()
+
+    def _replace_segments(self, first: int, stop: int, pieces: list[str]) -> list[_Segment]:
+        old_segments = self._segments[first:stop]
+        if first < len(self._segments):
+            position, line = self._segments[first].start, self._segments[first].start_line
+        else:
+            position, line = 0, 0
+        new_segments = []
+        for text in pieces:
+            segment = _Segment(text=text, start=position, start_line=line)
+            self._analyze(segment)
+            new_segments.append(segment)
+            position += len(text)
+            line += segment.line_count
+
+        # The new segments are fully analyzed before anything is changed, so a parse error
+        # leaves the document as it was.
+        for segment in old_segments:
+            self._unindex(segment)
+        for segment in new_segments:
+            self._index(segment)
+        old_length = sum(len(segment.text) for segment in old_segments)
+        old_lines = sum(segment.line_count for segment in old_segments)
+        offset_delta = sum(len(text) for text in pieces) - old_length
+        line_delta = line - (old_segments[0].start_line + old_lines if old_segments else 0)
+        self._segments[first:stop] = new_segments
+        self._starts[first:stop] = [segment.start for segment in new_segments]
+        for index in range(first + len(new_segments), len(self._segments)):
+            segment = self._segments[index]
+            segment.start += offset_delta
+            segment.start_line += line_delta
+            self._starts[index] = segment.start
+        self._length += offset_delta
+        return new_segments
+
+    def _analyze(self, segment: _Segment) -> None:
+        code_lines = []
+        offset = 0
+        for line_number, line in enumerate(LINE_PATTERN.findall(segment.text)):
+            stripped = line.rstrip("\r\n")
+            match = VAR_DECLARATION_PATTERN.match(stripped)
+            if match:
+                name, value = match.group(1).strip(), match.group(2).strip()
+                segment.declarations.append((name, value, offset, offset + len(stripped), line_number))
+            else:
+                code_lines.append(stripped)
+            offset += len(line)
+
+        has_content = any(line.strip() for line in code_lines[1 if _starts_with_delimiter(segment.text) else 0 :])
+        if not has_content:
+            return
+        segment.block = parse_block_lines(code_lines)
+        try:
+            segment.request = unpack_request_block(segment.block, self.validation)
+        except ValueError as e:
+            segment.error = e
+            return
+        segment.references = _references(segment.request)
+
+    def _index(self, segment: _Segment) -> None:
+        if segment.references is None:
+            self._referencing_all.add(segment)
+        else:
+            for name in segment.references:
+                self._referencing.setdefault(name, set()).add(segment)
+
+    def _unindex(self, segment: _Segment) -> None:
+        self._referencing_all.discard(segment)
+        for name in segment.references or ():
+            self._referencing[name].discard(segment)
+
+    def _update_variables(self) -> None:
+        variables = dict(self.env)
+        for segment in self._segments:
+            for name, value, *_ in segment.declarations:
+                variables[name] = value
+        old = self._renderer.resolved
+        self.variables.clear()
+        self.variables.update(variables)
+        try:
+            # Raises again on every call while the variables still form a cycle.
+            self._renderer.refresh()
+        except VariableCycleError as e:
+            self._variables_error = e
+            return
+        self._variables_error = None
+        new = self._renderer.resolved
+        changed = {name for name in old.keys() | new.keys() if old.get(name) != new.get(name)}
+        for name in changed:
+            for segment in self._referencing.get(name, ()):
+                segment.rendered = None
+        if changed:
+            for segment in self._referencing_all:
+                segment.rendered = None
+
+    def _render(self, segment: _Segment) -> HTTPRequest:
+        if segment.rendered is None:
+            request = copy.copy(segment.request)
+            request.headers = request.headers.copy()
+            request._json_cache = request._wire_cache = None
+            segment.rendered = _render_and_validate(self._renderer, request, self.base_dir)
+        return segment.rendered
+
+    @property
+    def requests(self) -> list[HTTPRequest]:
+        """
+        The rendered requests, as parse_rest_file would return them. Unchanged blocks return
+        the same HTTPRequest objects as before an edit. Raises the first block error, if any,
+        or VariableCycleError if the variables refer to each other in a cycle.
+        """
+        if self._variables_error is not None:
+            raise self._variables_error
+        requests = []
+        for segment in self._segments:
+            if segment.error is not None:
+                raise segment.error
+            if segment.request is not None:
+                requests.append(self._render(segment))
+        return requests
+
+    @property
+    def errors(self) -> list[tuple[BlockInfo, Exception]]:
+        """Blocks that failed to parse, with their errors."""
+        return [
+            (info, segment.error)
+            for info, segment in zip(self.blocks, self._block_segments())
+            if segment.error is not None
+        ]
+
+    def _block_segments(self) -> list[_Segment]:
+        return [segment for segment in self._segments if segment.block is not None]
+
+    @property
+    def blocks(self) -> list[BlockInfo]:
+        """Offsets and line ranges of every request block, in order."""
+        return [self._block_info(index, segment) for index, segment in enumerate(self._block_segments())]
+
+    def _block_info(self, index: int, segment: _Segment) -> BlockInfo:
+        return BlockInfo(
+            index=index,
+            description=segment.block.description,
+            start=segment.start,
+            end=segment.start + len(segment.text),
+            start_line=segment.start_line,
+            end_line=segment.start_line + max(0, len(LINE_PATTERN.findall(segment.text)) - 1),
+        )
+
+    def block_at(self, offset: int) -> Optional[BlockInfo]:
+        """The block containing `offset`, or None if it falls outside every block."""
+        position = bisect.bisect_right(self._starts, offset) - 1
+        if position < 0 or offset >= self._length:
+            return None
+        segment = self._segments[position]
+        if segment.block is None:
+            return None
+        index = sum(1 for earlier in self._segments[:position] if earlier.block is not None)
+        return self._block_info(index, segment)
+
+    @property
+    def declarations(self) -> list[VariableDeclaration]:
+        """Every variable declaration, in document order."""
+        return [
+            VariableDeclaration(
+                name=name,
+                value=value,
+                start=segment.start + start,
+                end=segment.start + end,
+                line=segment.start_line + line,
+            )
+            for segment in self._segments
+            for name, value, start, end, line in segment.declarations
+        ]
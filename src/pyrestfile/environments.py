@@ -0,0 +1,179 @@
+"""Rendering one .rest file for many environments.
+
+Environments use the REST Client layout: a JSON object mapping environment names to
+variables, with a `$shared` section whose variables every environment inherits (and may
+override). Environment values may refer to shared ones as `{{$shared name}}`. The object
+may also be the `rest-client.environmentVariables` entry of a VS Code settings file.
+
+An EnvironmentMatrix parses and compiles the file once into RequestTemplates and renders
+them per environment on demand. Rendered requests are shared between environments where
+possible: a request whose variables have the same values in two environments is the same
+HTTPRequest object in both, equal rendered strings are stored once, and a request whose
+headers are all literal shares one header block. Treat rendered requests as read-only.
+"""
+
+import json
+import os
+import re
+from typing import Iterator, Mapping, Optional, Union
+
+from pyrestfile.headers import Headers, header_pairs
+from pyrestfile.parser import unpack_rest_file_text
+from pyrestfile.request_block_grammar import VALIDATION_STRICT, HTTPRequest
+from pyrestfile.templates import RequestTemplate, TemplateString, _compile_request
+from pyrestfile.vars import Renderer, dynamic_variables, resolve_variables
+
+SHARED_ENVIRONMENT = "$shared"
+SETTINGS_KEY = "rest-client.environmentVariables"
+SHARED_REFERENCE_PATTERN = re.compile(r"{{\s*\$shared\s+([\w.-]+)\s*}}")
+
+Environments = Union[str, os.PathLike, Mapping[str, Mapping[str, object]]]
+
+
+def _to_string(value: object) -> str:
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def load_environments(source: Environments) -> dict[str, dict[str, str]]:
+    """
+    Returns every named environment with the `$shared` variables merged in. `source` is a
+    path to a JSON file or the already decoded object. Non-string values are JSON-encoded.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding="utf-8") as f:
+            source = json.load(f)
+    if not isinstance(source, Mapping):
+        raise ValueError("Environments must be a JSON object of environment name to variables")
+    if isinstance(source.get(SETTINGS_KEY), Mapping):
+        source = source[SETTINGS_KEY]
+
+    shared = {name: _to_string(value) for name, value in source.get(SHARED_ENVIRONMENT, {}).items()}
+
+    def shared_value(match) -> str:
+        return shared.get(match.group(1), match.group(0))
+
+    environments = {}
+    for env_name, variables in source.items():
+        if env_name == SHARED_ENVIRONMENT:
+            continue
+        if not isinstance(variables, Mapping):
+            raise ValueError(f"Environment {env_name!r} must be a JSON object")
+        merged = dict(shared)
+        for name, value in variables.items():
+            merged[name] = SHARED_REFERENCE_PATTERN.sub(shared_value, _to_string(value))
+        environments[env_name] = merged
+    return environments
+
+
+class _SharedTemplate:
+    """Renders one template for many environments, reusing requests and headers where it can."""
+
+    def __init__(self, template: RequestTemplate):
+        self.template = template
+        fields = [template.method, template.url, template.body, *(value for _, value in template.headers)]
+        placeholders = [p for value in fields if isinstance(value, TemplateString) for p in value.placeholders]
+        self.names = tuple(dict.fromkeys(p.name for p in placeholders if p.builtin is None))
+        self.reusable = all(p.builtin is None for p in placeholders)
+        self.headers = None
+        if all(isinstance(value, str) for _, value in template.headers):
+            self.headers = Headers(template.headers)
+        self.rendered: dict[tuple, HTTPRequest] = {}
+
+    def render(self, env: Mapping[str, str], strings: dict[str, str]) -> HTTPRequest:
+        template = self.template
+        if template.static_request is not None:
+            return template.static_request
+        key = tuple(env.get(name) for name in self.names)
+        if self.reusable and key in self.rendered:
+            return self.rendered[key]
+
+        request = template.render(env)
+        request.method = strings.setdefault(request.method, request.method)
+        request.url = strings.setdefault(request.url, request.url)
+        request.body = strings.setdefault(request.body, request.body)
+        if self.headers is not None:
+            request.headers = self.headers.copy()
+        else:
+            request.headers = Headers(
+                (name, strings.setdefault(value, value)) for name, value in header_pairs(request.headers)
+            )
+        if self.reusable:
+            request = self.rendered.setdefault(key, request)
+        return request
+
+
+class EnvironmentMatrix:
+    """A .rest file parsed once and rendered for every environment."""
+
+    def __init__(
+        self,
+        text: str,
+        environments: Environments,
+        validation: str = VALIDATION_STRICT,
+        base_dir: Optional[Union[str, os.PathLike]] = None,
+    ):
+        self.environments = load_environments(environments)
+        self.validation = validation
+        self.inline_vars, requests = unpack_rest_file_text(text, validation)
+        variables = resolve_variables(self.inline_vars)
+        self.templates = [_compile_request(request, variables, base_dir) for request in requests]
+        self._shared = [_SharedTemplate(template) for template in self.templates]
+        self._strings: dict[str, str] = {}
+        self._rendered: dict[str, list[HTTPRequest]] = {}
+
+    @classmethod
+    def from_path(
+        cls, path: Union[str, os.PathLike], environments: Environments, validation: str = VALIDATION_STRICT
+    ) -> "EnvironmentMatrix":
+        """Reads the .rest file at `path`; body includes are resolved relative to it."""
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        return cls(text, environments, validation, base_dir=os.path.dirname(os.path.abspath(path)))
+
+    @property
+    def names(self) -> list[str]:
+        """Environment names, in the order they were defined."""
+        return list(self.environments)
+
+    def variables(self, name: str) -> dict[str, str]:
+        """
+        The resolved variables of one environment, as parse_rest_file would use them: file
+        variables win over environment ones. Builtins in environment values are evaluated
+        once per environment.
+        """
+        if name not in self.environments:
+            raise KeyError(f"Unknown environment {name!r}")
+        resolved = resolve_variables({**self.environments[name], **self.inline_vars})
+        dynamic = dynamic_variables(resolved)
+        if dynamic:
+            renderer = Renderer({})
+            for variable in dynamic:
+                resolved[variable] = renderer.render_string(resolved[variable])
+        return resolved
+
+    def render(self, name: str) -> list[HTTPRequest]:
+        """The requests rendered for environment `name`. Rendered on first use, then cached."""
+        requests = self._rendered.get(name)
+        if requests is None:
+            env = self.variables(name)
+            requests = [shared.render(env, self._strings) for shared in self._shared]
+            requests = self._rendered.setdefault(name, requests)
+        return requests
+
+    def items(self) -> Iterator[tuple[str, list[HTTPRequest]]]:
+        """Yields `(environment name, requests)` pairs, rendering each environment as it is reached."""
+        for name in self.environments:
+            yield name, self.render(name)
+
+    def render_all(self, workers: Optional[int] = None) -> dict[str, list[HTTPRequest]]:
+        """
+        Renders every environment, using up to `workers` threads, and returns the requests by
+        environment name. Threads (rather than processes) keep the rendered requests shared.
+        """
+        names = self.names
+        if workers == 1 or len(names) < 2:
+            return dict(self.items())
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(zip(names, executor.map(self.render, names)))
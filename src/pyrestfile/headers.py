@@ -0,0 +1,163 @@
+"""Request headers.
+
+Headers keeps every header line in order, including repeated names, and looks names up
+case-insensitively. Its contents live in an immutable HeaderBlock that is shared between
+Headers objects with equal contents (see compact.StringPool) and that caches the encoded
+`Name: value\\r\\n` lines, so a request's headers are encoded once however often it is
+sent. Modifying a Headers object gives it a new block; objects sharing the old block, and
+the old block's encoding, are unaffected.
+
+As a mapping, Headers has one key per distinct name (ignoring case, spelled as on its
+first line) and `headers[name]` is the last value of `name`, as when the file is read top
+to bottom. `get_all` returns every value of a name and `pairs` every line.
+"""
+
+from collections.abc import MutableMapping
+from typing import Iterable, Iterator, Mapping, Optional, Union
+
+HeaderPairs = Union[Mapping[str, str], Iterable[tuple[str, str]]]
+
+
+class HeaderBlock:
+    """An immutable sequence of header lines with a lazy case-insensitive index and encoding."""
+
+    __slots__ = ("pairs", "_index", "_encoded")
+
+    def __init__(self, pairs: tuple[tuple[str, str], ...]):
+        self.pairs = pairs
+        self._index: Optional[dict[str, list[int]]] = None
+        self._encoded: Optional[bytes] = None
+
+    @property
+    def index(self) -> dict[str, list[int]]:
+        """Positions of each header, keyed by lowercase name."""
+        if self._index is None:
+            index: dict[str, list[int]] = {}
+            for position, (name, _) in enumerate(self.pairs):
+                index.setdefault(name.lower(), []).append(position)
+            self._index = index
+        return self._index
+
+    @property
+    def encoded(self) -> bytes:
+        """The `Name: value\\r\\n` lines in latin-1, leaving out any Content-Length."""
+        if self._encoded is None:
+            self._encoded = "".join(
+                f"{name}: {value}\r\n" for name, value in self.pairs if name.lower() != "content-length"
+            ).encode("latin-1")
+        return self._encoded
+
+
+def header_pairs(headers: HeaderPairs) -> tuple[tuple[str, str], ...]:
+    """Returns headers given as a mapping, Headers or (name, value) pairs as a tuple of pairs."""
+    if isinstance(headers, Headers):
+        return headers.pairs
+    if isinstance(headers, Mapping):
+        return tuple(headers.items())
+    return tuple((name, value) for name, value in headers)
+
+
+class Headers(MutableMapping):
+    """Ordered, case-insensitive, multi-value request headers with a cached encoding."""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, headers: Union[HeaderPairs, HeaderBlock] = ()):
+        self._data = headers if isinstance(headers, HeaderBlock) else HeaderBlock(header_pairs(headers))
+
+    @property
+    def pairs(self) -> tuple[tuple[str, str], ...]:
+        """Every header line as a (name, value) pair, in order."""
+        return self._data.pairs
+
+    @property
+    def encoded(self) -> bytes:
+        """The encoded header lines, cached until the headers are modified."""
+        return self._data.encoded
+
+    def get_all(self, name: str) -> list[str]:
+        """Every value of `name`, in order."""
+        pairs = self._data.pairs
+        return [pairs[position][1] for position in self._data.index.get(name.lower(), ())]
+
+    def add(self, name: str, value: str) -> None:
+        """Appends a header line, keeping any existing lines with the same name."""
+        self._data = HeaderBlock(self._data.pairs + ((name, value),))
+
+    def render(self, render_value) -> "Headers":
+        """Returns headers with `render_value` applied to each value; `self` if nothing changed."""
+        pairs = self._data.pairs
+        rendered = tuple((name, render_value(value)) for name, value in pairs)
+        if rendered == pairs:
+            return self
+        return Headers(HeaderBlock(rendered))
+
+    def __getitem__(self, name: str) -> str:
+        positions = self._data.index.get(name.lower())
+        if not positions:
+            raise KeyError(name)
+        return self._data.pairs[positions[-1]][1]
+
+    def __setitem__(self, name: str, value: str) -> None:
+        positions = self._data.index.get(name.lower())
+        pairs = self._data.pairs
+        if not positions:
+            self._data = HeaderBlock(pairs + ((name, value),))
+        elif len(positions) > 1 or pairs[positions[0]] != (name, value):
+            first = positions[0]
+            drop = set(positions[1:])
+            self._data = HeaderBlock(
+                tuple(
+                    (name, value) if position == first else pair
+                    for position, pair in enumerate(pairs)
+                    if position not in drop
+                )
+            )
+
+    def __delitem__(self, name: str) -> None:
+        positions = self._data.index.get(name.lower())
+        if not positions:
+            raise KeyError(name)
+        drop = set(positions)
+        self._data = HeaderBlock(tuple(pair for position, pair in enumerate(self._data.pairs) if position not in drop))
+
+    def __iter__(self) -> Iterator[str]:
+        pairs = self._data.pairs
+        return (pairs[positions[0]][0] for positions in self._data.index.values())
+
+    def __len__(self) -> int:
+        return len(self._data.index)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and name.lower() in self._data.index
+
+    def copy(self) -> "Headers":
+        """A copy that shares this object's block until either is modified."""
+        return Headers(self._data)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Headers):
+            return self._data.pairs == other._data.pairs
+        if isinstance(other, Mapping):
+            index, pairs = self._data.index, self._data.pairs
+            if len(index) != len(other):
+                return False
+            names = set()
+            for name, value in other.items():
+                if not isinstance(name, str):
+                    return False
+                key = name.lower()
+                positions = index.get(key)
+                if not positions or pairs[positions[-1]][1] != value:
+                    return False
+                names.add(key)
+            return len(names) == len(index)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Headers({list(self._data.pairs)!r})"
+
+    def __reduce__(self):
+        return Headers, (self._data.pairs,)
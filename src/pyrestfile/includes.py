@@ -0,0 +1,114 @@
+"""File-include bodies.
+
+A request body consisting of a single `< path` line is sent from that file as-is: it is
+exposed as a FileBody, which knows its length and streams the file in chunks, and is never
+read into memory as a whole by the parser or the wire encoder. A `<@ path` body is read as
+UTF-8 text and rendered like an inline body, so it may contain `{{...}}` placeholders.
+
+Relative paths are resolved against the directory of the .rest file (or the `base_dir`
+passed to the parse functions). Text includes are read through an IncludeCache keyed by
+path, modification time and size, so requests that share a payload read it once.
+"""
+
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_INCLUDE_CACHE_BYTES = 64 * 1024 * 1024
+INCLUDE_LINE_PATTERN = re.compile(r"<(@)?[ \t]+(\S[^\r\n]*?)\s*")
+
+
+@dataclass(frozen=True)
+class BodyInclude:
+    """A parsed `< path` or `<@ path` body."""
+
+    path: str
+    render: bool = False
+
+    def resolve(self, base_dir: Optional[str] = None) -> str:
+        path = os.path.expanduser(self.path)
+        if base_dir is not None and not os.path.isabs(path):
+            path = os.path.join(base_dir, path)
+        return os.path.normpath(path)
+
+
+def parse_include(body: str) -> Optional[BodyInclude]:
+    """Returns the include a body consists of, or None for an ordinary body."""
+    if not body.startswith("<"):
+        return None
+    match = INCLUDE_LINE_PATTERN.fullmatch(body)
+    if not match:
+        return None
+    return BodyInclude(path=match.group(2), render=bool(match.group(1)))
+
+
+@dataclass(frozen=True)
+class FileBody:
+    """A request body that is streamed from a file rather than held in memory."""
+
+    path: str
+
+    @property
+    def content_length(self) -> int:
+        return os.stat(self.path).st_size
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Yields the file's bytes in chunks of at most `chunk_size`."""
+        with open(self.path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+    def read(self) -> bytes:
+        """Reads the whole file. Prefer iter_chunks for large payloads."""
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+class IncludeCache:
+    """
+    LRU cache of included text files keyed by (path, mtime, size), bounded by the total
+    number of bytes held. A file that changes on disk is re-read on its next use; files
+    larger than the bound are read but not cached.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_INCLUDE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[int, int, str]] = OrderedDict()
+
+    def read_text(self, path: str) -> str:
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        entry = self._entries.get(path)
+        if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+            self.hits += 1
+            self._entries.move_to_end(path)
+            return entry[2]
+
+        self.misses += 1
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        if entry is not None:
+            self._remove(path)
+        if stat.st_size <= self.max_bytes:
+            self._entries[path] = (stat.st_mtime_ns, stat.st_size, text)
+            self.total_bytes += stat.st_size
+            while self.total_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+        return text
+
+    def _remove(self, path: str) -> None:
+        _, size, _ = self._entries.pop(path)
+        self.total_bytes -= size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.total_bytes = 0
+
+
+INCLUDE_CACHE = IncludeCache()
@@ -0,0 +1,164 @@
+"""Random access to single requests in large .rest files.
+
+A RestIndex keeps a sidecar file (by default `<file>.idx`) with the byte range, ordinal,
+`# @name` and description of every request block, plus the file's variable declarations.
+`RestIndex.get` seeks straight to one block and parses only that block, so looking up a
+request costs the same in a file of ten requests as in one of a million.
+
+The sidecar records the size, mtime and SHA-256 of the file it was built from. Every
+lookup checks the size and mtime; when they differ the file is hashed, and the index is
+rebuilt if the content changed.
+"""
+
+import hashlib
+import json
+import os
+from typing import Optional, Union
+
+from pyrestfile.cache import write_atomic
+from pyrestfile.parser import _render_and_validate
+from pyrestfile.request_block_grammar import VALIDATION_STRICT, HTTPRequest, unpack_request_block
+from pyrestfile.top_level_grammar import DELIMITER_LINE_MATCHER, parse_block_lines
+from pyrestfile.vars import VAR_DECLARATION_PATTERN, Renderer
+
+INDEX_FORMAT_VERSION = 1
+INDEX_SUFFIX = ".idx"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_index_data(path: str) -> dict:
+    """Scans the .rest file at `path` once and returns the index contents."""
+    stat = os.stat(path)
+    digest = hashlib.sha256()
+    variables: dict[str, str] = {}
+    blocks: list[list] = []
+
+    def close_block(start: int, end: int, lines: list[str], has_content: bool) -> None:
+        if has_content:
+            block = parse_block_lines(lines)
+            blocks.append([start, end, block.annotations.get("name"), block.description])
+
+    position = block_start = 0
+    block_lines: list[str] = []
+    has_content = False
+    with open(path, "rb") as f:
+        for raw_line in f:
+            digest.update(raw_line)
+            line = raw_line.decode("utf-8").rstrip("\r\n")
+            if DELIMITER_LINE_MATCHER.match(line):
+                close_block(block_start, position, block_lines, has_content)
+                block_start, block_lines, has_content = position, [line], False
+            elif match := VAR_DECLARATION_PATTERN.match(line):
+                variables[match.group(1).strip()] = match.group(2).strip()
+            else:
+                block_lines.append(line)
+                has_content = has_content or bool(line.strip())
+            position += len(raw_line)
+    close_block(block_start, position, block_lines, has_content)
+
+    return {
+        "format": INDEX_FORMAT_VERSION,
+        "source": {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()},
+        "variables": variables,
+        "blocks": blocks,
+    }
+
+
+class RestIndex:
+    """A persistent name and ordinal index over the request blocks of one .rest file."""
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        index_path: Optional[Union[str, os.PathLike]] = None,
+        validation: str = VALIDATION_STRICT,
+    ):
+        self.path = os.fspath(path)
+        self.index_path = os.fspath(index_path) if index_path is not None else self.path + INDEX_SUFFIX
+        self.validation = validation
+        self.base_dir = os.path.dirname(os.path.abspath(self.path))
+        data = self._load()
+        if data is None:
+            self.rebuild()
+        else:
+            self._set_data(data, write=False)
+            self.refresh()
+
+    def _load(self) -> Optional[dict]:
+        try:
+            with open(self.index_path, "rb") as f:
+                data = json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("format") != INDEX_FORMAT_VERSION:
+            return None
+        return data
+
+    def _set_data(self, data: dict, write: bool = True) -> None:
+        self._data = data
+        self._names: dict[str, int] = {}
+        for ordinal, (_, _, name, _) in enumerate(data["blocks"]):
+            if name is not None:
+                self._names.setdefault(name, ordinal)
+        if write:
+            write_atomic(self.index_path, json.dumps(data, separators=(",", ":")).encode())
+
+    def rebuild(self) -> None:
+        """Rescans the source file and rewrites the sidecar."""
+        self._set_data(build_index_data(self.path))
+
+    def refresh(self) -> bool:
+        """Rebuilds the index if the source file changed since it was built. Returns True if it did."""
+        stat = os.stat(self.path)
+        source = self._data["source"]
+        if (stat.st_size, stat.st_mtime_ns) == (source["size"], source["mtime_ns"]):
+            return False
+        if stat.st_size == source["size"] and _file_digest(self.path) == source["sha256"]:
+            self._set_data({**self._data, "source": {**source, "mtime_ns": stat.st_mtime_ns}})
+            return False
+        self.rebuild()
+        return True
+
+    @property
+    def variables(self) -> dict[str, str]:
+        """The file's variable declarations (the last declaration of each name wins)."""
+        return dict(self._data["variables"])
+
+    @property
+    def names(self) -> list[str]:
+        """Request names, in file order."""
+        return list(self._names)
+
+    def __len__(self) -> int:
+        return len(self._data["blocks"])
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._names
+
+    def get(self, key: Union[str, int], env: Optional[dict[str, str]] = None) -> HTTPRequest:
+        """
+        Returns the request with the given `# @name` (the first one, if repeated) or ordinal,
+        rendered exactly as parse_rest_file would render it.
+        """
+        self.refresh()
+        if isinstance(key, str):
+            if key not in self._names:
+                raise KeyError(f"No request named {key!r} in {self.path}")
+            key = self._names[key]
+        start, end, _, _ = self._data["blocks"][key]
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            text = f.read(end - start).decode("utf-8")
+
+        lines = [line for line in text.split("\n") if not VAR_DECLARATION_PATTERN.match(line.rstrip("\r"))]
+        request = unpack_request_block(parse_block_lines(line.rstrip("\r") for line in lines), self.validation)
+        renderer = Renderer({**(env or {}), **self._data["variables"]})
+        return _render_and_validate(renderer, request, self.base_dir)
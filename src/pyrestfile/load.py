@@ -0,0 +1,278 @@
+"""Open-model load generation.
+
+`run_load` sends requests at a target arrival rate that follows a list of ramp stages,
+independently of how fast responses come back. Each request has an intended send time
+taken from the schedule, and its latency is measured from that time rather than from
+when it actually went out, so a slow server cannot hide its own queueing delay
+(coordinated omission). Requests are picked at random, weighted by their `# @weight N`
+annotation.
+
+Latencies go into one LatencyHistogram per request name. Histograms are mergeable and
+serializable, so results from several worker processes can be combined exactly.
+"""
+
+import asyncio
+import bisect
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Iterator, Optional, Sequence
+
+from pyrestfile.request_block_grammar import HTTPRequest, request_key, request_weight
+from pyrestfile.runner import DEFAULT_TIMEOUT, ConnectionPool
+
+DEFAULT_MAX_IN_FLIGHT = 1024
+DEFAULT_SIGNIFICANT_FIGURES = 2
+SUMMARY_PERCENTILES = (50.0, 99.0, 99.9)
+
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of latencies in microseconds. Values are bucketed log-linearly, so
+    every recorded value is reproduced within `significant_figures` decimal digits of
+    precision using a small, sparse set of counters.
+    """
+
+    def __init__(self, significant_figures: int = DEFAULT_SIGNIFICANT_FIGURES):
+        self.significant_figures = significant_figures
+        self._sub_bucket_bits = math.ceil(math.log2(2 * 10**significant_figures))
+        self._sub_bucket_count = 1 << self._sub_bucket_bits
+        self._sub_bucket_half = self._sub_bucket_count // 2
+        self.counts: dict[int, int] = {}
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def _index(self, value: int) -> int:
+        if value < self._sub_bucket_count:
+            return value
+        bucket = value.bit_length() - self._sub_bucket_bits
+        return self._sub_bucket_count + (bucket - 1) * self._sub_bucket_half + (value >> bucket) - self._sub_bucket_half
+
+    def _highest_equivalent(self, index: int) -> int:
+        if index < self._sub_bucket_count:
+            return index
+        bucket, sub_bucket = divmod(index - self._sub_bucket_count, self._sub_bucket_half)
+        bucket += 1
+        return ((sub_bucket + self._sub_bucket_half + 1) << bucket) - 1
+
+    def record(self, seconds: float, count: int = 1) -> None:
+        """Records a latency given in seconds."""
+        value = max(0, int(seconds * 1_000_000))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.min = value if not self.total else min(self.min, value)
+        self.max = max(self.max, value)
+        self.total += count
+
+    def percentile(self, percentile: float) -> float:
+        """Returns the latency in seconds at or below which `percentile` percent of values fall."""
+        if not self.total:
+            return 0.0
+        rank = max(1, math.ceil(percentile / 100 * self.total))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._highest_equivalent(index), self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Adds the counts of `other`, which must use the same precision."""
+        if other.significant_figures != self.significant_figures:
+            raise ValueError("Cannot merge histograms with different significant_figures")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        if other.total:
+            self.min = other.min if not self.total else min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self.total += other.total
+
+    def to_dict(self) -> dict:
+        return {
+            "significant_figures": self.significant_figures,
+            "counts": {str(index): count for index, count in self.counts.items()},
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        histogram = cls(data["significant_figures"])
+        histogram.counts = {int(index): count for index, count in data["counts"].items()}
+        histogram.total = data["total"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
+
+
+@dataclass(frozen=True)
+class Stage:
+    """Ramp the arrival rate linearly to `target_rps` over `duration` seconds."""
+
+    duration: float
+    target_rps: float
+
+
+def arrival_times(stages: Sequence[Stage], start_rps: float = 0.0) -> Iterator[float]:
+    """
+    Yields the intended send times, in seconds from the start, for an arrival rate that
+    ramps linearly between stage targets. The n-th request is due when the integral of the
+    rate reaches n, so the schedule is exact for any ramp shape.
+    """
+    stage_start = 0.0
+    arrivals_before = 0.0
+    next_arrival = 0
+    rate = start_rps
+    for stage in stages:
+        slope = (stage.target_rps - rate) / stage.duration if stage.duration else 0.0
+        arrivals_in_stage = (rate + stage.target_rps) / 2 * stage.duration
+        while next_arrival < arrivals_before + arrivals_in_stage:
+            due = next_arrival - arrivals_before
+            if slope:
+                offset = (-rate + math.sqrt(max(0.0, rate * rate + 2 * slope * due))) / slope
+            else:
+                offset = due / rate
+            yield stage_start + offset
+            next_arrival += 1
+        stage_start += stage.duration
+        arrivals_before += arrivals_in_stage
+        rate = stage.target_rps
+
+
+@dataclass
+class LoadResult:
+    """Per-request-name latency histograms and error counts of a load run."""
+
+    histograms: dict[str, LatencyHistogram] = field(default_factory=dict)
+    errors: dict[str, int] = field(default_factory=dict)
+    duration: float = 0.0
+
+    def record(self, key: str, latency: float, error: Optional[str] = None) -> None:
+        if error is not None:
+            self.errors[key] = self.errors.get(key, 0) + 1
+            return
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        histogram.record(latency)
+
+    def merge(self, other: "LoadResult") -> None:
+        """Merges results from another worker into this one."""
+        for key, histogram in other.histograms.items():
+            if key in self.histograms:
+                self.histograms[key].merge(histogram)
+            else:
+                self.histograms[key] = LatencyHistogram.from_dict(histogram.to_dict())
+        for key, count in other.errors.items():
+            self.errors[key] = self.errors.get(key, 0) + count
+        self.duration = max(self.duration, other.duration)
+
+    def summary(self) -> dict[str, dict]:
+        """Count, errors and p50/p99/p99.9/max latency in milliseconds per request name."""
+        summary = {}
+        for key in sorted(set(self.histograms) | set(self.errors)):
+            histogram = self.histograms.get(key) or LatencyHistogram()
+            row = {"count": histogram.total, "errors": self.errors.get(key, 0)}
+            for percentile in SUMMARY_PERCENTILES:
+                row[f"p{percentile:g}"] = round(histogram.percentile(percentile) * 1000, 3)
+            row["max"] = round(histogram.max / 1000, 3)
+            summary[key] = row
+        return summary
+
+    def format_summary(self) -> str:
+        """The summary as a fixed-width text table."""
+        columns = ["count", "errors", *(f"p{p:g}" for p in SUMMARY_PERCENTILES), "max"]
+        summary = self.summary()
+        width = max([len("request"), *map(len, summary)])
+        lines = ["request".ljust(width) + "".join(column.rjust(10) for column in columns)]
+        for key, row in summary.items():
+            lines.append(key.ljust(width) + "".join(f"{row[column]:>10g}" for column in columns))
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        return {
+            "histograms": {key: histogram.to_dict() for key, histogram in self.histograms.items()},
+            "errors": dict(self.errors),
+            "duration": self.duration,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LoadResult":
+        histograms = {key: LatencyHistogram.from_dict(value) for key, value in data["histograms"].items()}
+        return cls(histograms=histograms, errors=dict(data["errors"]), duration=data["duration"])
+
+
+class WeightedChooser:
+    """Picks requests at random in proportion to their `@weight` annotation (default 1)."""
+
+    def __init__(self, requests: Sequence[HTTPRequest], seed: Optional[int] = None):
+        if not requests:
+            raise ValueError("Cannot choose from an empty request list")
+        self.requests = list(requests)
+        self._cumulative = []
+        total = 0.0
+        for request in self.requests:
+            total += request_weight(request)
+            self._cumulative.append(total)
+        if not total:
+            raise ValueError("All request weights are zero")
+        self._random = random.Random(seed).random
+
+    def choose(self) -> HTTPRequest:
+        return self.requests[bisect.bisect_right(self._cumulative, self._random() * self._cumulative[-1])]
+
+
+async def run_load_async(
+    requests: Sequence[HTTPRequest],
+    stages: Sequence[Stage],
+    start_rps: float = 0.0,
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    seed: Optional[int] = None,
+) -> LoadResult:
+    """
+    Sends weighted-random requests on the open-model schedule given by `stages`. At most
+    `max_in_flight` requests are outstanding; requests due beyond that wait, and the wait
+    counts towards their latency.
+    """
+    loop = asyncio.get_running_loop()
+    chooser = WeightedChooser(requests, seed)
+    pool = ConnectionPool()
+    in_flight = asyncio.Semaphore(max_in_flight)
+    result = LoadResult()
+    tasks = set()
+
+    async def send(request: HTTPRequest, intended: float) -> None:
+        error = None
+        async with in_flight:
+            try:
+                await asyncio.wait_for(pool.send(request), timeout)
+            except asyncio.TimeoutError:
+                error = "timeout"
+            except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+                error = type(e).__name__
+        result.record(request_key(request), loop.time() - intended, error)
+
+    start = loop.time()
+    try:
+        for offset in arrival_times(stages, start_rps):
+            intended = start + offset
+            delay = intended - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(send(chooser.choose(), intended))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+    finally:
+        await pool.close()
+    result.duration = loop.time() - start
+    return result
+
+
+def run_load(requests: Sequence[HTTPRequest], stages: Sequence[Stage], **kwargs) -> LoadResult:
+    """Synchronous wrapper around run_load_async; accepts the same keyword arguments."""
+    return asyncio.run(run_load_async(requests, stages, **kwargs))
@@ -0,0 +1,208 @@
+"""Memory-mapped parsing of .rest files.
+
+`map_rest_file` maps the file read-only and scans it as bytes, line by line, with regular
+expressions that run directly against the mapping. Request lines and headers are decoded
+as they are found, but bodies are only recorded as byte offsets: a MappedHTTPRequest
+decodes its body on access, or exposes it as a zero-copy memoryview. Memory use therefore
+grows with the number of requests rather than with the total size of the bodies.
+
+Bodies are not JSON-validated here, since that would mean decoding every body up front.
+Blocks that contain no request line are skipped.
+"""
+
+import mmap
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Iterator, Optional, Union
+
+from pyrestfile.headers import Headers
+from pyrestfile.request_block_grammar import HTTPRequest, unpack_headers, unpack_request_line
+from pyrestfile.top_level_grammar import parse_annotation
+from pyrestfile.vars import VAR_DECLARATION_PATTERN, Renderer
+from pyrestfile.wire import encode_request
+
+DELIMITER_LINE_BYTES_PATTERN = re.compile(rb"\s*#{3,}[ \t]*(.*?)\s*")
+BLANK_LINE_BYTES_PATTERN = re.compile(rb"\s*")
+COMMENT_LINE_BYTES_PATTERN = re.compile(rb"\s*(?://|#(?!##))")
+VAR_DECLARATION_BYTES_PATTERN = re.compile(rb"\s*@(\w+)\s*=\s*(.+?)\s*")
+VAR_DECLARATION_LINE_BYTES_PATTERN = re.compile(rb"^\s*@\w+\s*=\s*\S", re.MULTILINE)
+WHITESPACE_BYTES = b" \t\r\n\f\v"
+
+
+@dataclass
+class MappedHTTPRequest:
+    """An HTTPRequest whose body stays in the memory-mapped file until it is accessed."""
+
+    description: Optional[str]
+    method: str
+    url: str
+    http_version: str = ""
+    headers: Headers = field(default_factory=Headers)
+    content_type: str = ""
+    annotations: dict[str, str] = field(default_factory=dict)
+    _source: Optional["MappedRestFile"] = field(default=None, repr=False, compare=False)
+    _body_start: int = field(default=0, repr=False)
+    _body_end: int = field(default=0, repr=False)
+
+    @property
+    def body_size(self) -> int:
+        """Size of the raw body in the file, in bytes."""
+        return self._body_end - self._body_start
+
+    @property
+    def body(self) -> str:
+        """The body decoded, cleaned and rendered exactly as parse_rest_file would produce it."""
+        if self._body_start == self._body_end:
+            return ""
+        text = self._source._mapping[self._body_start : self._body_end].decode("utf-8")
+        lines = [line.rstrip() for line in text.splitlines() if not VAR_DECLARATION_PATTERN.match(line)]
+        return self._source.renderer.render_string("\n".join(lines).strip())
+
+    @property
+    def body_bytes(self) -> Union[memoryview, bytes]:
+        """
+        The body as bytes. When it holds no placeholders or variable declarations this is a
+        zero-copy memoryview of the file, with line endings and trailing whitespace as written;
+        otherwise it is the encoded `body`.
+        """
+        mapping = self._source._mapping
+        start, end = self._body_start, self._body_end
+        needs_rendering = mapping.find(b"{{", start, end) != -1
+        if needs_rendering or VAR_DECLARATION_LINE_BYTES_PATTERN.search(mapping, start, end):
+            return self.body.encode("utf-8")
+        return memoryview(mapping)[start:end]
+
+    def to_wire(self) -> bytes:
+        """Returns the exact HTTP/1.1 request bytes; see pyrestfile.wire.iter_wire_chunks to avoid the copy."""
+        return encode_request(self)
+
+    def materialize(self) -> HTTPRequest:
+        """Returns a regular HTTPRequest with the body decoded."""
+        return HTTPRequest(
+            description=self.description,
+            method=self.method,
+            url=self.url,
+            http_version=self.http_version,
+            headers=self.headers.copy(),
+            content_type=self.content_type,
+            body=self.body,
+            annotations=dict(self.annotations),
+        )
+
+
+@dataclass
+class _PendingBlock:
+    description: Optional[str]
+    request_line: str = ""
+    header_lines: list[str] = field(default_factory=list)
+    annotations: dict[str, str] = field(default_factory=dict)
+    body_start: int = 0
+    body_end: int = 0
+
+
+class MappedRestFile:
+    """A memory-mapped .rest file and the requests parsed from it. Close it when done."""
+
+    def __init__(self, path: Union[str, os.PathLike], env: Optional[dict[str, str]] = None):
+        self.path = os.fspath(path)
+        self.variables: dict[str, str] = {}
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        blocks = self._scan()
+        self.renderer = Renderer({**(env or {}), **self.variables})
+        self.requests = [self._build_request(block) for block in blocks if block.request_line]
+
+    def _scan(self) -> list[_PendingBlock]:
+        mapping = self._mapping
+        size = len(mapping)
+        blocks = [_PendingBlock(description=None)]
+        state = "request_line"
+        position = 0
+        while position < size:
+            newline = mapping.find(b"\n", position)
+            line_end = size if newline == -1 else newline
+            next_position = line_end + 1
+            block = blocks[-1]
+
+            var_match = VAR_DECLARATION_BYTES_PATTERN.fullmatch(mapping, position, line_end)
+            if var_match:
+                name, value = var_match.group(1, 2)
+                self.variables[name.decode("utf-8")] = value.decode("utf-8").strip()
+            elif delimiter_match := DELIMITER_LINE_BYTES_PATTERN.fullmatch(mapping, position, line_end):
+                blocks.append(_PendingBlock(description=delimiter_match.group(1).decode("utf-8")))
+                state = "request_line"
+            elif BLANK_LINE_BYTES_PATTERN.fullmatch(mapping, position, line_end):
+                if state == "headers":
+                    state = "before_body"
+            elif state == "body":
+                block.body_end = self._rstrip(position, line_end)
+            elif COMMENT_LINE_BYTES_PATTERN.match(mapping, position, line_end) and state != "before_body":
+                if state == "headers":
+                    state = "before_body"
+                elif state == "request_line":
+                    annotation = parse_annotation(mapping[position:line_end].decode("utf-8"))
+                    if annotation:
+                        block.annotations[annotation[0]] = annotation[1]
+            elif state == "request_line":
+                block.request_line = mapping[position:line_end].decode("utf-8").strip()
+                state = "headers"
+            elif state == "headers":
+                block.header_lines.append(mapping[position:line_end].decode("utf-8").rstrip())
+            else:
+                block.body_start = BLANK_LINE_BYTES_PATTERN.match(mapping, position, line_end).end()
+                block.body_end = self._rstrip(position, line_end)
+                state = "body"
+            position = next_position
+        return blocks
+
+    def _rstrip(self, start: int, end: int) -> int:
+        mapping = self._mapping
+        while end > start and mapping[end - 1] in WHITESPACE_BYTES:
+            end -= 1
+        return end
+
+    def _build_request(self, block: _PendingBlock) -> MappedHTTPRequest:
+        render = self.renderer.render_string
+        parsed_request_line = unpack_request_line(block.request_line)
+        parsed_headers = unpack_headers("\n".join(block.header_lines))
+        return MappedHTTPRequest(
+            description=block.description,
+            method=render(parsed_request_line.method),
+            url=render(parsed_request_line.url),
+            http_version=parsed_request_line.http_version,
+            headers=parsed_headers.headers.render(render),
+            content_type=parsed_headers.content_type,
+            annotations=block.annotations,
+            _source=self,
+            _body_start=block.body_start,
+            _body_end=block.body_end,
+        )
+
+    def __iter__(self) -> Iterator[MappedHTTPRequest]:
+        return iter(self.requests)
+
+    def __len__(self) -> int:
+        return len(self.requests)
+
+    def __getitem__(self, index: int) -> MappedHTTPRequest:
+        return self.requests[index]
+
+    def close(self) -> None:
+        """Unmaps the file. Raises BufferError while body memoryviews are still alive."""
+        if isinstance(self._mapping, mmap.mmap):
+            self._mapping.close()
+
+    def __enter__(self) -> "MappedRestFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def map_rest_file(path: Union[str, os.PathLike], env: Optional[dict[str, str]] = None) -> MappedRestFile:
+    """
+    Memory-map the .rest file at `path` and parse it into MappedHTTPRequest objects.
+    """
+    return MappedRestFile(path, env)
@@ -0,0 +1,170 @@
+"""Streamed multipart bodies.
+
+A request whose Content-Type is `multipart/...; boundary=...` may give the contents of a
+part as a file include, as in REST Client:
+
+    --boundary
+    Content-Disposition: form-data; name="file"; filename="big.bin"
+    Content-Type: application/octet-stream
+
+    < ./big.bin
+    --boundary--
+
+Such a body is parsed into MultipartParts and exposed as a MultipartBody in the request's
+`body_file`, like a whole-body `< path` include. The delimiters, part headers and inline
+parts are encoded once; `< path` parts are streamed from disk by `iter_chunks`, so the body
+is sent with constant memory whatever the size of the files, and `content_length` is the
+exact length without reading them. `<@ path` parts are read as text and rendered.
+
+Inline lines are joined with CRLF, as multipart requires. Multipart bodies without file
+parts are left as ordinary text bodies.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional, Union
+
+from pyrestfile.includes import DEFAULT_CHUNK_SIZE, INCLUDE_CACHE, BodyInclude, FileBody, parse_include
+
+BOUNDARY_PATTERN = re.compile(r"""boundary\s*=\s*(?:"([^"]+)"|([^;\s]+))""", re.IGNORECASE)
+INCLUDE_PART_PATTERN = re.compile(r"^<@?[ \t]+\S", re.MULTILINE)
+PART_NAME_PATTERN = re.compile(r"""(?:^|;)\s*name\s*=\s*(?:"([^"]*)"|([^;\s]+))""", re.IGNORECASE)
+
+
+def multipart_boundary(content_type: str) -> Optional[str]:
+    """The boundary of a multipart Content-Type, or None for any other content type."""
+    if not content_type.lower().startswith("multipart/"):
+        return None
+    match = BOUNDARY_PATTERN.search(content_type)
+    return match and (match.group(1) or match.group(2))
+
+
+def has_include_parts(body: str) -> bool:
+    """Cheap check for part contents given as `< path` or `<@ path` lines."""
+    return "<" in body and INCLUDE_PART_PATTERN.search(body) is not None
+
+
+@dataclass(frozen=True)
+class MultipartPart:
+    """One part of a multipart body: its header lines and either inline text or a file."""
+
+    headers: tuple[tuple[str, str], ...] = ()
+    text: str = ""
+    file: Optional[FileBody] = None
+
+    @property
+    def name(self) -> Optional[str]:
+        """The form field name from the part's Content-Disposition, if any."""
+        for header, value in self.headers:
+            if header.lower() == "content-disposition":
+                match = PART_NAME_PATTERN.search(value.partition(";")[2])
+                if match:
+                    return match.group(1) if match.group(1) is not None else match.group(2)
+        return None
+
+
+@dataclass(frozen=True)
+class MultipartBody:
+    """A multipart request body that streams its file parts from disk."""
+
+    boundary: str
+    parts: tuple[MultipartPart, ...]
+    _segments: tuple[Union[bytes, FileBody], ...] = field(init=False, repr=False, compare=False)
+    _fixed_length: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        segments: list[Union[bytes, FileBody]] = []
+        pending = []
+        for part in self.parts:
+            pending.append(f"--{self.boundary}\r\n")
+            pending += [f"{name}: {value}\r\n" for name, value in part.headers]
+            pending.append("\r\n")
+            if part.file is None:
+                pending.append(part.text)
+            else:
+                segments.append("".join(pending).encode("utf-8"))
+                segments.append(part.file)
+                pending = []
+            pending.append("\r\n")
+        pending.append(f"--{self.boundary}--\r\n")
+        segments.append("".join(pending).encode("utf-8"))
+        object.__setattr__(self, "_segments", tuple(segments))
+        object.__setattr__(self, "_fixed_length", sum(len(s) for s in segments if isinstance(s, bytes)))
+
+    @property
+    def content_length(self) -> int:
+        """The encoded length of the body; file parts are sized from the file system."""
+        return self._fixed_length + sum(s.content_length for s in self._segments if isinstance(s, FileBody))
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Union[bytes, memoryview]]:
+        """Yields the encoded body in chunks of at most `chunk_size`, reading files as it goes."""
+        for segment in self._segments:
+            if isinstance(segment, FileBody):
+                yield from segment.iter_chunks(chunk_size)
+            else:
+                view = memoryview(segment)
+                for start in range(0, len(view), chunk_size):
+                    yield view[start : start + chunk_size]
+
+    def read(self) -> bytes:
+        """Encodes the whole body in memory. Prefer iter_chunks for large files."""
+        return b"".join(self.iter_chunks())
+
+
+def _parse_part(lines: list[str], base_dir: Optional[str], render: Callable[[str], str]) -> MultipartPart:
+    blank = next((index for index, line in enumerate(lines) if not line.strip()), len(lines))
+    headers = []
+    for line in lines[:blank]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers.append((name.strip(), value.strip()))
+    text = "\r\n".join(lines[blank + 1 :])
+    include = parse_include(text)
+    if include is None:
+        return MultipartPart(tuple(headers), text=text)
+    path = BodyInclude(include.path).resolve(base_dir)
+    if include.render:
+        return MultipartPart(tuple(headers), text=render(INCLUDE_CACHE.read_text(path)))
+    return MultipartPart(tuple(headers), file=FileBody(path))
+
+
+def parse_multipart(
+    body: str,
+    boundary: str,
+    base_dir: Optional[str] = None,
+    render: Optional[Callable[[str], str]] = None,
+) -> MultipartBody:
+    """
+    Splits a multipart body into its parts. Text before the first delimiter and after the
+    closing one is ignored. Include paths are resolved against `base_dir`, and the text of
+    `<@ path` includes is passed through `render`.
+    """
+    delimiter = f"--{boundary}"
+    parts = []
+    current: Optional[list[str]] = None
+    for line in body.splitlines():
+        stripped = line.rstrip()
+        if stripped in (delimiter, f"{delimiter}--"):
+            if current is not None:
+                parts.append(_parse_part(current, base_dir, render or str))
+                current = None
+            if stripped != delimiter:
+                break
+            current = []
+        elif current is not None:
+            current.append(line)
+    if current is not None:
+        parts.append(_parse_part(current, base_dir, render or str))
+    return MultipartBody(boundary, tuple(parts))
+
+
+def streamed_multipart(
+    body: str, content_type: str, base_dir: Optional[str] = None, render: Optional[Callable[[str], str]] = None
+) -> Optional[MultipartBody]:
+    """Parses `body` if it is a multipart body with file parts; returns None otherwise."""
+    if not has_include_parts(body):
+        return None
+    boundary = multipart_boundary(content_type)
+    if boundary is None:
+        return None
+    return parse_multipart(body, boundary, base_dir, render)
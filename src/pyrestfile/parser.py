@@ -1,23 +1,271 @@
-from typing import List
-from pyrestfile.top_level_grammar import parse_rest_file_text
-from pyrestfile.request_block_grammar import HTTPRequest, unpack_request_block
-from pyrestfile.vars import collect_var_values, Renderer, strip_var_declarations
+import io
+import os
+import time
+from typing import Iterable, Iterator, List, Optional, Union
+from pyrestfile.cache import DEFAULT_MAX_CACHE_BYTES, ParseCache
+from pyrestfile.compact import StringPool
+from pyrestfile.compression import DEFAULT_ENCODING, compress_request
+from pyrestfile.includes import INCLUDE_CACHE, BodyInclude, FileBody, parse_include
+from pyrestfile.multipart import has_include_parts, streamed_multipart
+from pyrestfile.stats import ParseStats
+from pyrestfile.top_level_grammar import iter_request_blocks, parse_block, parse_rest_file_text, split_along_delimiters
+from pyrestfile.request_block_grammar import (
+    VALIDATION_STRICT,
+    HTTPRequest,
+    needs_rendering,
+    unpack_request_block,
+)
+from pyrestfile.vars import collect_var_values, extract_var_declarations, Renderer, strip_var_declarations
 
 
-def parse_rest_file(text: str, env: dict[str, str] = {}) -> List[HTTPRequest]:
+def parse_rest_file(
+    text: str,
+    env: dict[str, str] = {},
+    validation: str = VALIDATION_STRICT,
+    stats: Optional[ParseStats] = None,
+    base_dir: Optional[Union[str, os.PathLike]] = None,
+    compress: Optional[str] = None,
+) -> List[HTTPRequest]:
     """
     Parse the input .rest file text and return a list of HTTPRequest objects.
+
+    `validation` selects how JSON bodies are checked: "strict" raises ValueError while
+    parsing, "lazy" on first use of the decoded body, and "off" never does so implicitly.
+    Pass a ParseStats as `stats` to record per-phase timings and counters.
+    Relative `< path` body includes are resolved against `base_dir` (default: the
+    working directory). With `compress` ("gzip", "deflate" or "zstd"), bodies are
+    compressed now and sent with that Content-Encoding (see compression).
     """
-    inline_vars = collect_var_values(text)
-    merged_vars = {**(env or {}), **inline_vars}
-    renderer = Renderer(merged_vars)
+    if stats is not None:
+        inline_vars, requests_with_var_placeholders, block_costs = _unpack_with_stats(text, validation, stats)
+        variables = {**(env or {}), **inline_vars}
+        requests = _render_with_stats(requests_with_var_placeholders, variables, stats, block_costs, base_dir=base_dir)
+    else:
+        inline_vars, requests_with_var_placeholders = unpack_rest_file_text(text, validation)
+        requests = render_requests(requests_with_var_placeholders, {**(env or {}), **inline_vars}, base_dir)
+    return _compress_requests(requests, compress, stats)
+
+
+def _compress_requests(
+    requests: List[HTTPRequest], encoding: Optional[str], stats: Optional[ParseStats]
+) -> List[HTTPRequest]:
+    """Compresses every request without a `# @compress` annotation of its own."""
+    if encoding:
+        for request in requests:
+            if "compress" not in request.annotations:
+                compress_request(request, encoding, stats=stats)
+    return requests
 
+
+def unpack_rest_file_text(text: str, validation: str = VALIDATION_STRICT) -> tuple[dict[str, str], List[HTTPRequest]]:
+    """
+    Parse the input .rest file text without rendering it.
+    Returns the inline variable declarations and the requests with their placeholders intact.
+    """
+    inline_vars = collect_var_values(text)
     cleaned_text = strip_var_declarations(text)
     unprocessed_blocks = parse_rest_file_text(cleaned_text)
+    strings = StringPool()
+    return inline_vars, [unpack_request_block(block, validation, strings=strings) for block in unprocessed_blocks]
+
+
+def render_requests(
+    requests: List[HTTPRequest], variables: dict[str, str], base_dir: Optional[Union[str, os.PathLike]] = None
+) -> List[HTTPRequest]:
+    """
+    Render each request in place with the given variables and return them.
+    Body includes are resolved against `base_dir`.
+    """
+    renderer = Renderer(variables, strings=StringPool())
+    return [_render_and_validate(renderer, request, base_dir) for request in requests]
+
+
+def _resolve_include(renderer: Renderer, request: HTTPRequest, base_dir: Optional[Union[str, os.PathLike]]) -> None:
+    """
+    Replaces a `< path` body with a FileBody, a `<@ path` body with the file's text, or a
+    multipart body with file parts with a MultipartBody.
+    """
+    include = parse_include(request.body)
+    if include is None:
+        if has_include_parts(request.body):
+            multipart = streamed_multipart(
+                renderer.render_string(request.body),
+                renderer.render_string(request.content_type),
+                base_dir and os.fspath(base_dir),
+                renderer.render_string,
+            )
+            if multipart is not None:
+                request.body = ""
+                request.body_file = multipart
+        return
+    path = BodyInclude(renderer.render_string(include.path)).resolve(base_dir and os.fspath(base_dir))
+    if include.render:
+        request.body = INCLUDE_CACHE.read_text(path)
+    else:
+        request.body = ""
+        request.body_file = FileBody(path)
+
+
+def _render_and_validate(
+    renderer: Renderer, request: HTTPRequest, base_dir: Optional[Union[str, os.PathLike]] = None
+) -> HTTPRequest:
+    """Renders the request, running strict validation that was deferred until the body was rendered."""
+    deferred_validation = request._validation == VALIDATION_STRICT and needs_rendering(request.body)
+    _resolve_include(renderer, request, base_dir)
+    renderer.render(request)
+    if deferred_validation:
+        if renderer.stats is None:
+            request.validate()
+        else:
+            started = time.perf_counter()
+            request.validate()
+            renderer.stats.add_phase("validate", time.perf_counter() - started)
+    encoding = request.annotations.get("compress")
+    if encoding is not None:
+        compress_request(request, encoding or DEFAULT_ENCODING, stats=renderer.stats)
+    return request
+
+
+def _unpack_with_stats(
+    text: str, validation: str, stats: ParseStats
+) -> tuple[dict[str, str], List[HTTPRequest], List[tuple[float, int]]]:
+    """
+    unpack_rest_file_text with every phase timed. Also returns the parse and unpack time and
+    the size in bytes of each block, for ParseStats.record_block once the block is rendered.
+    """
+    stats.files += 1
+    stats.bytes_processed += len(text.encode("utf-8"))
+
+    started = time.perf_counter()
+    inline_vars = collect_var_values(text)
+    cleaned_text = strip_var_declarations(text)
+    split_started = time.perf_counter()
+    unprocessed_blocks = split_along_delimiters(cleaned_text)
+    split_finished = time.perf_counter()
+    stats.add_phase("vars", split_started - started)
+    stats.add_phase("split", split_finished - split_started)
+
     requests = []
-    for block in unprocessed_blocks:
-        request_with_var_placeholders = unpack_request_block(block)
-        request = renderer.render(request_with_var_placeholders)
-        requests.append(request)
+    block_costs = []
+    strings = StringPool()
+    parse_seconds = unpack_seconds = 0.0
+    for unprocessed_block in unprocessed_blocks:
+        parse_started = time.perf_counter()
+        block = parse_block(unprocessed_block)
+        unpack_started = time.perf_counter()
+        requests.append(unpack_request_block(block, validation, stats, strings))
+        unpack_finished = time.perf_counter()
+        parse_seconds += unpack_started - parse_started
+        unpack_seconds += unpack_finished - unpack_started
+        block_costs.append((unpack_finished - parse_started, len(unprocessed_block.encode("utf-8"))))
+    stats.add_phase("parse", parse_seconds)
+    stats.add_phase("unpack", unpack_seconds)
+    return inline_vars, requests, block_costs
+
 
+def _render_with_stats(
+    requests: List[HTTPRequest],
+    variables: dict[str, str],
+    stats: ParseStats,
+    block_costs: Optional[List[tuple[float, int]]] = None,
+    source: Optional[str] = None,
+    base_dir: Optional[Union[str, os.PathLike]] = None,
+) -> List[HTTPRequest]:
+    """render_requests with the render phase timed and each block recorded in `stats`."""
+    renderer = Renderer(variables, stats, StringPool())
+    render_seconds = 0.0
+    for index, request in enumerate(requests):
+        started = time.perf_counter()
+        _render_and_validate(renderer, request, base_dir)
+        elapsed = time.perf_counter() - started
+        render_seconds += elapsed
+        earlier_seconds, size = block_costs[index] if block_costs else (0.0, 0)
+        stats.record_block(earlier_seconds + elapsed, index, request.description, size, source)
+    stats.add_phase("render", render_seconds)
     return requests
+
+
+def parse_rest_path(
+    path: Union[str, os.PathLike],
+    env: Optional[dict[str, str]] = None,
+    cache_dir: Optional[Union[str, os.PathLike]] = None,
+    max_cache_bytes: int = DEFAULT_MAX_CACHE_BYTES,
+    validation: str = VALIDATION_STRICT,
+    stats: Optional[ParseStats] = None,
+    compress: Optional[str] = None,
+) -> List[HTTPRequest]:
+    """
+    Parse the .rest file at `path` and return a list of HTTPRequest objects.
+
+    With `cache_dir`, the unrendered parse result is cached on disk keyed by the file's
+    content hash, so unchanged files skip tokenization and validation on later loads.
+    With `stats`, cache lookups and stores are timed under the "cache" phase. Body includes
+    are resolved relative to the file's directory. `compress` is as for parse_rest_file.
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+    base_dir = os.path.dirname(os.path.abspath(path))
+    if cache_dir is None and stats is None:
+        return parse_rest_file(content.decode("utf-8"), env, validation, base_dir=base_dir, compress=compress)
+
+    source = os.fspath(path)
+    cached = None
+    if cache_dir is not None:
+        started = time.perf_counter()
+        cache = ParseCache(os.fspath(cache_dir), max_cache_bytes)
+        key = cache.key(content, validation)
+        cached = cache.load(key)
+        if stats is not None:
+            stats.add_phase("cache", time.perf_counter() - started)
+
+    block_costs = None
+    if cached is not None:
+        inline_vars, requests_with_var_placeholders = cached
+        if stats is not None:
+            stats.files += 1
+            stats.bytes_processed += len(content)
+    elif stats is not None:
+        inline_vars, requests_with_var_placeholders, block_costs = _unpack_with_stats(
+            content.decode("utf-8"), validation, stats
+        )
+    else:
+        inline_vars, requests_with_var_placeholders = unpack_rest_file_text(content.decode("utf-8"), validation)
+
+    if cached is None and cache_dir is not None:
+        started = time.perf_counter()
+        cache.store(key, inline_vars, requests_with_var_placeholders)
+        if stats is not None:
+            stats.add_phase("cache", time.perf_counter() - started)
+
+    variables = {**(env or {}), **inline_vars}
+    if stats is not None:
+        requests = _render_with_stats(requests_with_var_placeholders, variables, stats, block_costs, source, base_dir)
+    else:
+        requests = render_requests(requests_with_var_placeholders, variables, base_dir)
+    return _compress_requests(requests, compress, stats)
+
+
+def iter_rest_file(
+    source: Union[str, Iterable[str]],
+    env: Optional[dict[str, str]] = None,
+    validation: str = VALIDATION_STRICT,
+    base_dir: Optional[Union[str, os.PathLike]] = None,
+) -> Iterator[HTTPRequest]:
+    """
+    Parse .rest content in a single pass and yield HTTPRequest objects one at a time.
+
+    `source` may be the file text, an open text file, or any iterable of lines. Only the
+    lines of the block being parsed are held in memory. Unlike parse_rest_file, a variable
+    is only applied to requests whose block ends after its declaration.
+    """
+    if isinstance(source, str):
+        source = io.StringIO(source)
+
+    merged_vars = dict(env or {})
+    renderer = Renderer(merged_vars)
+
+    code_lines = extract_var_declarations(source, merged_vars)
+    for block in iter_request_blocks(code_lines):
+        request_with_var_placeholders = unpack_request_block(block, validation)
+        renderer.refresh()
+        yield _render_and_validate(renderer, request_with_var_placeholders, base_dir)
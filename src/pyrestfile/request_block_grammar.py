@@ -1,13 +1,25 @@
 import json
+import math
 import re
+import time
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import Any, Dict, Optional, Union
+from pyrestfile.compact import StringPool
+from pyrestfile.headers import Headers, header_pairs
+from pyrestfile.includes import FileBody, parse_include
+from pyrestfile.multipart import MultipartBody
+from pyrestfile.stats import ParseStats
 from pyrestfile.top_level_grammar import RequestBlock
 
 
 REQUEST_LINE_REGEX = r"^(?P<method>[a-zA-Z]+)\s+(?P<url>\S+)(?:\s+(?P<version>HTTP/\S+))?"
 REQUEST_LINE_PATTERN = re.compile(REQUEST_LINE_REGEX)
 
+VALIDATION_STRICT = "strict"
+VALIDATION_LAZY = "lazy"
+VALIDATION_OFF = "off"
+VALIDATION_MODES = (VALIDATION_STRICT, VALIDATION_LAZY, VALIDATION_OFF)
+
 
 @dataclass
 class ParsedRequestLine:
@@ -22,21 +34,129 @@ class ParsedRequestLine:
 class ParsedHeaders:
     """Dataclass representing parsed headers."""
 
-    headers: Dict[str, str]
+    headers: Headers
     content_type: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class HTTPRequest:
-    """Dataclass representing a parsed HTTP request."""
+    """
+    Dataclass representing a parsed HTTP request. `headers` is always a Headers object;
+    a plain dict passed in is converted. Requests from the parse functions share equal
+    strings and header blocks. A `content_encoding` (see compression) makes the body go
+    out compressed.
+    """
 
     description: str
     method: str
     url: str
     http_version: str = ""
-    headers: Dict[str, str] = field(default_factory=dict)
+    headers: Headers = field(default_factory=Headers)
     content_type: str = ""
     body: str = ""
+    annotations: Dict[str, str] = field(default_factory=dict)
+    body_file: Optional[Union[FileBody, MultipartBody]] = None
+    content_encoding: str = ""
+    _validation: str = field(default=VALIDATION_OFF, init=False, repr=False, compare=False)
+    _json_cache: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    _wire_cache: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    _compressed: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.headers, Headers):
+            self.headers = Headers(self.headers)
+
+    @property
+    def name(self) -> Optional[str]:
+        """The request name given by a `# @name` annotation, if any."""
+        return self.annotations.get("name")
+
+    @property
+    def is_json(self) -> bool:
+        """True when the Content-Type declares a JSON body."""
+        return is_json_content_type(self.content_type)
+
+    @property
+    def json_body(self) -> Any:
+        """The body decoded as JSON. Decoded once and reused until the body changes."""
+        return self._decoded_json()[1]
+
+    @property
+    def json_bytes(self) -> bytes:
+        """The decoded body re-encoded in compact form (no insignificant whitespace), cached like json_body."""
+        body, value, encoded = self._decoded_json()
+        if encoded is None:
+            encoded = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+            self._json_cache = (body, value, encoded)
+        return encoded
+
+    def to_wire(self) -> bytes:
+        """
+        Returns the exact HTTP/1.1 request bytes, with Host and Content-Length derived.
+        The encoding is cached and reused for as long as the request is left unchanged.
+        """
+        from pyrestfile.wire import encode_request
+
+        if self.body_file is not None:
+            return encode_request(self)
+        fields = (self.method, self.url, self.http_version, self.content_type, self.body, self.content_encoding)
+        headers = header_pairs(self.headers)
+        cache = self._wire_cache
+        if cache is not None and cache[0] == fields and cache[1] == headers:
+            return cache[2]
+        encoded = encode_request(self)
+        self._wire_cache = (fields, headers, encoded)
+        return encoded
+
+    def validate(self) -> None:
+        """
+        Raises ValueError if the Content-Type is JSON but the body is not valid JSON.
+        File bodies are not checked, since that would mean reading the whole file.
+        """
+        if self.is_json and self.body_file is None:
+            self._decoded_json()
+
+    def _decoded_json(self) -> tuple:
+        source = self.body if self.body_file is None else self.body_file
+        cache = self._json_cache
+        if cache is None or cache[0] is not source:
+            try:
+                value = json.loads(self.body if self.body_file is None else self.body_file.read())
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Content-Type is {self.content_type} but body is invalid JSON: {e}")
+            cache = self._json_cache = (source, value, None)
+        return cache
+
+
+def request_key(request: HTTPRequest) -> str:
+    """Name used to group results: the `@name` annotation, else the description, else method and URL."""
+    return request.name or request.description or f"{request.method} {request.url}"
+
+
+def request_weight(request: HTTPRequest) -> float:
+    """The request's `@weight` annotation (default 1); raises ValueError unless it is a finite number >= 0."""
+    value = request.annotations.get("weight") or "1"
+    try:
+        weight = float(value)
+    except ValueError:
+        raise ValueError(f"@weight on {request_key(request)!r} is not a number: {value!r}") from None
+    if not math.isfinite(weight) or weight < 0:
+        raise ValueError(f"@weight on {request_key(request)!r} must be a finite number >= 0, got {value!r}")
+    return weight
+
+
+def is_json_content_type(content_type: str) -> bool:
+    return bool(content_type) and "application/json" in content_type.lower()
+
+
+def has_placeholders(text: str) -> bool:
+    """Cheap check for `{{...}}` references that still need rendering."""
+    return "{{" in text
+
+
+def needs_rendering(body: str) -> bool:
+    """True if the body has placeholders or is a file include, i.e. is only known after rendering."""
+    return has_placeholders(body) or parse_include(body) is not None
 
 
 def unpack_request_line(request_line: str) -> ParsedRequestLine:
@@ -60,42 +180,74 @@ def unpack_request_line(request_line: str) -> ParsedRequestLine:
 
 def unpack_headers(headers: str) -> ParsedHeaders:
     """
-    Unpacks header lines into a dictionary mapping header names to their values.
-    Each header is expected to be formatted as "Header-Name: value".
+    Unpacks header lines into Headers, keeping their order and repeated names.
+    Each header is expected to be formatted as "Header-Name: value". The Content-Type
+    (matched case-insensitively; the last one wins) is returned separately.
     """
-    header_dict = {}
+    pairs = []
+    content_type = ""
     for line in headers.splitlines():
         if ":" in line:
             key, value = line.split(":", 1)
-            header_dict[key.strip()] = value.strip()
-    if "Content-Type" in header_dict:
-        content_type = header_dict.pop("Content-Type", "").strip()
-    else:
-        content_type = ""
-    return ParsedHeaders(headers=header_dict, content_type=content_type)
-
-
-def unpack_request_block(block: "RequestBlock") -> HTTPRequest:
+            key = key.strip()
+            if key.lower() == "content-type":
+                content_type = value.strip()
+            else:
+                pairs.append((key, value.strip()))
+    return ParsedHeaders(headers=Headers(pairs), content_type=content_type)
+
+
+def unpack_request_block(
+    block: "RequestBlock",
+    validation: str = VALIDATION_STRICT,
+    stats: Optional[ParseStats] = None,
+    strings: Optional[StringPool] = None,
+) -> HTTPRequest:
     """
     Unpacks the RequestBlock into a ParsedRequest with a structured request line
     and headers. Uses unpack_request_line() and unpack_headers() internally.
+
+    `validation` controls JSON body checks: "strict" validates now (or, for bodies that
+    still contain placeholders or include a file, once they are rendered), "lazy" on first use of the decoded
+    body, and "off" never does so implicitly. With `stats`, validation time is recorded
+    under the "validate" phase. With `strings`, the request's strings and headers are
+    shared with the other requests unpacked through the same pool.
     """
+    if validation not in VALIDATION_MODES:
+        raise ValueError(f"validation must be one of {VALIDATION_MODES}, got {validation!r}")
     parsed_request_line = unpack_request_line(block.request_line)
     parsed_headers = unpack_headers(block.headers)
 
     body = block.body.strip() if block.body else ""
-    if parsed_headers.content_type and "application/json" in parsed_headers.content_type.lower():
-        try:
-            json.loads(body)
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Content-Type is {parsed_headers.content_type} but body is invalid JSON: {e}")
-
-    return HTTPRequest(
-        description=block.description,
-        method=parsed_request_line.method,
-        url=parsed_request_line.url,
-        http_version=parsed_request_line.http_version,
-        headers=parsed_headers.headers,
-        content_type=parsed_headers.content_type,
-        body=body,
-    )
+    if strings is None:
+        request = HTTPRequest(
+            description=block.description,
+            method=parsed_request_line.method,
+            url=parsed_request_line.url,
+            http_version=parsed_request_line.http_version,
+            headers=parsed_headers.headers,
+            content_type=parsed_headers.content_type,
+            body=body,
+            annotations=dict(block.annotations),
+        )
+    else:
+        intern = strings.intern
+        request = HTTPRequest(
+            description=block.description,
+            method=intern(parsed_request_line.method),
+            url=intern(parsed_request_line.url),
+            http_version=intern(parsed_request_line.http_version),
+            headers=strings.headers(parsed_headers.headers),
+            content_type=intern(parsed_headers.content_type),
+            body=body,
+            annotations=dict(block.annotations),
+        )
+    request._validation = validation
+    if validation == VALIDATION_STRICT and not needs_rendering(body):
+        if stats is None:
+            request.validate()
+        else:
+            started = time.perf_counter()
+            request.validate()
+            stats.add_phase("validate", time.perf_counter() - started)
+    return request
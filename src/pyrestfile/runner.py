@@ -0,0 +1,244 @@
+"""Executing parsed requests with asyncio.
+
+`run_requests` sends HTTPRequest objects over keep-alive HTTP/1.1 connections that are
+pooled per (scheme, host, port), with a bound on the number of requests in flight and a
+timeout per request. Each request is written with `HTTPRequest.to_wire`, so static
+requests are encoded once however often they are sent. Results are produced as
+RunResult objects, optionally streamed to a callback as each request completes.
+"""
+
+import asyncio
+import ssl
+import time
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Iterable, Optional
+from urllib.parse import urlsplit
+
+from pyrestfile.headers import header_pairs
+from pyrestfile.request_block_grammar import HTTPRequest
+from pyrestfile.wire import iter_wire_chunks
+
+DEFAULT_CONCURRENCY = 64
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_PORTS = {"http": 80, "https": 443}
+NO_BODY_STATUSES = frozenset({204, 304})
+
+
+@dataclass
+class Response:
+    """A complete HTTP response as read from the connection."""
+
+    status: int
+    reason: str
+    headers: list[tuple[str, str]] = field(default_factory=list)
+    body: bytes = b""
+
+    def header(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """Returns the first value of the header `name`, compared case-insensitively."""
+        name = name.lower()
+        for key, value in self.headers:
+            if key.lower() == name:
+                return value
+        return default
+
+
+@dataclass
+class RunResult:
+    """Outcome of sending one request."""
+
+    index: int
+    description: Optional[str]
+    method: str
+    url: str
+    status: Optional[int] = None
+    elapsed: float = 0.0
+    response_bytes: int = 0
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class Origin:
+    """Where a request is sent: scheme, host and port."""
+
+    scheme: str
+    host: str
+    port: int
+
+    @classmethod
+    def from_request(cls, request: HTTPRequest) -> "Origin":
+        parts = urlsplit(request.url)
+        if parts.scheme and parts.netloc:
+            scheme, hostname, port = parts.scheme.lower(), parts.hostname, parts.port
+        else:
+            host_header = next((value for key, value in header_pairs(request.headers) if key.lower() == "host"), "")
+            parts = urlsplit(f"http://{host_header}")
+            scheme, hostname, port = "http", parts.hostname, parts.port
+        if scheme not in DEFAULT_PORTS or not hostname:
+            raise ValueError(f"Cannot determine where to send {request.url!r}")
+        return cls(scheme=scheme, host=hostname, port=port or DEFAULT_PORTS[scheme])
+
+
+async def read_response(reader: asyncio.StreamReader, method: str) -> tuple[Response, bool]:
+    """Reads one response. Returns it with a flag telling whether the connection can be reused."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    status_line, *header_lines = head[:-4].decode("latin-1").split("\r\n")
+    version, status, reason = (status_line.split(" ", 2) + [""])[:3]
+    headers = []
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        headers.append((name.strip(), value.strip()))
+    response = Response(status=int(status), reason=reason, headers=headers)
+
+    connection = (response.header("Connection") or "").lower()
+    keep_alive = connection != "close" and (version != "HTTP/1.0" or connection == "keep-alive")
+    if method == "HEAD" or response.status in NO_BODY_STATUSES or 100 <= response.status < 200:
+        return response, keep_alive
+
+    content_length = response.header("Content-Length")
+    if (response.header("Transfer-Encoding") or "").lower().endswith("chunked"):
+        chunks = []
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";", 1)[0], 16)
+            if size == 0:
+                while await reader.readuntil(b"\r\n") != b"\r\n":
+                    pass  # skip trailers
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        response.body = b"".join(chunks)
+    elif content_length is not None:
+        response.body = await reader.readexactly(int(content_length))
+    else:
+        response.body = await reader.read()
+        keep_alive = False
+    return response, keep_alive
+
+
+class ConnectionPool:
+    """Keep-alive connections pooled per origin."""
+
+    def __init__(self, ssl_context: Optional[ssl.SSLContext] = None, max_idle_per_origin: int = 64):
+        self.ssl_context = ssl_context
+        self.max_idle_per_origin = max_idle_per_origin
+        self.connections_opened = 0
+        self._idle: dict[Origin, deque] = defaultdict(deque)
+
+    async def _connect(self, origin: Origin):
+        ssl_context = None
+        if origin.scheme == "https":
+            ssl_context = self.ssl_context or ssl.create_default_context()
+        self.connections_opened += 1
+        return await asyncio.open_connection(origin.host, origin.port, ssl=ssl_context)
+
+    def _checkout(self, origin: Origin):
+        idle = self._idle[origin]
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+            writer.close()
+        return None
+
+    def _checkin(self, origin: Origin, connection) -> None:
+        idle = self._idle[origin]
+        if len(idle) < self.max_idle_per_origin:
+            idle.append(connection)
+        else:
+            connection[1].close()
+
+    async def send(self, request: HTTPRequest) -> Response:
+        """
+        Sends `request` and reads its response, reusing an idle connection when possible.
+        File-include bodies are streamed from disk in chunks.
+        """
+        origin = Origin.from_request(request)
+        payload = request.to_wire() if getattr(request, "body_file", None) is None else None
+        connection = self._checkout(origin)
+        if connection is not None:
+            try:
+                return await self._exchange(origin, connection, request, payload)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pass  # the server closed the idle connection; retry once on a fresh one
+        connection = await self._connect(origin)
+        return await self._exchange(origin, connection, request, payload)
+
+    async def _exchange(self, origin: Origin, connection, request: HTTPRequest, payload: Optional[bytes]) -> Response:
+        reader, writer = connection
+        try:
+            if payload is not None:
+                writer.write(payload)
+                await writer.drain()
+            else:
+                for chunk in iter_wire_chunks(request):
+                    writer.write(chunk)
+                    await writer.drain()
+            response, keep_alive = await read_response(reader, request.method)
+        except BaseException:
+            writer.close()
+            raise
+        if keep_alive:
+            self._checkin(origin, connection)
+        else:
+            writer.close()
+        return response
+
+    async def close(self) -> None:
+        for idle in self._idle.values():
+            while idle:
+                _, writer = idle.pop()
+                writer.close()
+        self._idle.clear()
+
+
+async def run_requests_async(
+    requests: Iterable[HTTPRequest],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+    on_result: Optional[Callable[[RunResult], None]] = None,
+    pool: Optional[ConnectionPool] = None,
+    collect: bool = True,
+) -> list[RunResult]:
+    """
+    Sends every request with at most `concurrency` in flight and returns the results in
+    request order. `on_result` is called as each request completes; pass `collect=False`
+    to only stream results through it and keep memory flat on long runs.
+    """
+    own_pool = pool is None
+    pool = pool or ConnectionPool()
+    pending = iter(enumerate(requests))
+    results: list[RunResult] = []
+
+    async def worker():
+        for index, request in pending:
+            result = RunResult(index=index, description=request.description, method=request.method, url=request.url)
+            started = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(pool.send(request), timeout)
+                result.status = response.status
+                result.response_bytes = len(response.body)
+            except asyncio.TimeoutError:
+                result.error = f"timed out after {timeout}s"
+            except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+                result.error = f"{type(e).__name__}: {e}"
+            result.elapsed = time.perf_counter() - started
+            if collect:
+                results.append(result)
+            if on_result is not None:
+                on_result(result)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    finally:
+        if own_pool:
+            await pool.close()
+    results.sort(key=lambda result: result.index)
+    return results
+
+
+def run_requests(requests: Iterable[HTTPRequest], **kwargs) -> list[RunResult]:
+    """Synchronous wrapper around run_requests_async; accepts the same keyword arguments."""
+    return asyncio.run(run_requests_async(requests, **kwargs))
@@ -0,0 +1,59 @@
+"""Compact record form of HTTPRequest objects.
+
+Records are plain JSON-compatible lists, used wherever parsed requests are written to
+disk. Bump RECORD_FORMAT_VERSION whenever the layout of a record changes.
+"""
+
+from typing import Optional
+
+from pyrestfile.compact import StringPool
+from pyrestfile.headers import Headers, header_pairs
+from pyrestfile.request_block_grammar import HTTPRequest
+
+RECORD_FORMAT_VERSION = 4
+
+
+def request_to_record(request: HTTPRequest) -> list:
+    """Converts an HTTPRequest into a JSON-compatible list."""
+    return [
+        request.description,
+        request.method,
+        request.url,
+        request.http_version,
+        [[name, value] for name, value in header_pairs(request.headers)],
+        request.content_type,
+        request.body,
+        request.annotations,
+        request._validation,
+        request.content_encoding,
+    ]
+
+
+def request_from_record(record: list, strings: Optional[StringPool] = None) -> HTTPRequest:
+    """
+    Rebuilds an HTTPRequest from a list produced by request_to_record. With `strings`,
+    strings and headers are shared with the other requests rebuilt through the pool.
+    """
+    description, method, url, http_version, headers, content_type, body, annotations, validation, encoding = record
+    if strings is not None:
+        intern = strings.intern
+        method, url, http_version, content_type = (
+            intern(method),
+            intern(url),
+            intern(http_version),
+            intern(content_type),
+        )
+        headers = strings.headers(headers)
+    request = HTTPRequest(
+        description=description,
+        method=method,
+        url=url,
+        http_version=http_version,
+        headers=headers if strings is not None else Headers(headers),
+        content_type=content_type,
+        body=body,
+        annotations=annotations,
+        content_encoding=encoding,
+    )
+    request._validation = validation
+    return request
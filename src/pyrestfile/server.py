@@ -0,0 +1,405 @@
+"""A local stub server for the requests of a .rest file.
+
+`pyrest serve api.rest` answers every request in the file with a canned response, so load
+generators and clients can be measured on one host without a real backend. Each request
+becomes a route: its method plus the path of its URL, where a `{{var}}` that is not
+defined (or is a builtin such as `{{$uuid}}`) matches any single path segment. A
+placeholder before the first `/` of a URL without a scheme, as in `{{base}}/users`, is
+taken to be the base URL. The query string is ignored. A literal path wins over one with
+wildcards; otherwise the first matching route in file order wins.
+
+The response comes from a `# @response` annotation on the request:
+
+    # @response 201 {"id": 1}        status and inline body
+    # @response 200 < ./users.json   status and a file next to the .rest file
+    # @response 204                  status only
+
+Without one the route answers 200 with an empty body. Inline bodies that parse as JSON are
+sent as application/json, other inline bodies as text/plain, and files by their extension.
+Unknown routes get 404.
+
+Every response is encoded once, when the routes are loaded. The server is an
+asyncio.Protocol that parses pipelined requests straight from the receive buffer,
+discards request bodies as they arrive, and answers each batch of requests with a
+single write. It keeps connections alive unless the client asks otherwise, and
+`serve(workers=N)` runs N processes that share the port through SO_REUSEPORT.
+"""
+
+import asyncio
+import http
+import json
+import mimetypes
+import multiprocessing
+import os
+import re
+import signal
+import socket
+from dataclasses import dataclass
+from typing import Mapping, Optional, Union
+from urllib.parse import urlsplit
+
+from pyrestfile.includes import BodyInclude, parse_include
+from pyrestfile.parser import unpack_rest_file_text
+from pyrestfile.request_block_grammar import VALIDATION_OFF
+from pyrestfile.templates import TemplateString, compile_string
+from pyrestfile.vars import resolve_variables
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+RESPONSE_ANNOTATION_PATTERN = re.compile(r"(\d{3})(?:\s+(.*))?", re.DOTALL)
+WILDCARD = "\x00"
+WILDCARD_SEGMENT = "[^/]*"
+
+_NOT_FOUND_BODY = b'{"error": "no route"}'
+
+
+@dataclass(frozen=True)
+class StubResponse:
+    """A canned response: status, content type and body."""
+
+    status: int = 200
+    body: bytes = b""
+    content_type: str = ""
+
+    def encode(self, keep_alive: bool, head_only: bool = False) -> bytes:
+        """The complete response bytes, announcing whether the connection stays open."""
+        try:
+            reason = http.HTTPStatus(self.status).phrase
+        except ValueError:
+            reason = ""
+        lines = [f"HTTP/1.1 {self.status} {reason}\r\n"]
+        if self.content_type:
+            lines.append(f"Content-Type: {self.content_type}\r\n")
+        lines.append(f"Content-Length: {len(self.body)}\r\n")
+        if not keep_alive:
+            lines.append("Connection: close\r\n")
+        lines.append("\r\n")
+        head = "".join(lines).encode("latin-1")
+        return head if head_only else head + self.body
+
+
+def parse_response_annotation(value: Optional[str], base_dir: Optional[str] = None) -> StubResponse:
+    """Parses the value of a `# @response` annotation; None gives an empty 200."""
+    if value is None:
+        return StubResponse()
+    match = RESPONSE_ANNOTATION_PATTERN.fullmatch(value.strip())
+    if not match:
+        raise ValueError(f"Expected '# @response STATUS [BODY | < PATH]', got {value!r}")
+    status, body = int(match.group(1)), match.group(2) or ""
+    include = parse_include(body)
+    if include is not None:
+        path = BodyInclude(include.path).resolve(base_dir)
+        with open(path, "rb") as f:
+            content = f.read()
+        return StubResponse(status, content, mimetypes.guess_type(path)[0] or "application/octet-stream")
+    if not body:
+        return StubResponse(status)
+    try:
+        json.loads(body)
+    except ValueError:
+        return StubResponse(status, body.encode("utf-8"), "text/plain; charset=utf-8")
+    return StubResponse(status, body.encode("utf-8"), "application/json")
+
+
+@dataclass
+class Route:
+    """A method and path pattern with the responses it answers with, pre-encoded."""
+
+    method: str
+    path: str
+    response: StubResponse
+    name: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        self.keep_alive = self.response.encode(keep_alive=True)
+        self.close = self.response.encode(keep_alive=False)
+        self.keep_alive_head = self.response.encode(keep_alive=True, head_only=True)
+        self.close_head = self.response.encode(keep_alive=False, head_only=True)
+
+    @property
+    def is_wildcard(self) -> bool:
+        return WILDCARD in self.path
+
+    def encoded(self, keep_alive: bool, head_only: bool = False) -> bytes:
+        if head_only:
+            return self.keep_alive_head if keep_alive else self.close_head
+        return self.keep_alive if keep_alive else self.close
+
+
+def route_path(url: str, variables: Mapping[str, str]) -> str:
+    """
+    The path of `url` with every unresolved placeholder replaced by WILDCARD. Known
+    `variables` are substituted first.
+    """
+    compiled = compile_string(url, variables)
+    url = WILDCARD.join(compiled.literals) if isinstance(compiled, TemplateString) else compiled
+    parts = urlsplit(url)
+    if parts.scheme and parts.netloc:
+        return parts.path or "/"
+    path = url.split("?", 1)[0].split("#", 1)[0]
+    if not path.startswith("/"):
+        slash = path.find("/")
+        path = path[slash:] if slash >= 0 and WILDCARD in path[:slash] else "/" + path
+    return path
+
+
+def _path_regex(path: str) -> re.Pattern:
+    return re.compile("/".join(WILDCARD_SEGMENT.join(map(re.escape, s.split(WILDCARD))) for s in path.split("/")))
+
+
+class RouteIndex:
+    """
+    Routes by method and path. Literal paths are found with one dict lookup; paths with
+    wildcards are tried in file order, among those with the same method and segment count.
+    """
+
+    def __init__(self, routes: list[Route]):
+        self.routes = routes
+        self._exact: dict[tuple[bytes, bytes], Route] = {}
+        self._wildcards: dict[tuple[bytes, int], list[tuple[re.Pattern, Route]]] = {}
+        for route in routes:
+            method = route.method.encode("latin-1")
+            if route.is_wildcard:
+                key = (method, route.path.count("/"))
+                self._wildcards.setdefault(key, []).append((_path_regex(route.path), route))
+            else:
+                self._exact.setdefault((method, route.path.encode("latin-1")), route)
+
+    @classmethod
+    def from_text(
+        cls,
+        text: str,
+        env: Optional[Mapping[str, str]] = None,
+        base_dir: Optional[Union[str, os.PathLike]] = None,
+    ) -> "RouteIndex":
+        """Builds the routes of a .rest file; `base_dir` locates `# @response < path` files."""
+        inline_vars, requests = unpack_rest_file_text(text, VALIDATION_OFF)
+        variables = resolve_variables({**(env or {}), **inline_vars})
+        base_dir = base_dir and os.fspath(base_dir)
+        return cls(
+            [
+                Route(
+                    request.method,
+                    route_path(request.url, variables),
+                    parse_response_annotation(request.annotations.get("response"), base_dir),
+                    request.name,
+                )
+                for request in requests
+            ]
+        )
+
+    @classmethod
+    def from_path(cls, path: Union[str, os.PathLike], env: Optional[Mapping[str, str]] = None) -> "RouteIndex":
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        return cls.from_text(text, env, os.path.dirname(os.path.abspath(path)))
+
+    def match(self, method: bytes, target: bytes) -> Optional[Route]:
+        """The route for a request line's method and target, or None. HEAD falls back to GET routes."""
+        path = target.split(b"?", 1)[0]
+        if not path.startswith(b"/"):
+            path = urlsplit(path).path or b"/"
+        route = self._exact.get((method, path))
+        if route is not None:
+            return route
+        candidates = self._wildcards.get((method, path.count(b"/")))
+        if candidates:
+            decoded = path.decode("latin-1")
+            for pattern, route in candidates:
+                if pattern.fullmatch(decoded):
+                    return route
+        if method == b"HEAD":
+            return self.match(b"GET", target)
+        return None
+
+
+_NOT_FOUND = Route("", "", StubResponse(404, _NOT_FOUND_BODY, "application/json"))
+_BAD_REQUEST = StubResponse(400).encode(keep_alive=False)
+
+
+def _header_value(head: bytes, name: bytes) -> Optional[bytes]:
+    """A header value from a lowercased head, or None."""
+    start = head.find(b"\r\n" + name + b":")
+    if start < 0:
+        return None
+    start += len(name) + 3
+    end = head.find(b"\r\n", start)
+    return head[start : end if end >= 0 else len(head)].strip()
+
+
+_CHUNK_SIZE_LINE = 1
+_CHUNK_TRAILER = 2
+
+
+class StubProtocol(asyncio.Protocol):
+    """Serves one connection: pipelined requests in, pre-encoded responses out."""
+
+    def __init__(self, routes: RouteIndex):
+        self.routes = routes
+        self.transport: Optional[asyncio.Transport] = None
+        self._buffer = bytearray()
+        self._discard = 0
+        self._chunked = 0
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def _skip_chunked(self, buffer: bytearray, position: int) -> int:
+        """
+        Skips as much of a chunked body as has arrived, from `position`, and returns where it
+        stopped. Chunk data is skipped through `_discard`; `_chunked` is the line expected
+        next, and drops to 0 at the end of the body.
+        """
+        while True:
+            if self._discard:
+                if len(buffer) - position < self._discard:
+                    self._discard -= len(buffer) - position
+                    return len(buffer)
+                position += self._discard
+                self._discard = 0
+            line_end = buffer.find(b"\r\n", position)
+            if line_end < 0:
+                return position
+            if self._chunked == _CHUNK_SIZE_LINE:
+                size = int(bytes(buffer[position:line_end]).split(b";", 1)[0], 16)
+                if size < 0:
+                    raise ValueError("Negative chunk size")
+                if size == 0:
+                    self._chunked = _CHUNK_TRAILER
+                else:
+                    self._discard = size + 2
+            elif line_end == position:
+                self._chunked = 0
+                return line_end + 2
+            position = line_end + 2
+
+    def data_received(self, data: bytes) -> None:
+        if self._discard:
+            if len(data) <= self._discard:
+                self._discard -= len(data)
+                return
+            data = data[self._discard :]
+            self._discard = 0
+        buffer = self._buffer
+        buffer += data
+        responses = []
+        position = 0
+        close = False
+        while True:
+            if self._chunked:
+                try:
+                    position = self._skip_chunked(buffer, position)
+                except ValueError:
+                    responses.append(_BAD_REQUEST)
+                    close = True
+                    break
+                if self._chunked:
+                    break
+            head_end = buffer.find(b"\r\n\r\n", position)
+            if head_end < 0:
+                break
+            line_end = buffer.find(b"\r\n", position)
+            request_line = bytes(buffer[position:line_end]).split(b" ")
+            if len(request_line) != 3:
+                responses.append(_BAD_REQUEST)
+                close = True
+                break
+            method, target, version = request_line
+            head = bytes(buffer[line_end : head_end + 2]).lower()
+
+            body_end = head_end + 4
+            transfer_encoding = _header_value(head, b"transfer-encoding")
+            if transfer_encoding is not None and transfer_encoding.endswith(b"chunked"):
+                self._chunked = _CHUNK_SIZE_LINE
+            else:
+                content_length = _header_value(head, b"content-length")
+                try:
+                    body_end += int(content_length) if content_length else 0
+                except ValueError:
+                    responses.append(_BAD_REQUEST)
+                    close = True
+                    break
+
+            connection = _header_value(head, b"connection")
+            keep_alive = connection != b"close" and (version != b"HTTP/1.0" or connection == b"keep-alive")
+            route = self.routes.match(method, target) or _NOT_FOUND
+            responses.append(route.encoded(keep_alive, head_only=method == b"HEAD"))
+            if body_end > len(buffer):
+                self._discard = body_end - len(buffer)
+                position = len(buffer)
+            else:
+                position = body_end
+            if not keep_alive:
+                close = True
+                break
+            if self._discard:
+                break
+        del buffer[:position]
+        if close:
+            buffer.clear()
+        if responses:
+            self.transport.write(b"".join(responses))
+        if close:
+            self.transport.close()
+
+
+async def start_stub_server(
+    routes: RouteIndex, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, reuse_port: bool = False
+) -> asyncio.Server:
+    """Starts serving `routes`; port 0 picks a free port (see `server.sockets`)."""
+    loop = asyncio.get_running_loop()
+    return await loop.create_server(lambda: StubProtocol(routes), host, port, reuse_port=reuse_port or None)
+
+
+async def _serve_forever(routes: RouteIndex, host: str, port: int, reuse_port: bool) -> None:
+    server = await start_stub_server(routes, host, port, reuse_port)
+    async with server:
+        await server.serve_forever()
+
+
+def _worker(routes: RouteIndex, host: str, port: int) -> None:
+    try:
+        asyncio.run(_serve_forever(routes, host, port, reuse_port=True))
+    except KeyboardInterrupt:
+        pass
+
+
+def _interrupt(signum, frame) -> None:
+    raise KeyboardInterrupt
+
+
+def serve(routes: RouteIndex, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: int = 1) -> None:
+    """
+    Serves `routes` until interrupted. With several `workers`, each is a process with its
+    own event loop bound to the same port with SO_REUSEPORT, and the kernel spreads
+    connections between them. SIGTERM stops the workers along with the parent.
+    """
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    if workers == 1:
+        try:
+            asyncio.run(_serve_forever(routes, host, port, reuse_port=False))
+        except KeyboardInterrupt:
+            pass
+        return
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise ValueError("Several workers need SO_REUSEPORT, which this platform does not have")
+    if port == 0:
+        raise ValueError("Several workers need a fixed port")
+    processes = [
+        multiprocessing.Process(target=_worker, args=(routes, host, port), daemon=True) for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    previous_handler = signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGTERM, previous_handler)
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
@@ -0,0 +1,184 @@
+"""Splitting requests into shards for distributed load generation.
+
+`shard` splits a list of requests into `n_shards` lists with one of three strategies:
+
+- "round-robin": request i goes to shard (i + seed) % n_shards.
+- "hash": requests are placed by a seeded hash of their name (see
+  request_block_grammar.request_key), so every request with the same name lands in the
+  same shard.
+- "weight": requests are placed heaviest first on the shard with the least `@weight` so
+  far, which balances the total weight; the seed breaks ties between equal weights.
+
+Every strategy is deterministic for the same requests and seed, and keeps the file order
+of the requests within each shard.
+
+`write_shards` writes each shard to a shard file: a small JSON header, a table of record
+offsets and the records themselves (see serialization). A ShardFile maps the file
+read-only and decodes a request only when it is accessed, so a worker loads its shard
+without touching the .rest sources or decoding requests it never sends.
+"""
+
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import random
+import struct
+from typing import Iterator, Optional, Sequence, Union
+
+from pyrestfile.cache import write_atomic
+from pyrestfile.request_block_grammar import HTTPRequest, request_key, request_weight
+from pyrestfile.serialization import RECORD_FORMAT_VERSION, request_from_record, request_to_record
+
+STRATEGY_ROUND_ROBIN = "round-robin"
+STRATEGY_HASH = "hash"
+STRATEGY_WEIGHT = "weight"
+STRATEGIES = (STRATEGY_ROUND_ROBIN, STRATEGY_HASH, STRATEGY_WEIGHT)
+
+SHARD_MAGIC = b"PYRSHARD"
+SHARD_FORMAT_VERSION = 1
+SHARD_SUFFIX = ".shard"
+_LENGTH = struct.Struct("<I")
+_OFFSET_SIZE = 8
+
+
+def _stable_hash(key: str, seed: int) -> int:
+    return int.from_bytes(hashlib.blake2b(f"{seed}:{key}".encode(), digest_size=8).digest(), "big")
+
+
+def shard_assignments(
+    requests: Sequence[HTTPRequest], n_shards: int, strategy: str = STRATEGY_ROUND_ROBIN, seed: int = 0
+) -> list[int]:
+    """Returns the shard number of every request."""
+    if n_shards < 1:
+        raise ValueError(f"n_shards must be at least 1, got {n_shards}")
+    if strategy == STRATEGY_ROUND_ROBIN:
+        return [(index + seed) % n_shards for index in range(len(requests))]
+    if strategy == STRATEGY_HASH:
+        return [_stable_hash(request_key(request), seed) % n_shards for request in requests]
+    if strategy == STRATEGY_WEIGHT:
+        weights = [request_weight(request) for request in requests]
+        order = list(range(len(requests)))
+        random.Random(seed).shuffle(order)
+        order.sort(key=lambda index: -weights[index])
+        loads = [(0.0, shard) for shard in range(n_shards)]
+        assignments = [0] * len(requests)
+        for index in order:
+            load, shard = heapq.heappop(loads)
+            assignments[index] = shard
+            heapq.heappush(loads, (load + weights[index], shard))
+        return assignments
+    raise ValueError(f"Unknown shard strategy {strategy!r}; expected one of {', '.join(STRATEGIES)}")
+
+
+def shard(
+    requests: Sequence[HTTPRequest], n_shards: int, strategy: str = STRATEGY_ROUND_ROBIN, seed: int = 0
+) -> list[list[HTTPRequest]]:
+    """Splits `requests` into `n_shards` lists (some possibly empty) with the given strategy."""
+    shards: list[list[HTTPRequest]] = [[] for _ in range(n_shards)]
+    for request, number in zip(requests, shard_assignments(requests, n_shards, strategy, seed)):
+        shards[number].append(request)
+    return shards
+
+
+def encode_shard(requests: Sequence[HTTPRequest], metadata: Optional[dict] = None) -> bytes:
+    """Encodes requests in the shard file format. File-include bodies cannot be stored."""
+    records = []
+    for request in requests:
+        if request.body_file is not None:
+            raise ValueError(f"Cannot store the file body of {request_key(request)!r} in a shard")
+        records.append(json.dumps(request_to_record(request), separators=(",", ":")).encode())
+    header = {
+        "format": SHARD_FORMAT_VERSION,
+        "records": RECORD_FORMAT_VERSION,
+        "count": len(records),
+        **(metadata or {}),
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    offsets = [0]
+    for record in records:
+        offsets.append(offsets[-1] + len(record))
+    return b"".join(
+        [
+            SHARD_MAGIC,
+            _LENGTH.pack(len(header_bytes)),
+            header_bytes,
+            struct.pack(f"<{len(offsets)}Q", *offsets),
+            *records,
+        ]
+    )
+
+
+def write_shards(
+    requests: Sequence[HTTPRequest],
+    directory: Union[str, os.PathLike],
+    n_shards: int,
+    strategy: str = STRATEGY_ROUND_ROBIN,
+    seed: int = 0,
+    prefix: str = "shard",
+) -> list[str]:
+    """
+    Shards `requests` and writes one `<prefix>-<i>-of-<n>.shard` file per shard into
+    `directory`. Returns the paths in shard order.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for number, requests_in_shard in enumerate(shard(requests, n_shards, strategy, seed)):
+        path = os.path.join(directory, f"{prefix}-{number:04d}-of-{n_shards:04d}{SHARD_SUFFIX}")
+        metadata = {"shard": number, "n_shards": n_shards, "strategy": strategy, "seed": seed}
+        write_atomic(path, encode_shard(requests_in_shard, metadata))
+        paths.append(path)
+    return paths
+
+
+class ShardFile:
+    """A read-only, memory-mapped shard file. Requests are decoded on access."""
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = os.fspath(path)
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if self._mapping[: len(SHARD_MAGIC)] != SHARD_MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not a shard file")
+        position = len(SHARD_MAGIC)
+        (header_length,) = _LENGTH.unpack_from(self._mapping, position)
+        position += _LENGTH.size
+        self.header = json.loads(bytes(self._mapping[position : position + header_length]))
+        if self.header.get("format") != SHARD_FORMAT_VERSION or self.header.get("records") != RECORD_FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{self.path} was written by an incompatible version")
+        position += header_length
+        self._count = self.header["count"]
+        self._offsets = position
+        self._records = position + (self._count + 1) * _OFFSET_SIZE
+
+    def _offset(self, index: int) -> int:
+        return struct.unpack_from("<Q", self._mapping, self._offsets + index * _OFFSET_SIZE)[0]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> HTTPRequest:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("shard index out of range")
+        start, end = self._records + self._offset(index), self._records + self._offset(index + 1)
+        return request_from_record(json.loads(bytes(self._mapping[start:end])))
+
+    def __iter__(self) -> Iterator[HTTPRequest]:
+        for index in range(self._count):
+            yield self[index]
+
+    def close(self) -> None:
+        if isinstance(self._mapping, mmap.mmap):
+            self._mapping.close()
+
+    def __enter__(self) -> "ShardFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,95 @@
+"""Parse instrumentation.
+
+Pass a ParseStats to parse_rest_file, parse_rest_path or Renderer to find out where parse
+time goes. It records wall time per phase, block and byte counts, placeholder
+substitutions, builtin invocations, body compression and the slowest blocks. Without one, the parse runs its
+uninstrumented path and pays a single `is None` check per call.
+
+The phases are "vars", "split", "parse", "unpack" and "render", in the order
+parse_rest_file runs them, plus "cache" for parse_rest_path cache lookups. "validate" is
+the JSON decoding of bodies; it happens inside "unpack" (or "render" for bodies with
+placeholders) and is counted in both.
+"""
+
+import heapq
+import itertools
+from typing import Optional
+
+DEFAULT_SLOWEST_BLOCKS = 10
+
+
+class ParseStats:
+    """Counters and timings collected while parsing; export them with `as_dict`."""
+
+    def __init__(self, slowest_blocks: int = DEFAULT_SLOWEST_BLOCKS):
+        self.phase_seconds: dict[str, float] = {}
+        self.files = 0
+        self.blocks = 0
+        self.bytes_processed = 0
+        self.substitutions = 0
+        self.unresolved_placeholders = 0
+        self.builtin_calls: dict[str, int] = {}
+        self.compressed_bodies = 0
+        self.compression_bytes_in = 0
+        self.compression_bytes_out = 0
+        self.compression_seconds = 0.0
+        self.compression_seconds_saved = 0.0
+        self.max_slowest_blocks = slowest_blocks
+        self._slowest: list[tuple[float, int, dict]] = []
+        self._sequence = itertools.count()
+
+    def add_phase(self, phase: str, seconds: float) -> None:
+        self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + seconds
+
+    def add_builtin_call(self, name: str) -> None:
+        self.builtin_calls[name] = self.builtin_calls.get(name, 0) + 1
+
+    def add_compression(self, bytes_in: int, bytes_out: int, seconds: float, seconds_saved: float) -> None:
+        """Counts a compressed body, and the time spent on it or saved by reusing it."""
+        self.compressed_bodies += 1
+        self.compression_bytes_in += bytes_in
+        self.compression_bytes_out += bytes_out
+        self.compression_seconds += seconds
+        self.compression_seconds_saved += seconds_saved
+
+    @property
+    def compression_ratio(self) -> float:
+        """Uncompressed over compressed bytes for every body compressed so far (0 if none)."""
+        return self.compression_bytes_in / self.compression_bytes_out if self.compression_bytes_out else 0.0
+
+    def record_block(
+        self, seconds: float, index: int, description: Optional[str], size: int, source: Optional[str] = None
+    ) -> None:
+        """Counts a block and keeps it if it is among the slowest seen so far."""
+        self.blocks += 1
+        if not self.max_slowest_blocks:
+            return
+        block = {"source": source, "index": index, "description": description, "bytes": size, "seconds": seconds}
+        entry = (seconds, next(self._sequence), block)
+        if len(self._slowest) < self.max_slowest_blocks:
+            heapq.heappush(self._slowest, entry)
+        elif seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    @property
+    def slowest_blocks(self) -> list[dict]:
+        """The slowest blocks, slowest first, with their parse, unpack and render time combined."""
+        return [block for _, _, block in sorted(self._slowest, reverse=True)]
+
+    def as_dict(self) -> dict:
+        return {
+            "phase_seconds": dict(self.phase_seconds),
+            "files": self.files,
+            "blocks": self.blocks,
+            "bytes_processed": self.bytes_processed,
+            "substitutions": self.substitutions,
+            "unresolved_placeholders": self.unresolved_placeholders,
+            "builtin_calls": dict(self.builtin_calls),
+            "compressed_bodies": self.compressed_bodies,
+            "compression_bytes_in": self.compression_bytes_in,
+            "compression_bytes_out": self.compression_bytes_out,
+            "compression_ratio": self.compression_ratio,
+            "compression_seconds": self.compression_seconds,
+            "compression_seconds_saved": self.compression_seconds_saved,
+            "slowest_blocks": self.slowest_blocks,
+        }
@@ -0,0 +1,376 @@
+"""Compiled request templates.
+
+A RequestTemplate is an immutable, pre-split form of an HTTPRequest. Every field is
+compiled once into literal text and placeholder slots, so rendering only has to look
+up the placeholders and join the pieces; no regular expressions run per render and the
+template itself is never mutated. Its annotations are a read-only mapping, copied into a
+new dict for each rendered request.
+
+A template without placeholders holds a single `static_request` that render, to_wire,
+render_many and EnvironmentMatrix hand out every time. Treat it as read-only: a change
+to its headers or annotations would show up in every other render.
+
+File variables are resolved at compile time. Builtins and variables that are only known
+at render time (the `env` passed to `RequestTemplate.render`) stay as placeholders.
+"""
+
+import dataclasses
+import json
+import os
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Callable, Mapping, Optional, Union
+
+from pyrestfile.compression import DEFAULT_ENCODING, compress_request
+from pyrestfile.headers import Headers, header_pairs
+from pyrestfile.includes import INCLUDE_CACHE, BodyInclude, FileBody, parse_include
+from pyrestfile.multipart import MultipartBody, has_include_parts, multipart_boundary, streamed_multipart
+from pyrestfile.parser import unpack_rest_file_text
+from pyrestfile.request_block_grammar import VALIDATION_OFF, VALIDATION_STRICT, HTTPRequest, is_json_content_type
+from pyrestfile.vars import BUILTINS, VAR_REFERENCE_PATTERN, resolve_variables
+from pyrestfile.wire import content_length_line, encode_request, has_header, head_fields, split_url
+
+
+@dataclass(frozen=True)
+class Placeholder:
+    """A `{{name}}` reference that is resolved at render time."""
+
+    name: str
+    raw: str
+    builtin: Optional[Callable[[], str]] = None
+
+    def resolve(self, env: Mapping[str, str]) -> str:
+        if self.builtin is not None:
+            return self.builtin()
+        return env.get(self.name, self.raw)
+
+
+@dataclass(frozen=True)
+class TemplateString:
+    """A string split into literal segments with a placeholder between each pair."""
+
+    literals: tuple[str, ...]
+    placeholders: tuple[Placeholder, ...]
+
+    def render(self, env: Mapping[str, str]) -> str:
+        literals = self.literals
+        parts = [literals[0]]
+        for index, placeholder in enumerate(self.placeholders, 1):
+            parts.append(placeholder.resolve(env))
+            parts.append(literals[index])
+        return "".join(parts)
+
+
+TemplateField = Union[str, TemplateString]
+
+
+def compile_string(template: str, variables: Mapping[str, str]) -> TemplateField:
+    """
+    Splits a template string into literals and placeholders. Known `variables` are inlined
+    into the literals, so a string whose references are all known compiles to a plain str.
+    `variables` should already be resolved (see resolve_variables); references left in an
+    inlined value, such as builtins or render-time names, become placeholders.
+    """
+    literals = []
+    placeholders = []
+    pending = []
+    position = 0
+    for match in VAR_REFERENCE_PATTERN.finditer(template):
+        pending.append(template[position : match.start()])
+        position = match.end()
+        name = match.group(1)
+        if name not in BUILTINS and name in variables:
+            value = variables[name]
+            inner = compile_string(value, {}) if "{{" in value else value
+            if isinstance(inner, str):
+                pending.append(inner)
+                continue
+            pending.append(inner.literals[0])
+            for placeholder, literal in zip(inner.placeholders, inner.literals[1:]):
+                literals.append("".join(pending))
+                placeholders.append(placeholder)
+                pending = [literal]
+            continue
+        literals.append("".join(pending))
+        placeholders.append(Placeholder(name=name, raw=match.group(0), builtin=BUILTINS.get(name)))
+        pending = []
+    pending.append(template[position:])
+    literals.append("".join(pending))
+
+    if not placeholders:
+        return literals[0]
+    return TemplateString(literals=tuple(literals), placeholders=tuple(placeholders))
+
+
+def concat_fields(fields: list[TemplateField]) -> TemplateField:
+    """Concatenates template fields into one, merging adjacent literals."""
+    literals = []
+    placeholders = []
+    pending = []
+    for value in fields:
+        if isinstance(value, str):
+            pending.append(value)
+            continue
+        pending.append(value.literals[0])
+        for placeholder, literal in zip(value.placeholders, value.literals[1:]):
+            literals.append("".join(pending))
+            placeholders.append(placeholder)
+            pending = [literal]
+    literals.append("".join(pending))
+
+    if not placeholders:
+        return literals[0]
+    return TemplateString(literals=tuple(literals), placeholders=tuple(placeholders))
+
+
+def _render_field(value: TemplateField, env: Mapping[str, str]) -> str:
+    if isinstance(value, str):
+        return value
+    return value.render(env)
+
+
+@dataclass(frozen=True)
+class WireTemplate:
+    """A templated request head with its static parts pre-spliced, plus the body template."""
+
+    method: str
+    head: TemplateField
+    body: TemplateField
+    validate_json: bool = False
+
+    def render(self, env: Mapping[str, str]) -> bytes:
+        head = _render_field(self.head, env)
+        body = _render_field(self.body, env)
+        if self.validate_json:
+            try:
+                json.loads(body)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Rendered body is invalid JSON: {e}")
+        encoded_body = body.encode("utf-8")
+        return head.encode("latin-1") + content_length_line(self.method, len(encoded_body)) + encoded_body
+
+
+def _split_url_field(url: TemplateField) -> Optional[tuple[TemplateField, str]]:
+    """Splits a URL into target and host, provided its scheme and authority are literal."""
+    if isinstance(url, str):
+        return split_url(url)
+    prefix = url.literals[0]
+    scheme_end = prefix.find("://")
+    if scheme_end == -1:
+        return (url, "") if prefix.startswith("/") else None
+    path_start = prefix.find("/", scheme_end + 3)
+    if path_start == -1:
+        return None
+    target = TemplateString(literals=(prefix[path_start:],) + url.literals[1:], placeholders=url.placeholders)
+    return target, prefix[scheme_end + 3 : path_start].rpartition("@")[2]
+
+
+def compile_wire_template(
+    method: TemplateField,
+    url: TemplateField,
+    http_version: str,
+    headers: tuple[tuple[str, TemplateField], ...],
+    content_type: str,
+    body: TemplateField,
+    validation: str,
+) -> Optional[WireTemplate]:
+    """
+    Pre-splices the wire head of a templated request. Returns None when the method, or the
+    scheme and host of the URL, are templated; such requests are rendered and encoded whole.
+    """
+    if not isinstance(method, str):
+        return None
+    split = _split_url_field(url)
+    if split is None:
+        return None
+    target, host = split
+    if has_header(headers, "host"):
+        host = ""
+    elif not host:
+        return None
+    head = concat_fields(head_fields(method, target, http_version, host, headers, content_type))
+    validate_json = validation != VALIDATION_OFF and is_json_content_type(content_type)
+    return WireTemplate(method=method, head=head, body=body, validate_json=validate_json)
+
+
+@dataclass(frozen=True)
+class RequestTemplate:
+    """Immutable, precompiled form of an HTTPRequest."""
+
+    description: str
+    method: TemplateField
+    url: TemplateField
+    http_version: str = ""
+    headers: tuple[tuple[str, TemplateField], ...] = ()
+    content_type: str = ""
+    body: TemplateField = ""
+    annotations: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+    body_file: Optional[Union[FileBody, MultipartBody]] = None
+    static_request: Optional[HTTPRequest] = None
+    validation: str = VALIDATION_STRICT
+    wire: Optional[WireTemplate] = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.annotations, MappingProxyType):
+            object.__setattr__(self, "annotations", MappingProxyType(dict(self.annotations)))
+
+    def __reduce__(self):
+        # MappingProxyType cannot be pickled; rebuild from a plain dict instead.
+        fields = {f.name: getattr(self, f.name) for f in dataclasses.fields(self)}
+        fields["annotations"] = dict(self.annotations)
+        return _rebuild_template, (fields,)
+
+    @property
+    def is_static(self) -> bool:
+        """True when the template has no placeholders left to resolve."""
+        return self.static_request is not None
+
+    def render(self, env: Optional[Mapping[str, str]] = None) -> HTTPRequest:
+        """
+        Build an HTTPRequest with the remaining placeholders resolved against `env`.
+        Static templates return the same shared, read-only HTTPRequest on every call.
+        Other requests get their own copy of the annotations.
+        With strict validation, a templated JSON body is validated on every render. A
+        `# @compress` request is compressed through the shared CompressionCache.
+        """
+        if self.static_request is not None:
+            return self.static_request
+        env = env or {}
+        request = HTTPRequest(
+            description=self.description,
+            method=_render_field(self.method, env),
+            url=_render_field(self.url, env),
+            http_version=self.http_version,
+            headers=Headers([(name, _render_field(value, env)) for name, value in self.headers]),
+            content_type=self.content_type,
+            body=_render_field(self.body, env),
+            annotations=dict(self.annotations),
+            body_file=self.body_file,
+        )
+        request._validation = self.validation
+        if self.validation == VALIDATION_STRICT and not isinstance(self.body, str):
+            request.validate()
+        encoding = self.annotations.get("compress")
+        if encoding is not None:
+            compress_request(request, encoding or DEFAULT_ENCODING)
+        return request
+
+    def to_wire(self, env: Optional[Mapping[str, str]] = None) -> bytes:
+        """
+        Returns the HTTP/1.1 bytes of the rendered request. Static templates are encoded once;
+        templated ones only render their placeholders into the pre-spliced head and body.
+        """
+        if self.static_request is not None:
+            return self.static_request.to_wire()
+        if self.wire is None:
+            return encode_request(self.render(env))
+        return self.wire.render(env or {})
+
+
+def _rebuild_template(fields: dict) -> RequestTemplate:
+    return RequestTemplate(**fields)
+
+
+def _compile_body(
+    body: str, variables: Mapping[str, str], base_dir: Optional[str], content_type: str = ""
+) -> tuple[TemplateField, Optional[Union[FileBody, MultipartBody]]]:
+    """
+    Compiles the body, reading `<@ path` includes now and turning `< path` into a FileBody
+    (or, for a multipart body with file parts, into a MultipartBody).
+    """
+    include = parse_include(body)
+    if include is None:
+        compiled = compile_string(body, variables)
+        if has_include_parts(body) and multipart_boundary(content_type) is not None:
+
+            def compile_text(text: str) -> str:
+                compiled_text = compile_string(text, variables)
+                if not isinstance(compiled_text, str):
+                    raise ValueError("A multipart body with file parts must be known when the template is compiled")
+                return compiled_text
+
+            multipart = streamed_multipart(compile_text(body), content_type, base_dir, compile_text)
+            if multipart is not None:
+                return "", multipart
+        return compiled, None
+    path = compile_string(include.path, variables)
+    if not isinstance(path, str):
+        raise ValueError(f"Include path {include.path!r} must be known when the template is compiled")
+    path = BodyInclude(path).resolve(base_dir)
+    if include.render:
+        return compile_string(INCLUDE_CACHE.read_text(path), variables), None
+    return "", FileBody(path)
+
+
+def compile_request(
+    request: HTTPRequest,
+    variables: Optional[Mapping[str, str]] = None,
+    base_dir: Optional[Union[str, os.PathLike]] = None,
+) -> RequestTemplate:
+    """
+    Compiles an unrendered HTTPRequest into a RequestTemplate, inlining `variables`.
+    Body includes are read (or, for raw `< path` includes, located) relative to `base_dir`.
+    """
+    return _compile_request(request, resolve_variables(variables or {}), base_dir)
+
+
+def _compile_request(
+    request: HTTPRequest, variables: Mapping[str, str], base_dir: Optional[Union[str, os.PathLike]]
+) -> RequestTemplate:
+    method = compile_string(request.method, variables)
+    url = compile_string(request.url, variables)
+    headers = tuple((name, compile_string(value, variables)) for name, value in header_pairs(request.headers))
+    body, body_file = _compile_body(request.body, variables, base_dir and os.fspath(base_dir), request.content_type)
+
+    fields = [method, url, body, *(value for _, value in headers)]
+    encoding = request.annotations.get("compress")
+    static_request = None
+    wire = None
+    if all(isinstance(value, str) for value in fields):
+        static_request = HTTPRequest(
+            description=request.description,
+            method=method,
+            url=url,
+            http_version=request.http_version,
+            headers=Headers(headers),
+            content_type=request.content_type,
+            body=body,
+            annotations=dict(request.annotations),
+            body_file=body_file,
+        )
+        static_request._validation = request._validation
+        if request._validation == VALIDATION_STRICT:
+            static_request.validate()
+        if encoding is not None:
+            compress_request(static_request, encoding or DEFAULT_ENCODING)
+    elif body_file is None and encoding is None:
+        wire = compile_wire_template(
+            method, url, request.http_version, headers, request.content_type, body, request._validation
+        )
+
+    return RequestTemplate(
+        description=request.description,
+        method=method,
+        url=url,
+        http_version=request.http_version,
+        headers=headers,
+        content_type=request.content_type,
+        body=body,
+        annotations=MappingProxyType(dict(request.annotations)),
+        body_file=body_file,
+        static_request=static_request,
+        validation=request._validation,
+        wire=wire,
+    )
+
+
+def compile_rest_file(
+    text: str, validation: str = VALIDATION_STRICT, base_dir: Optional[Union[str, os.PathLike]] = None
+) -> list[RequestTemplate]:
+    """
+    Parse the input .rest file text and return a list of RequestTemplate objects.
+    File variables are inlined; everything else is resolved by `RequestTemplate.render`.
+    """
+    inline_vars, requests_with_var_placeholders = unpack_rest_file_text(text, validation)
+    variables = resolve_variables(inline_vars)
+    return [_compile_request(request, variables, base_dir) for request in requests_with_var_placeholders]
@@ -9,7 +9,8 @@ returns a list of `RequestBlock` objects for further unpacking.
 """
 
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
 
 
 @dataclass
@@ -18,20 +19,23 @@ class RequestBlock:
     request_line: str
     headers: str
     body: str
+    annotations: dict[str, str] = field(default_factory=dict)
 
 
 DELIMITER_LINE_MATCHER = re.compile(r"^\s*#{3,}.*$")
 DELIMITER_LINE_PATTERN = r"(^\s*#{3,}.*(?:\n|$))"
+DELIMITER_SPLIT_PATTERN = re.compile(DELIMITER_LINE_PATTERN, re.MULTILINE)
+ANNOTATION_LINE_PATTERN = re.compile(r"^\s*(?:#|//)\s*@([\w-]+)(?:\s+(.*?))?\s*$")
 
 
 def split_along_delimiters(text):
-    parts = re.split(DELIMITER_LINE_PATTERN, text, flags=re.MULTILINE)
+    parts = DELIMITER_SPLIT_PATTERN.split(text)
 
     unprocessed_blocks = []
     pending_delim = ""
 
     for part in parts:
-        if re.match(DELIMITER_LINE_PATTERN, part):
+        if DELIMITER_SPLIT_PATTERN.match(part):
             pending_delim = part.rstrip("\n")
         else:
             if part.strip():
@@ -55,24 +59,47 @@ def is_comment_line(line: str) -> bool:
     return starts_with_slash or starts_with_hash
 
 
+def parse_annotation(line: str) -> Optional[tuple[str, str]]:
+    """
+    Returns the (name, value) of an annotation comment such as "# @name createUser" or
+    "// @weight 5", or None if the line is not one. Flag annotations have an empty value.
+    """
+    match = ANNOTATION_LINE_PATTERN.match(line)
+    if not match:
+        return None
+    return match.group(1), match.group(2) or ""
+
+
 def parse_block(unprocessed_block: str) -> RequestBlock:
     """
     Parses a block of text that corresponds to one request block into a RequestBlock object.
     """
-    lines = iter(unprocessed_block.splitlines())
+    return parse_block_lines(unprocessed_block.splitlines())
+
+
+def parse_block_lines(block_lines: Iterable[str]) -> RequestBlock:
+    """
+    Parses the lines of one request block into a RequestBlock object.
+    The lines must not contain line terminators.
+    """
+    lines = iter(block_lines)
+    annotations = {}
 
     def next_nonempty(iterator, skip_comments=True):
         for line in iterator:
             stop_here = bool(line.strip())
-            if skip_comments:
-                stop_here = stop_here and not is_comment_line(line)
+            if skip_comments and stop_here and is_comment_line(line):
+                annotation = parse_annotation(line)
+                if annotation:
+                    annotations[annotation[0]] = annotation[1]
+                stop_here = False
             if stop_here:
                 return line.rstrip()
         return None
 
     first_line = next_nonempty(lines, skip_comments=True)
     if first_line is None:
-        return RequestBlock(description="", request_line="", headers="", body="")
+        return RequestBlock(description="", request_line="", headers="", body="", annotations=annotations)
 
     description = None
     if DELIMITER_LINE_MATCHER.match(first_line):
@@ -102,7 +129,9 @@ def parse_block(unprocessed_block: str) -> RequestBlock:
     else:
         body = ""
 
-    return RequestBlock(description=description, request_line=request_line, headers=headers, body=body)
+    return RequestBlock(
+        description=description, request_line=request_line, headers=headers, body=body, annotations=annotations
+    )
 
 
 def parse_rest_file_text(text: str) -> list[RequestBlock]:
@@ -113,3 +142,24 @@ def parse_rest_file_text(text: str) -> list[RequestBlock]:
     unprocessed_blocks = split_along_delimiters(text)
     request_blocks = [parse_block(block) for block in unprocessed_blocks if block.strip()]
     return request_blocks
+
+
+def iter_request_blocks(lines: Iterable[str]) -> Iterator[RequestBlock]:
+    """
+    Yields request blocks from an iterable of lines, one block at a time.
+    Produces the same blocks as parse_rest_file_text but only buffers the lines of the current block.
+    """
+    block_lines: list[str] = []
+    has_content = False
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if DELIMITER_LINE_MATCHER.match(line):
+            if has_content:
+                yield parse_block_lines(block_lines)
+            block_lines = [line]
+            has_content = False
+            continue
+        block_lines.append(line)
+        has_content = has_content or bool(line.strip())
+    if has_content:
+        yield parse_block_lines(block_lines)
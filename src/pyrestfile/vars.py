@@ -1,8 +1,12 @@
 import re
 import time
 import uuid
+from typing import Iterable, Iterator, Mapping, Optional
 
+from pyrestfile.compact import StringPool
+from pyrestfile.headers import Headers, header_pairs
 from pyrestfile.request_block_grammar import HTTPRequest
+from pyrestfile.stats import ParseStats
 
 
 OPTIONAL_WHITESPACE = r"\s*"
@@ -14,7 +18,7 @@ VAR_DECLARATION_REGEX = LINE_START + VAR_NAME_GROUP + PADDED_EQ_SIGN + VALUE_GRO
 VAR_DECLARATION_PATTERN = re.compile(VAR_DECLARATION_REGEX, re.M)
 
 DOUBLE_LEFT_BRACE = r"{{"
-VAR_REFERENCE_GROUP = r"([\w.-]+)"
+VAR_REFERENCE_GROUP = r"(\$?[\w.-]+)"
 DOUBLE_RIGHT_BRACE = r"}}"
 VAR_REFERENCE_REGEX = (
     DOUBLE_LEFT_BRACE + OPTIONAL_WHITESPACE + VAR_REFERENCE_GROUP + OPTIONAL_WHITESPACE + DOUBLE_RIGHT_BRACE
@@ -28,6 +32,57 @@ BUILTINS = {
 }
 
 
+class VariableCycleError(ValueError):
+    """Raised when variables refer to each other in a cycle. `chain` lists the names in order."""
+
+    def __init__(self, chain: list[str]):
+        self.chain = chain
+        super().__init__("Variable cycle: " + " -> ".join(chain))
+
+
+def resolve_variables(variables: Mapping[str, str]) -> dict[str, str]:
+    """
+    Expands the references between variables, so `@base = {{host}}/api` resolves to the
+    value of `host` followed by `/api`. Each variable is expanded once, after the ones it
+    refers to. Builtins and names that are not defined are left in place as `{{name}}`.
+    Raises VariableCycleError if variables refer to each other in a cycle.
+    """
+    resolved: dict[str, str] = {}
+    chain: list[str] = []
+
+    def expand(match) -> str:
+        name = match.group(1)
+        if name in BUILTINS or name not in variables:
+            return match.group(0)
+        return resolve(name)
+
+    def resolve(name: str) -> str:
+        if name in resolved:
+            return resolved[name]
+        if name in chain:
+            raise VariableCycleError(chain[chain.index(name) :] + [name])
+        chain.append(name)
+        value = variables[name]
+        if "{{" in value:
+            value = VAR_REFERENCE_PATTERN.sub(expand, value)
+        chain.pop()
+        resolved[name] = value
+        return value
+
+    for name in variables:
+        resolve(name)
+    return resolved
+
+
+def dynamic_variables(resolved: Mapping[str, str]) -> frozenset[str]:
+    """Names of resolved variables whose value still contains a builtin, like `{{$uuid}}`."""
+    return frozenset(
+        name
+        for name, value in resolved.items()
+        if "{{" in value and any(ref in BUILTINS for ref in VAR_REFERENCE_PATTERN.findall(value))
+    )
+
+
 def collect_var_values(text: str) -> dict[str, str]:
     """Collects variable declarations from the given text."""
     vars_: dict[str, str] = {}
@@ -44,31 +99,99 @@ def strip_var_declarations(text: str) -> str:
     return "\n".join(line for line in lines if not VAR_DECLARATION_PATTERN.match(line))
 
 
+def extract_var_declarations(lines: Iterable[str], variables: dict[str, str]) -> Iterator[str]:
+    """
+    Yields the lines that are not variable declarations.
+    Declarations are recorded into `variables` as they are consumed.
+    """
+    for line in lines:
+        line = line.rstrip("\r\n")
+        match = VAR_DECLARATION_PATTERN.match(line)
+        if match:
+            variables[match.group(1).strip()] = match.group(2).strip()
+        else:
+            yield line
+
+
 class Renderer:
-    """Renders variables and builtins in template string."""
+    """
+    Renders variables and builtins in template string.
+
+    Variables are resolved against each other once, when the renderer is created (or
+    refreshed), so rendering is a lookup in a flattened table. Only variables whose value
+    contains a builtin are evaluated again on every use.
 
-    def __init__(self, variables: dict[str, str]):
+    Headers that contain placeholders are replaced by new Headers rather than updated in
+    place, so requests that share them are unaffected. With `strings`, rendered URLs and
+    headers are shared through the pool.
+    """
+
+    def __init__(
+        self, variables: dict[str, str], stats: Optional[ParseStats] = None, strings: Optional[StringPool] = None
+    ):
         self.variables = variables
+        self.stats = stats
+        self.strings = strings
+        self._resolve()
+        if stats is not None:
+            self._substitute = self._substitute_counted
+
+    def _resolve(self) -> None:
+        source = dict(self.variables)
+        self._source = None
+        self.resolved = resolve_variables(source)
+        self._dynamic = dynamic_variables(self.resolved)
+        self._source = source
+
+    def refresh(self) -> bool:
+        """Re-resolves the variables if `self.variables` changed. Returns True if it did."""
+        if self.variables == self._source:
+            return False
+        self._resolve()
+        return True
 
     def render(self, request: HTTPRequest) -> HTTPRequest:
         """Render the HTTPRequest object by replacing variables and builtins in its attributes."""
         if request.method:
-            request.method = self._render_string(request.method)
+            request.method = self.render_string(request.method)
         if request.url:
-            request.url = self._render_string(request.url)
+            request.url = self.render_string(request.url)
+            if self.strings is not None:
+                request.url = self.strings.intern(request.url)
         if request.body:
-            request.body = self._render_string(request.body)
-        if request.headers:
-            for key, value in request.headers.items():
-                request.headers[key] = self._render_string(value)
+            request.body = self.render_string(request.body)
+        pairs = header_pairs(request.headers)
+        if any("{{" in value for _, value in pairs):
+            rendered = [(key, self.render_string(value)) for key, value in pairs]
+            request.headers = Headers(rendered) if self.strings is None else self.strings.headers(rendered)
         return request
 
-    def _render_string(self, template: str) -> str:
+    def render_string(self, template: str) -> str:
+        """Render variables and builtins in a single template string."""
         return VAR_REFERENCE_PATTERN.sub(self._substitute, template)
 
     def _substitute(self, match):
         key = match.group(1)
         if key in BUILTINS:
             return BUILTINS[key]()
-        default_value = match.group(0)
-        return self.variables.get(key, default_value)
+        value = self.resolved.get(key)
+        if value is None:
+            return match.group(0)
+        if key in self._dynamic:
+            return VAR_REFERENCE_PATTERN.sub(_substitute_builtin, value)
+        return value
+
+    def _substitute_counted(self, match):
+        key = match.group(1)
+        if key in BUILTINS:
+            self.stats.add_builtin_call(key)
+        elif key in self.resolved:
+            self.stats.substitutions += 1
+        else:
+            self.stats.unresolved_placeholders += 1
+        return Renderer._substitute(self, match)
+
+
+def _substitute_builtin(match):
+    builtin = BUILTINS.get(match.group(1))
+    return match.group(0) if builtin is None else builtin()
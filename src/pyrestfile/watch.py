@@ -0,0 +1,157 @@
+"""Hot reloading of .rest files.
+
+A RestFileWatcher polls a set of .rest files and re-parses the ones whose content changed.
+Files are first compared by modification time and size, and a changed file is only
+re-parsed if its content hash differs from the last parse, so no-op saves cost one read.
+
+The parsed requests are published as a RequestSet: an immutable snapshot that is replaced
+by a single attribute assignment. Readers take `watcher.current` (or `watcher.requests`)
+without locking and keep using the snapshot they got for as long as they like. A file that
+fails to parse keeps its previous requests in the new snapshot, and the error is reported
+in `RequestSet.errors` and through the `on_error` callback.
+
+Watching is done by polling, which works the same on every platform and under gevent.
+"""
+
+import hashlib
+import os
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Callable, Iterable, Mapping, Optional, Union
+
+from pyrestfile.parser import parse_rest_file
+from pyrestfile.request_block_grammar import VALIDATION_STRICT, HTTPRequest
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+@dataclass(frozen=True)
+class RequestSet:
+    """An immutable snapshot of the requests parsed from every watched file."""
+
+    version: int
+    requests: tuple[HTTPRequest, ...] = ()
+    by_file: Mapping[str, tuple[HTTPRequest, ...]] = field(default_factory=lambda: MappingProxyType({}))
+    errors: Mapping[str, Exception] = field(default_factory=lambda: MappingProxyType({}))
+
+
+@dataclass
+class _FileState:
+    stat: Optional[tuple[int, int]] = None
+    digest: Optional[bytes] = None
+    requests: tuple[HTTPRequest, ...] = ()
+    error: Optional[Exception] = None
+
+
+class RestFileWatcher:
+    """Watches .rest files and atomically swaps in a new RequestSet when they change."""
+
+    def __init__(
+        self,
+        paths: Iterable[Union[str, os.PathLike]],
+        env: Optional[dict[str, str]] = None,
+        validation: str = VALIDATION_STRICT,
+        interval: float = DEFAULT_POLL_INTERVAL,
+        on_reload: Optional[Callable[[RequestSet], None]] = None,
+        on_error: Optional[Callable[[str, Exception], None]] = None,
+    ):
+        self.paths = [os.fspath(path) for path in paths]
+        self.env = env
+        self.validation = validation
+        self.interval = interval
+        self.on_reload = on_reload
+        self.on_error = on_error
+        self.current = RequestSet(version=0)
+        self._files = {path: _FileState() for path in self.paths}
+        self._poll_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.poll()
+
+    @property
+    def requests(self) -> tuple[HTTPRequest, ...]:
+        """The requests of the current snapshot, in path order."""
+        return self.current.requests
+
+    def poll(self) -> bool:
+        """Checks every file once. Returns True if a new RequestSet was published."""
+        with self._poll_lock:
+            changed = False
+            for path, state in self._files.items():
+                changed = self._refresh(path, state) or changed
+            if changed:
+                self._publish()
+            return changed
+
+    def _refresh(self, path: str, state: _FileState) -> bool:
+        try:
+            stat = os.stat(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature == state.stat:
+                return False
+            with open(path, "rb") as f:
+                content = f.read()
+        except OSError as e:
+            state.stat = state.digest = None
+            return self._fail(path, state, e)
+
+        state.stat = signature
+        digest = hashlib.sha256(content).digest()
+        if digest == state.digest:
+            return False
+        try:
+            requests = parse_rest_file(
+                content.decode("utf-8"), self.env, self.validation, base_dir=os.path.dirname(os.path.abspath(path))
+            )
+        except Exception as e:  # a file saved mid-edit can break the parser in any way
+            state.digest = digest  # don't re-parse the same broken content on every poll
+            return self._fail(path, state, e)
+        state.digest = digest
+        state.requests = tuple(requests)
+        state.error = None
+        return True
+
+    def _fail(self, path: str, state: _FileState, error: Exception) -> bool:
+        """Records a failed load; the file's previous requests stay in place."""
+        repeated = state.error is not None and repr(state.error) == repr(error)
+        state.error = error
+        if self.on_error is not None and not repeated:
+            self.on_error(path, error)
+        return not repeated
+
+    def _publish(self) -> None:
+        by_file = {path: state.requests for path, state in self._files.items()}
+        errors = {path: state.error for path, state in self._files.items() if state.error is not None}
+        self.current = RequestSet(
+            version=self.current.version + 1,
+            requests=tuple(request for requests in by_file.values() for request in requests),
+            by_file=MappingProxyType(by_file),
+            errors=MappingProxyType(errors),
+        )
+        if self.on_reload is not None:
+            self.on_reload(self.current)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.poll()
+
+    def start(self) -> "RestFileWatcher":
+        """Starts polling every `interval` seconds in a daemon thread."""
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="pyrestfile-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "RestFileWatcher":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
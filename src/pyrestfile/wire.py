@@ -0,0 +1,188 @@
+"""HTTP/1.1 wire encoding of requests.
+
+`encode_request` turns an HTTPRequest (or a MappedHTTPRequest) into the exact bytes a
+client writes to the socket. The request target and `Host` header are derived from an
+absolute `url`, `Content-Type` comes from the request's `content_type`, and
+`Content-Length` is always computed from the encoded body, replacing any written in the
+file. The head is encoded as latin-1 and the body as UTF-8; a request with a
+`content_encoding` sends its pre-compressed body instead (see compression). File-include
+and multipart bodies are streamed from disk by `iter_wire_chunks`, which can also frame
+any body with chunked transfer encoding.
+
+`head_fields` also accepts template fields, which is how RequestTemplate pre-splices the
+static parts of a templated request's head.
+"""
+
+from typing import Iterator, Optional, Union
+from urllib.parse import urlsplit
+
+from pyrestfile.compression import compressed_body
+from pyrestfile.headers import Headers, header_pairs
+from pyrestfile.request_block_grammar import VALIDATION_LAZY
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_HTTP_VERSION = "HTTP/1.1"
+METHODS_WITH_BODY = frozenset({"POST", "PUT", "PATCH"})
+CRLF = "\r\n"
+
+
+def split_url(url: str) -> tuple[str, str]:
+    """
+    Splits a URL into the request target and the Host header value.
+    Relative URLs (e.g. "/v1/users") are returned as-is with an empty host.
+    """
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        return url, ""
+    target = parts.path or "/"
+    if parts.query:
+        target += "?" + parts.query
+    return target, parts.netloc.rpartition("@")[2]
+
+
+def has_header(headers, name: str) -> bool:
+    """True if the (name, value) pairs contain `name`, which must be given in lowercase."""
+    return any(key.lower() == name for key, _ in headers)
+
+
+def head_fields(
+    method, target, http_version: str, host, headers, content_type: str, content_encoding: str = ""
+) -> list:
+    """Lays out the request line and headers, up to but excluding Content-Length and the blank line."""
+    fields = [method, " ", target, " ", http_version or DEFAULT_HTTP_VERSION, CRLF]
+    if host:
+        fields += ["Host: ", host, CRLF]
+    for name, value in headers:
+        if name.lower() != "content-length":
+            fields += [name, ": ", value, CRLF]
+    if content_type:
+        fields += ["Content-Type: ", content_type, CRLF]
+    if content_encoding:
+        fields += ["Content-Encoding: ", content_encoding, CRLF]
+    return fields
+
+
+def content_length_line(method: str, body_length: Optional[int]) -> bytes:
+    """
+    Returns the Content-Length header (when one is needed) and the blank line ending the head.
+    A `body_length` of None announces a chunked body instead.
+    """
+    if body_length is None:
+        return b"Transfer-Encoding: chunked\r\n\r\n"
+    if body_length or method in METHODS_WITH_BODY:
+        return b"Content-Length: %d\r\n\r\n" % body_length
+    return b"\r\n"
+
+
+def _body_bytes(request) -> Union[bytes, memoryview]:
+    body_file = getattr(request, "body_file", None)
+    if body_file is not None:
+        return body_file.read()
+    if getattr(request, "content_encoding", ""):
+        return compressed_body(request)
+    body_bytes = getattr(request, "body_bytes", None)
+    if body_bytes is not None:
+        return body_bytes
+    return request.body.encode("utf-8") if request.body else b""
+
+
+def _has(headers, name: str) -> bool:
+    return name in headers if isinstance(headers, Headers) else has_header(headers.items(), name)
+
+
+def encode_parts(request) -> tuple[bytes, Union[bytes, memoryview]]:
+    """Returns the encoded head (including the blank line) and the body of `request`."""
+    body = _body_bytes(request)
+    return encode_head(request, len(body)), body
+
+
+def encode_head(request, body_length: Optional[int]) -> bytes:
+    """
+    Returns the encoded request line and headers of `request`, up to and including the
+    blank line. Headers objects contribute their cached encoding. A `body_length` of None
+    announces a chunked body.
+    """
+    if getattr(request, "_validation", None) == VALIDATION_LAZY:
+        request.validate()
+    target, host = split_url(request.url)
+    headers = request.headers
+    has_host = _has(headers, "host")
+    if host and has_host:
+        host = ""
+    if not host and not has_host:
+        raise ValueError(f"Cannot derive a Host header from relative URL {request.url!r}")
+    content_encoding = getattr(request, "content_encoding", "")
+    end = content_length_line(request.method, body_length)
+    if body_length is None and _has(headers, "transfer-encoding"):
+        end = CRLF.encode()
+    if isinstance(headers, Headers):
+        fields = head_fields(request.method, target, request.http_version, host, (), "")
+        content_lines = f"Content-Type: {request.content_type}\r\n" if request.content_type else ""
+        if content_encoding:
+            content_lines += f"Content-Encoding: {content_encoding}\r\n"
+        return b"".join(
+            [
+                "".join(fields).encode("latin-1"),
+                headers.encoded,
+                content_lines.encode("latin-1"),
+                end,
+            ]
+        )
+    fields = head_fields(
+        request.method,
+        target,
+        request.http_version,
+        host,
+        header_pairs(headers),
+        request.content_type,
+        content_encoding,
+    )
+    return "".join(fields).encode("latin-1") + end
+
+
+def encode_request(request) -> bytes:
+    """Returns the complete HTTP/1.1 request bytes for `request`."""
+    head, body = encode_parts(request)
+    return head + body
+
+
+def _iter_body_chunks(request, chunk_size: int) -> Iterator[Union[bytes, memoryview]]:
+    body_file = getattr(request, "body_file", None)
+    if body_file is not None:
+        yield from body_file.iter_chunks(chunk_size)
+        return
+    view = memoryview(_body_bytes(request))
+    for start in range(0, len(view), chunk_size):
+        yield view[start : start + chunk_size]
+
+
+def iter_wire_chunks(
+    request, chunk_size: int = DEFAULT_CHUNK_SIZE, chunked: bool = False
+) -> Iterator[Union[bytes, memoryview]]:
+    """
+    Yields the encoded head followed by the body in `chunk_size` slices. Body slices are
+    memoryviews, so large (or memory-mapped) bodies are never copied, and file-include and
+    multipart bodies are read from disk one chunk at a time.
+
+    With `chunked`, the body is sent with `Transfer-Encoding: chunked` framing instead of
+    a Content-Length, one HTTP chunk per slice.
+    """
+    if chunked:
+        yield encode_head(request, None)
+        for chunk in _iter_body_chunks(request, chunk_size):
+            if chunk:
+                yield b"%x\r\n" % len(chunk)
+                yield chunk
+                yield b"\r\n"
+        yield b"0\r\n\r\n"
+        return
+    body_file = getattr(request, "body_file", None)
+    if body_file is not None:
+        yield encode_head(request, body_file.content_length)
+        yield from body_file.iter_chunks(chunk_size)
+        return
+    head, body = encode_parts(request)
+    yield head
+    view = memoryview(body)
+    for start in range(0, len(view), chunk_size):
+        yield view[start : start + chunk_size]
@@ -0,0 +1,98 @@
+import json
+import uuid
+
+import pytest
+
+from pyrestfile import compile_rest_file, parse_rest_file, render_many
+from pyrestfile.batch import generate_uuids
+from pyrestfile.request_block_grammar import unpack_request_block
+from pyrestfile.top_level_grammar import parse_rest_file_text
+
+SAMPLE = """@tenant = acme
+
+POST https://{{host}}/v1/{{tenant}}/users
+Content-Type: application/json
+X-Request-Id: {{$uuid}}
+X-Static: yes
+
+{"id": "{{$uuid}}", "name": "{{name}}", "at": {{$timestamp}}}
+"""
+
+
+def test_generate_uuids_are_random_version_4():
+    values = generate_uuids(500)
+    assert len(set(values)) == 500
+    for value in values:
+        parsed = uuid.UUID(value)
+        assert str(parsed) == value
+        assert parsed.version == 4 and parsed.variant == uuid.RFC_4122
+
+
+def test_render_many_matches_render():
+    template = compile_rest_file(SAMPLE)[0]
+    env = {"host": "h", "name": "Ada"}
+    requests = list(render_many(template, 3, env=env))
+    expected = template.render(env)
+
+    assert len(requests) == 3
+    for request in requests:
+        body = request.json_body
+        assert request.headers["X-Request-Id"] != body["id"]
+        assert request.headers["X-Static"] == "yes"
+        assert request.url == expected.url
+        assert abs(body["at"] - expected.json_body["at"]) <= 1
+        assert body["name"] == "Ada"
+    assert len({request.json_body["id"] for request in requests}) == 3
+
+
+def test_env_rows_as_dicts_and_columns():
+    template = compile_rest_file(SAMPLE)[0]
+    rows = [{"name": "a"}, {"name": "b", "host": "other"}, {}]
+    dict_rendered = list(render_many(template, env_rows=rows, env={"host": "h", "name": "default"}))
+    assert [r.json_body["name"] for r in dict_rendered] == ["a", "b", "default"]
+    assert [r.url for r in dict_rendered] == ["https://h/v1/acme/users", "https://other/v1/acme/users"] + [
+        "https://h/v1/acme/users"
+    ]
+
+    columns = {"name": ["x", "y", "z"], "host": ["h1", "h2", "h3", "h4"]}
+    column_rendered = list(render_many(template, env_rows=columns))
+    assert [(r.url, r.json_body["name"]) for r in column_rendered] == [
+        ("https://h1/v1/acme/users", "x"),
+        ("https://h2/v1/acme/users", "y"),
+        ("https://h3/v1/acme/users", "z"),
+    ]
+    assert len(list(render_many(template, 2, env_rows=columns))) == 2
+
+
+def test_batches_and_exact_timestamps():
+    template = compile_rest_file(SAMPLE)[0]
+    requests = list(render_many(template, 10, env={"host": "h", "name": "n"}, batch_size=3, exact_timestamps=True))
+    ids = [request.json_body["id"] for request in requests] + [request.headers["X-Request-Id"] for request in requests]
+    assert len(set(ids)) == 20
+
+
+def test_render_many_accepts_unrendered_requests_and_validates():
+    inline = SAMPLE.replace("@tenant = acme\n", "")
+    request = unpack_request_block(parse_rest_file_text(inline)[0])
+    rendered = next(render_many(request, 1, env={"host": "h", "name": "n", "tenant": "t"}))
+    assert rendered.url == "https://h/v1/t/users"
+
+    with pytest.raises(ValueError):
+        next(render_many(request, 1, env={"host": "h", "name": '"broken', "tenant": "t"}))
+    with pytest.raises(ValueError):
+        next(render_many(request))
+
+
+def test_static_templates_yield_the_shared_request():
+    template = compile_rest_file("GET https://example.com/\n")[0]
+    requests = list(render_many(template, 3))
+    assert requests == parse_rest_file("GET https://example.com/\n") * 3
+    assert requests[0] is requests[2]
+    json.dumps([r.url for r in requests])
+
+
+def test_rendered_rows_own_their_annotations():
+    template = compile_rest_file("# @name create\n" + SAMPLE)[0]
+    first, second = render_many(template, 2, env={"host": "h", "name": "n"})
+    first.annotations["name"] = "changed"
+    assert second.annotations == template.annotations == {"name": "create"}
@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+from pyrestfile import parse_rest_file, parse_rest_path
+from pyrestfile import parser
+from pyrestfile.cache import ParseCache
+
+SAMPLE = """@token = abc123
+### Create
+POST https://{{host}}/v1/users HTTP/1.1
+Content-Type: application/json
+Authorization: Bearer {{token}}
+
+{"name": "jane"}
+### List
+GET https://{{host}}/v1/users
+"""
+
+
+@pytest.fixture
+def rest_path(tmp_path):
+    path = tmp_path / "api.rest"
+    path.write_text(SAMPLE)
+    return path
+
+
+def test_parse_rest_path_without_cache(rest_path):
+    env = {"host": "api.example.com"}
+    assert parse_rest_path(rest_path, env=env) == parse_rest_file(SAMPLE, env=env)
+
+
+def test_warm_load_skips_parsing(rest_path, tmp_path, monkeypatch):
+    env = {"host": "api.example.com"}
+    cache_dir = tmp_path / "cache"
+    cold = parse_rest_path(rest_path, env=env, cache_dir=cache_dir)
+    assert cold == parse_rest_file(SAMPLE, env=env)
+    assert len(os.listdir(cache_dir)) == 1
+
+    def fail(text):
+        raise AssertionError("warm load must not re-parse")
+
+    monkeypatch.setattr(parser, "unpack_rest_file_text", fail)
+    warm = parse_rest_path(rest_path, env=env, cache_dir=cache_dir)
+    assert warm == cold
+
+
+def test_cached_entries_are_rendered_per_call(rest_path, tmp_path):
+    cache_dir = tmp_path / "cache"
+    parse_rest_path(rest_path, env={"host": "a.example.com"}, cache_dir=cache_dir)
+    second = parse_rest_path(rest_path, env={"host": "b.example.com"}, cache_dir=cache_dir)
+    assert second[1].url == "https://b.example.com/v1/users"
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    key = cache.key(b"GET http://example.com")
+    (tmp_path / f"{key}.json").write_text("{not json")
+    assert cache.load(key) is None
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    cache = ParseCache(str(tmp_path), max_bytes=10_000)
+    keys = []
+    for index in range(3):
+        key = cache.key(str(index).encode())
+        cache.store(key, {"v": "x" * 3000}, [])
+        os.utime(tmp_path / f"{key}.json", ns=(index * 10**9, index * 10**9))
+        keys.append(key)
+    assert cache.load(keys[0]) is not None
+
+    cache.store(cache.key(b"new"), {"v": "x" * 3000}, [])
+    assert cache.load(keys[1]) is None
+    assert cache.load(keys[0]) is not None
+    assert cache.load(keys[2]) is not None
+
+
+def test_stores_keep_a_running_size_instead_of_rescanning(tmp_path, monkeypatch):
+    cache = ParseCache(str(tmp_path), max_bytes=10_000)
+    cache.store(cache.key(b"first"), {}, [])
+    scans = []
+    real_evict = ParseCache.evict
+    monkeypatch.setattr(ParseCache, "evict", lambda self: scans.append(1) or real_evict(self))
+
+    for index in range(20):
+        ParseCache(str(tmp_path), max_bytes=10_000).store(cache.key(str(index).encode()), {}, [])
+    assert scans == []
+
+    cache.store(cache.key(b"big"), {"v": "x" * 20_000}, [])
+    assert scans == [1]
+
+
+def test_compressed_requests_round_trip(tmp_path):
+    requests = parse_rest_file(SAMPLE, env={"host": "h"}, compress="gzip")
+    cache = ParseCache(os.fspath(tmp_path))
+    cache.store("key", {}, requests)
+    _, loaded = cache.load("key")
+    assert loaded == requests
+    assert loaded[0].content_encoding == "gzip"
+    assert loaded[0].to_wire() == requests[0].to_wire()
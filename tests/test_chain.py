@@ -0,0 +1,85 @@
+import json
+import time
+
+import pytest
+
+from pyrestfile.chain import extract_response_value, plan_chain, run_chain
+from pyrestfile.cli import main
+from pyrestfile.runner import Response
+
+FLOW = """# @name login
+POST {{base}}/login
+Content-Type: application/json
+
+{"user": "ada"}
+
+### Independent
+GET {{base}}/slow
+
+### Profile
+# @name profile
+GET {{base}}/users?from={{login.response.headers.X-Echo-Path}}
+Content-Type: application/json
+
+{"method": "{{login.response.body.method}}", "user": {{login.response.body.headers.Content-Length}}}
+
+### Orders
+GET {{base}}/slow?path={{profile.response.body.path}}
+"""
+
+
+def _base_url(server):
+    host, port = server.server_address
+    return f"http://{host}:{port}"
+
+
+def test_extract_response_value():
+    response = Response(200, "OK", [("X-Token", "abc")], b'{"items": [{"id": 7}], "name": "n", "ok": true}')
+    assert extract_response_value(response, "r.response.headers.x-token") == "abc"
+    assert extract_response_value(response, "r.response.body.items.0.id") == "7"
+    assert extract_response_value(response, "r.response.body.items.-1") == '{"id": 7}'
+    assert extract_response_value(response, "r.response.body.name") == "n"
+    assert extract_response_value(response, "r.response.body") == response.body.decode()
+    with pytest.raises(ValueError, match="'missing'"):
+        extract_response_value(response, "r.response.body.missing")
+
+
+def test_plan_chain_finds_dependencies():
+    steps = plan_chain(FLOW, env={"base": "http://localhost"})
+    assert [sorted(step.dependencies) for step in steps] == [[], [], ["login"], ["profile"]]
+    assert steps[2].validate and not steps[0].validate
+
+    with pytest.raises(ValueError, match="unknown request 'nobody'"):
+        plan_chain("GET http://h/{{nobody.response.body.id}}\n")
+    with pytest.raises(ValueError, match="Request cycle: a -> b -> a"):
+        plan_chain("# @name a\nGET http://h/{{b.response.body}}\n###\n# @name b\nGET http://h/{{a.response.body}}\n")
+
+
+def test_run_chain_fills_response_values_and_overlaps_independent_requests(http_server):
+    started = time.perf_counter()
+    chain = run_chain(FLOW, env={"base": _base_url(http_server)}, concurrency=4)
+    elapsed = time.perf_counter() - started
+
+    assert [result.status for result in chain.results] == [200, 200, 200, 200]
+    assert all(result.error is None for result in chain.results)
+    assert chain.results[2].url.endswith("/users?from=/login")
+    profile = json.loads(chain.responses["profile"].body)
+    assert json.loads(profile["body"]) == {"method": "POST", "user": 15}
+    assert chain.results[3].url.endswith("/slow?path=/users?from=/login")
+    assert elapsed < 0.95  # the two slow requests overlap
+
+
+def test_dependents_of_a_failed_request_are_not_sent(http_server):
+    flow = "# @name first\nGET http://127.0.0.1:1/down\n###\nGET {{base}}/echo?{{first.response.body.id}}\n"
+    results = run_chain(flow, env={"base": _base_url(http_server)}).results
+    assert results[0].error is not None
+    assert results[1].error == "ValueError: not sent: dependency 'first' failed"
+    assert results[1].status is None
+
+
+def test_cli_run_chain(http_server, tmp_path, capsys):
+    path = tmp_path / "flow.rest"
+    path.write_text(FLOW.replace("/slow", "/fast"))
+    assert main(["run", str(path), "--env", f"base={_base_url(http_server)}", "--chain"]) == 0
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2, 3]
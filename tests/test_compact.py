@@ -0,0 +1,53 @@
+import copy
+import pickle
+
+from pyrestfile import parse_rest_file
+from pyrestfile.compact import StringPool
+from pyrestfile.headers import Headers
+
+SAMPLE = """@token = abc
+### One
+GET https://example.com/users/1
+Accept: application/json
+Authorization: Bearer {{token}}
+
+### Two
+GET https://example.com/users/2
+Accept: application/json
+Authorization: Bearer {{token}}
+
+### Three
+GET https://example.com/users/1
+Accept: application/json
+"""
+
+
+def test_parsed_requests_share_strings_and_headers():
+    one, two, three = parse_rest_file(SAMPLE)
+    assert not hasattr(one, "__dict__")
+    assert one.headers == {"Accept": "application/json", "Authorization": "Bearer abc"}
+    assert one.headers.pairs is two.headers.pairs
+    assert one.url is three.url
+    assert three.headers == {"Accept": "application/json"}
+
+
+def test_shared_headers_are_copied_on_write():
+    one, two, _ = parse_rest_file(SAMPLE)
+    one.headers["Accept"] = "text/plain"
+    del one.headers["Authorization"]
+    assert one.headers == {"Accept": "text/plain"}
+    assert two.headers == {"Accept": "application/json", "Authorization": "Bearer abc"}
+
+
+def test_pool_shares_header_blocks():
+    pool = StringPool()
+    headers = pool.headers({"A": "1", "B": "2"})
+    assert isinstance(headers, Headers)
+    assert headers.pairs is pool.headers([("A", "1"), ("B", "2")]).pairs
+    assert headers.encoded is pool.headers({"A": "1", "B": "2"}).encoded
+
+
+def test_requests_pickle_and_copy():
+    request = parse_rest_file(SAMPLE)[0]
+    assert pickle.loads(pickle.dumps(request)) == request
+    assert copy.copy(request) == request
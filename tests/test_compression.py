@@ -0,0 +1,97 @@
+import gzip
+import json
+import zlib
+
+import pytest
+
+from pyrestfile import ParseStats, compile_rest_file, parse_rest_file, render_many
+from pyrestfile.compression import ENCODINGS, CompressionCache, compress_request
+
+BODY = json.dumps({"items": [{"id": index, "name": "widget"} for index in range(500)]})
+SAMPLE = f"""POST https://example.com/items
+Content-Type: application/json
+
+{BODY}
+
+###
+# @compress deflate
+PUT https://example.com/items/{{{{id}}}}
+Content-Type: application/json
+
+{{"id": "{{{{id}}}}", "payload": "{"x" * 2000}"}}
+
+###
+GET https://example.com/items
+"""
+
+
+def split_wire(wire: bytes) -> tuple[bytes, bytes]:
+    head, _, body = wire.partition(b"\r\n\r\n")
+    return head, body
+
+
+def test_parse_compresses_every_body():
+    stats = ParseStats()
+    post, put, get = parse_rest_file(SAMPLE, env={"id": "7"}, compress="gzip", stats=stats)
+
+    assert post.content_encoding == "gzip" and put.content_encoding == "deflate" and get.content_encoding == ""
+    head, body = split_wire(post.to_wire())
+    assert b"Content-Encoding: gzip\r\n" in head and f"Content-Length: {len(body)}".encode() in head
+    assert gzip.decompress(body).decode() == BODY
+    assert post.to_wire() is post.to_wire()
+    assert json.loads(zlib.decompress(split_wire(put.to_wire())[1]))["id"] == "7"
+    assert b"Content-Encoding" not in get.to_wire()
+
+    assert stats.compressed_bodies == 2
+    assert stats.compression_bytes_in == len(BODY) + len(put.body)
+    assert stats.compression_ratio > 10
+    assert stats.as_dict()["compression_ratio"] == stats.compression_ratio
+
+
+def test_body_changes_are_recompressed():
+    request = parse_rest_file(SAMPLE, env={"id": "7"}, compress="gzip")[0]
+    request.body = '{"changed": true}'
+    assert gzip.decompress(split_wire(request.to_wire())[1]) == b'{"changed": true}'
+
+
+def test_cache_reuses_equal_bodies_and_evicts():
+    cache = CompressionCache()
+    stats = ParseStats()
+    first = parse_rest_file(SAMPLE, env={"id": "1"})[0]
+    second = parse_rest_file(SAMPLE, env={"id": "1"})[0]
+    compress_request(first, "gzip", cache, stats)
+    compress_request(second, "gzip", cache, stats)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert first._compressed[2] is second._compressed[2]
+    assert stats.compression_seconds_saved == cache.seconds_saved > 0
+
+    small = CompressionCache(max_bytes=200)
+    for index in range(20):
+        small.compress(str(index).encode() * 50, "deflate")
+    assert 0 < small.total_bytes <= 200 and small.misses == 20
+
+
+def test_requests_already_encoded_are_left_alone():
+    request = parse_rest_file("POST https://example.com/a\nContent-Encoding: br\n\nxyz", compress="gzip")[0]
+    assert request.content_encoding == ""
+    with pytest.raises(ValueError, match="Unknown content encoding"):
+        parse_rest_file(SAMPLE, env={"id": "1"}, compress="lzma")
+    if "zstd" not in ENCODINGS:
+        with pytest.raises(ValueError, match="zstd"):
+            parse_rest_file(SAMPLE, env={"id": "1"}, compress="zstd")
+
+
+def test_templates_compress_annotated_requests():
+    text = (
+        "# @compress\nPOST https://example.com/a\nContent-Type: application/json\n\n{}\n###\n"
+        + SAMPLE.split("###\n")[1]
+    )
+    static, templated = compile_rest_file(text)
+    assert static.render().content_encoding == "gzip"
+    assert gzip.decompress(split_wire(static.to_wire())[1]) == b"{}"
+
+    wire = templated.to_wire({"id": "9"})
+    assert b"Content-Encoding: deflate\r\n" in wire
+    assert json.loads(zlib.decompress(split_wire(wire)[1]))["id"] == "9"
+    rendered = list(render_many(templated, env_rows=[{"id": "1"}, {"id": "2"}]))
+    assert [json.loads(zlib.decompress(split_wire(r.to_wire())[1]))["id"] for r in rendered] == ["1", "2"]
@@ -0,0 +1,45 @@
+import pytest
+
+from pyrestfile import parse_rest_directory, parse_rest_file
+
+VALID = """### Get {name}
+GET https://api.example.com/{name}
+"""
+
+INVALID = """POST https://api.example.com/broken
+Content-Type: application/json
+
+{"unterminated": 
+"""
+
+
+@pytest.fixture
+def rest_tree(tmp_path):
+    for name in ["users", "orders", "billing/invoices", "billing/refunds"]:
+        path = tmp_path / f"{name}.rest"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(VALID.format(name=name))
+    (tmp_path / "billing" / "broken.rest").write_text(INVALID)
+    (tmp_path / "notes.txt").write_text("not a rest file")
+    return tmp_path
+
+
+def test_serial_parse_collects_errors_in_sorted_order(rest_tree):
+    result = parse_rest_directory(rest_tree, workers=1)
+    assert list(result.requests) == ["billing/invoices.rest", "billing/refunds.rest", "orders.rest", "users.rest"]
+    assert list(result.errors) == ["billing/broken.rest"]
+    assert isinstance(result.errors["billing/broken.rest"], ValueError)
+    assert result.requests["users.rest"] == parse_rest_file(VALID.format(name="users"))
+
+
+def test_process_pool_matches_serial(rest_tree):
+    serial = parse_rest_directory(rest_tree, workers=1)
+    parallel = parse_rest_directory(rest_tree, workers=2, serial_threshold=0)
+    assert parallel.requests == serial.requests
+    assert list(parallel.errors) == list(serial.errors)
+    assert [r.url for r in parallel.all_requests][0] == "https://api.example.com/billing/invoices"
+
+
+def test_custom_pattern(rest_tree):
+    result = parse_rest_directory(rest_tree, pattern="*.rest", workers=1)
+    assert list(result.requests) == ["orders.rest", "users.rest"]
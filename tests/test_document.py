@@ -0,0 +1,183 @@
+import random
+
+import pytest
+
+from pyrestfile import RestDocument, parse_rest_file
+from pyrestfile.vars import VariableCycleError
+
+SAMPLE = """@host = example.com
+@token = abc
+
+### List users
+GET https://{{host}}/users
+Authorization: Bearer {{token}}
+
+### Create user
+POST https://{{host}}/users
+Content-Type: application/json
+
+{"name": "Ada"}
+
+### Health
+GET https://status.example.com/health
+"""
+
+
+def test_requests_match_parse_rest_file():
+    document = RestDocument(SAMPLE, env={"host": "ignored"})
+    assert document.requests == parse_rest_file(SAMPLE, {"host": "ignored"})
+    assert document.text == SAMPLE
+    assert len(document) == len(SAMPLE)
+
+
+def test_block_and_declaration_offsets():
+    document = RestDocument(SAMPLE)
+    blocks = document.blocks
+    assert [block.description for block in blocks] == ["List users", "Create user", "Health"]
+    for block in blocks:
+        assert SAMPLE[block.start : block.end].startswith("### " + block.description)
+        assert SAMPLE.splitlines()[block.start_line] == "### " + block.description
+    assert blocks[-1].end == len(SAMPLE)
+    assert document.block_at(SAMPLE.index("Bearer")) == blocks[0]
+    assert document.block_at(0) is None
+
+    host, token = document.declarations
+    assert (host.name, host.value, host.line) == ("host", "example.com", 0)
+    assert SAMPLE[token.start : token.end] == "@token = abc"
+    assert token.line == 1
+
+
+def test_edit_reuses_untouched_requests():
+    document = RestDocument(SAMPLE)
+    before = document.requests
+
+    position = document.text.index("/users\nAuthorization")
+    document.apply_edit(position, position + len("/users"), "/people")
+    after = document.requests
+    assert after[0].url == "https://example.com/people"
+    assert after[0] is not before[0]
+    assert after[1] is before[1] and after[2] is before[2]
+    assert document.blocks[2].start == SAMPLE.index("### Health") + 1
+
+
+def test_variable_change_invalidates_only_referencing_blocks():
+    document = RestDocument(SAMPLE)
+    before = document.requests
+
+    position = document.text.index("abc")
+    document.apply_edit(position, position + 3, "xyz")
+    after = document.requests
+    assert after[0].headers["Authorization"] == "Bearer xyz"
+    assert after[0] is not before[0]
+    assert after[1] is before[1]
+
+    document.apply_edit(0, len("@host = example.com"), "@host = other.org")
+    assert [request.url for request in document.requests[:2]] == ["https://other.org/users"] * 2
+    assert document.requests[2] is before[2]
+
+
+def test_change_to_a_nested_variable_invalidates_its_dependents():
+    text = "@host = a.org\n@base = https://{{host}}\n### One\nGET {{base}}/one\n### Two\nGET https://b.org/two\n"
+    document = RestDocument(text)
+    before = document.requests
+    document.apply_edit(len("@host = "), len("@host = a.org"), "c.org")
+    after = document.requests
+    assert after[0].url == "https://c.org/one"
+    assert after[1] is before[1]
+
+    document.apply_edit(len("@host = "), len("@host = c.org"), "{{base}}")
+    with pytest.raises(ValueError, match="Variable cycle"):
+        document.requests
+    document.apply_edit(len("@host = "), len("@host = {{base}}"), "d.org")
+    assert document.requests[0].url == "https://d.org/one"
+
+
+def test_edits_that_add_and_remove_delimiters():
+    document = RestDocument(SAMPLE)
+    position = document.text.index("### Create user")
+    document.apply_edit(position, position + 3, "")  # no longer a delimiter: merged into the previous block
+    assert parse_rest_file(document.text) == document.requests
+    assert len(document.requests) == 2
+
+    document.apply_edit(position, position, "###")
+    assert document.text == SAMPLE
+    assert document.requests == parse_rest_file(SAMPLE)
+
+    document.apply_edit(len(document), len(document), "###\nDELETE https://x/1\n")
+    assert document.requests[-1].method == "DELETE"
+
+    document.apply_edit(0, len(document), "")
+    assert document.requests == [] and document.text == ""
+
+
+def test_invalid_blocks_are_reported():
+    document = RestDocument(SAMPLE)
+    position = document.text.index('"Ada"}')
+    document.apply_edit(position, position + 6, '"Ada"')
+    [(block, error)] = document.errors
+    assert block.description == "Create user"
+    with pytest.raises(ValueError):
+        document.requests
+    with pytest.raises(ValueError):
+        RestDocument(document.text, validation="off").requests[1].validate()
+
+    with pytest.raises(ValueError):
+        document.apply_edit(0, len(document) + 1, "")
+
+
+def test_a_cycle_stays_reported_across_unrelated_edits():
+    text = "@a = 1\nX-A: {{a}}\n@a = 1\nPOST http://y/{{b}}\nX-A: {{a}}\n@b = {{a}}/z\nPOST http://y/{{b}}"
+    document = RestDocument(text, env={"a": "E"}, validation="off")
+    for start, end, new_text in [(31, 32, "\n"), (74, 80, "x"), (60, 76, "{{b}}")]:
+        document.apply_edit(start, end, new_text)
+    with pytest.raises(VariableCycleError):
+        document.requests
+
+    document.apply_edit(25, 25, "")
+    with pytest.raises(VariableCycleError):
+        document.requests
+    with pytest.raises(VariableCycleError):
+        parse_rest_file(document.text, env={"a": "E"}, validation="off")
+
+
+def test_a_failed_edit_leaves_the_document_unchanged(monkeypatch):
+    document = RestDocument(SAMPLE)
+    before = document.requests
+
+    def fail(block, validation):
+        raise RuntimeError("boom")
+
+    position = SAMPLE.index("/users")
+    monkeypatch.setattr("pyrestfile.document.unpack_request_block", fail)
+    with pytest.raises(RuntimeError):
+        document.apply_edit(position, position + 6, "/people")
+    monkeypatch.undo()
+    assert document.text == SAMPLE
+    assert document.requests == before
+
+    document.apply_edit(0, len("@host = example.com"), "@host = example.org")
+    assert document.requests[0].url == "https://example.org/users"
+
+
+def test_random_edits_stay_in_sync_with_full_parses():
+    rng = random.Random(1234)
+    fragments = ["###", "### x\n", "\n", "@host = h2\n", "GET ", "/{{host}}", "# c\n", "// @name n\n", "X-A: 1\n", "{}"]
+    document = RestDocument(SAMPLE, validation="off")
+    checked = 0
+    for _ in range(300):
+        text = document.text
+        start = rng.randrange(len(text) + 1)
+        end = min(len(text), start + rng.choice([0, 0, 1, 3, 10]))
+        document.apply_edit(start, end, rng.choice(fragments + [""]))
+        text = document.text
+        try:
+            expected = parse_rest_file(text, validation="off")
+        except AttributeError:
+            continue  # a block without a request line; parse_rest_file cannot handle those either
+        assert document.requests == expected
+        assert all(text[b.start : b.end].lstrip().startswith("###") or b.start == 0 for b in document.blocks)
+        assert [text.split("\n")[d.line] for d in document.declarations] == [
+            text[d.start : d.end] for d in document.declarations
+        ]
+        checked += 1
+    assert checked > 100
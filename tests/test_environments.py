@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from pyrestfile import EnvironmentMatrix, load_environments, parse_rest_file
+
+SAMPLE = """@base = https://{{host}}/v1
+
+### List users
+GET {{base}}/users
+Authorization: Bearer {{token}}
+
+### Create user
+POST {{base}}/users
+Content-Type: application/json
+Accept: application/json
+
+{"tenant": "{{tenant}}"}
+
+### Health
+GET https://status.example.com/health
+"""
+
+ENVIRONMENTS = {
+    "$shared": {"host": "api.example.com", "token": "shared-token"},
+    "dev": {"host": "dev.example.com", "tenant": "dev"},
+    "tenant-a": {"tenant": "a", "token": "{{$shared token}}-a"},
+    "tenant-b": {"tenant": "b", "retries": 3},
+    "tenant-c": {"tenant": "b"},
+}
+
+
+def test_load_environments_merges_shared_variables(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({"rest-client.environmentVariables": ENVIRONMENTS}))
+    environments = load_environments(path)
+    assert list(environments) == ["dev", "tenant-a", "tenant-b", "tenant-c"]
+    assert environments["dev"] == {"host": "dev.example.com", "token": "shared-token", "tenant": "dev"}
+    assert environments["tenant-a"]["token"] == "shared-token-a"
+    assert environments["tenant-b"]["retries"] == "3"
+
+    with pytest.raises(ValueError):
+        load_environments({"dev": "not an object"})
+
+
+def test_every_environment_matches_parse_rest_file():
+    matrix = EnvironmentMatrix(SAMPLE, ENVIRONMENTS)
+    rendered = matrix.render_all(workers=2)
+    assert list(rendered) == matrix.names
+    for name, env in load_environments(ENVIRONMENTS).items():
+        assert rendered[name] == parse_rest_file(SAMPLE, env)
+    assert rendered["tenant-a"][0].headers["Authorization"] == "Bearer shared-token-a"
+
+
+def test_unchanged_requests_and_strings_are_shared():
+    matrix = EnvironmentMatrix(SAMPLE, ENVIRONMENTS)
+    dev, a, b, c = (matrix.render(name) for name in matrix.names)
+    assert c[0] is b[0] and c[1] is b[1]
+    assert matrix.render("dev") is dev
+    assert dev[2] is a[2] is b[2]
+    assert a[0] is not b[0]
+    assert a[0].url is b[0].url
+    assert a[1].url is b[1].url
+    assert a[1].headers.pairs is b[1].headers.pairs is dev[1].headers.pairs
+
+
+def test_items_render_lazily():
+    matrix = EnvironmentMatrix(SAMPLE, ENVIRONMENTS)
+    items = matrix.items()
+    name, requests = next(items)
+    assert name == "dev" and requests[0].url == "https://dev.example.com/v1/users"
+    assert list(matrix._rendered) == ["dev"]
+    with pytest.raises(KeyError):
+        matrix.render("prod")
@@ -0,0 +1,88 @@
+import pickle
+
+import pytest
+
+from pyrestfile import parse_rest_file
+from pyrestfile.headers import Headers
+from pyrestfile.serialization import request_from_record, request_to_record
+from pyrestfile.vars import Renderer
+
+SAMPLE = """POST https://example.com/upload
+content-type: application/json
+Accept: text/plain
+X-Tag: a
+x-tag: b
+
+{"ok": true}
+"""
+
+
+def test_repeated_headers_and_lowercase_content_type():
+    request = parse_rest_file(SAMPLE)[0]
+    assert request.content_type == "application/json"
+    assert request.json_body == {"ok": True}
+    assert "content-type" not in request.headers
+    assert request.headers.pairs == (("Accept", "text/plain"), ("X-Tag", "a"), ("x-tag", "b"))
+    assert len(request.headers) == 2 and list(request.headers.items()) == [("Accept", "text/plain"), ("X-Tag", "b")]
+    assert request.headers["X-TAG"] == "b"
+    assert request.headers.get_all("x-tag") == ["a", "b"]
+    assert b"X-Tag: a\r\nx-tag: b\r\n" in request.to_wire()
+    assert b"Content-Type: application/json\r\n" in request.to_wire()
+
+
+def test_mapping_behaviour():
+    headers = Headers({"Accept": "*/*", "X-Id": "1"})
+    assert headers == {"Accept": "*/*", "X-Id": "1"} and {"X-Id": "1", "Accept": "*/*"} == headers
+    assert "accept" in headers and headers.get("ACCEPT") == "*/*" and headers.get("missing") is None
+    assert dict(headers) == {"Accept": "*/*", "X-Id": "1"}
+
+    headers.add("X-Id", "2")
+    assert len(headers) == 2 and headers["x-id"] == "2"
+    assert list(headers.keys()) == ["Accept", "X-Id"] and list(headers.values()) == ["*/*", "2"]
+    assert headers == {"accept": "*/*", "X-ID": "2"} and headers != {"Accept": "*/*", "X-Id": "1"}
+    assert headers != {"Accept": "*/*", "accept": "*/*"}
+    headers["x-id"] = "3"
+    assert headers.pairs == (("Accept", "*/*"), ("x-id", "3"))
+    del headers["ACCEPT"]
+    assert list(headers) == ["x-id"]
+    with pytest.raises(KeyError):
+        del headers["Accept"]
+    assert pickle.loads(pickle.dumps(headers)) == headers
+    assert repr(headers) == "Headers([('x-id', '3')])"
+
+
+def test_encoding_is_cached_until_a_value_changes():
+    headers = Headers([("Accept", "*/*"), ("Content-Length", "9"), ("X-Id", "1")])
+    encoded = headers.encoded
+    assert encoded == b"Accept: */*\r\nX-Id: 1\r\n"
+    headers["X-Id"] = "1"
+    assert headers.encoded is encoded
+    assert headers.render(lambda value: value + "!") is not headers and headers.render(str) is headers
+
+    copy = headers.copy()
+    copy["X-Id"] = "2"
+    assert headers.encoded is encoded
+    assert copy.encoded == b"Accept: */*\r\nX-Id: 2\r\n"
+
+
+def test_rendering_replaces_only_templated_headers():
+    requests = parse_rest_file(
+        "GET https://example.com/a\nAccept: */*\nX-Id: {{id}}\n###\nGET https://example.com/b\nAccept: */*\n",
+        env={"id": "7"},
+    )
+    assert requests[0].headers == {"Accept": "*/*", "X-Id": "7"}
+    static = requests[1].headers.encoded
+    assert requests[1].to_wire() == requests[1].to_wire()
+    assert requests[1].headers.encoded is static
+
+
+def test_headers_reassigned_to_a_plain_dict():
+    request = parse_rest_file("GET https://a.com/x\nAccept: y\n")[0]
+    request.headers = {"Accept": "z", "X-Id": "{{id}}"}
+    assert request.to_wire() == b"GET /x HTTP/1.1\r\nHost: a.com\r\nAccept: z\r\nX-Id: {{id}}\r\n\r\n"
+
+    Renderer({"id": "7"}).render(request)
+    assert request.headers == {"Accept": "z", "X-Id": "7"}
+
+    request.headers = {"Accept": "z"}
+    assert request_from_record(request_to_record(request)) == request
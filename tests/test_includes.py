@@ -0,0 +1,115 @@
+import json
+import os
+
+import pytest
+
+from pyrestfile import FileBody, IncludeCache, compile_rest_file, iter_wire_chunks, parse_rest_path, run_requests
+from pyrestfile.includes import parse_include
+
+
+@pytest.fixture
+def payloads(tmp_path):
+    (tmp_path / "payloads").mkdir()
+    (tmp_path / "payloads" / "big.json").write_text(json.dumps({"items": list(range(20_000))}))
+    (tmp_path / "payloads" / "user.json").write_text('{"name": "{{name}}", "tenant": "{{tenant}}"}\n')
+    return tmp_path
+
+
+def test_parse_include():
+    assert parse_include("< ./a.json").path == "./a.json"
+    assert parse_include("<@ ./a b.json").render is True
+    assert parse_include("<html></html>") is None
+    assert parse_include("< ./a.json\n{}") is None
+    assert parse_include('{"a": 1}') is None
+
+
+def test_raw_include_is_a_streamed_file_body(payloads):
+    rest = payloads / "api.rest"
+    rest.write_text("POST http://example.com/items\nContent-Type: application/json\n\n< ./payloads/big.json\n")
+
+    request = parse_rest_path(rest)[0]
+    path = payloads / "payloads" / "big.json"
+    assert request.body == ""
+    assert request.body_file == FileBody(str(path))
+    assert request.body_file.content_length == path.stat().st_size
+
+    chunks = list(iter_wire_chunks(request, chunk_size=4096))
+    assert f"Content-Length: {path.stat().st_size}\r\n".encode() in chunks[0]
+    assert all(len(chunk) <= 4096 for chunk in chunks[1:])
+    assert b"".join(chunks[1:]) == path.read_bytes()
+    assert request.to_wire() == b"".join(chunks)
+    assert request.json_body["items"][-1] == 19_999
+
+
+def test_rendered_include_goes_through_the_renderer(payloads):
+    rest = payloads / "api.rest"
+    rest.write_text(
+        "@tenant = acme\n@dir = payloads\n\nPOST http://example.com/users\n"
+        "Content-Type: application/json\n\n<@ ./{{dir}}/user.json\n"
+    )
+    request = parse_rest_path(rest, env={"name": "Ada"})[0]
+    assert request.body_file is None
+    assert request.json_body == {"name": "Ada", "tenant": "acme"}
+
+    (payloads / "payloads" / "user.json").write_text('{"name": {{name}}}')
+    with pytest.raises(ValueError):
+        parse_rest_path(rest, env={"name": "Ada"})
+
+
+def test_missing_include_raises(payloads):
+    rest = payloads / "api.rest"
+    rest.write_text("POST http://example.com/users\n\n<@ ./nope.json\n")
+    with pytest.raises(FileNotFoundError):
+        parse_rest_path(rest)
+
+
+def test_templates_resolve_includes_at_compile_time(payloads):
+    text = "POST http://example.com/users\nContent-Type: application/json\n\n<@ ./payloads/user.json\n"
+    template = compile_rest_file(text, base_dir=payloads)[0]
+    assert json.loads(template.render({"name": "Ada", "tenant": "t"}).body) == {"name": "Ada", "tenant": "t"}
+
+    raw = compile_rest_file("PUT http://example.com/blob\n\n< payloads/big.json\n", base_dir=payloads)[0]
+    assert raw.is_static
+    assert raw.render().body_file.path == os.path.join(str(payloads), "payloads/big.json")
+
+
+def test_include_cache_reuses_and_evicts(tmp_path):
+    files = []
+    for index in range(3):
+        path = tmp_path / f"{index}.txt"
+        path.write_text(str(index) * 100)
+        files.append(str(path))
+    (tmp_path / "huge.txt").write_text("x" * 1000)
+
+    cache = IncludeCache(max_bytes=250)
+    assert cache.read_text(files[0]) == "0" * 100
+    assert cache.read_text(files[0]) == "0" * 100
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.read_text(files[1])
+    cache.read_text(files[0])  # files[1] is now the least recently used
+    cache.read_text(files[2])
+    assert cache.total_bytes == 200
+    cache.read_text(files[0])
+    assert cache.hits == 3
+    cache.read_text(files[1])
+    assert cache.misses == 4
+
+    cache.read_text(str(tmp_path / "huge.txt"))
+    assert cache.total_bytes <= 250
+
+    stat = os.stat(files[1])
+    with open(files[1], "w") as f:
+        f.write("changed")
+    os.utime(files[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert cache.read_text(files[1]) == "changed"
+
+
+def test_runner_streams_file_bodies(http_server, payloads):
+    host, port = http_server.server_address
+    rest = payloads / "api.rest"
+    rest.write_text(f"POST http://{host}:{port}/upload\n\n< ./payloads/big.json\n")
+
+    result = run_requests(parse_rest_path(rest))[0]
+    assert result.status == 200
+    assert result.response_bytes > (payloads / "payloads" / "big.json").stat().st_size
@@ -0,0 +1,80 @@
+import json
+import os
+
+import pytest
+
+from pyrestfile import RestIndex, parse_rest_file
+
+SAMPLE = """@host = example.com
+
+### List users
+# @name listUsers
+GET https://{{host}}/users
+
+### Create user
+# @name createUser
+POST https://{{host}}/users
+Content-Type: application/json
+
+{"name": "{{user}}"}
+
+@user = Ada
+
+###
+GET https://{{host}}/héalth
+"""
+
+
+@pytest.fixture
+def rest_path(tmp_path):
+    path = tmp_path / "api.rest"
+    path.write_text(SAMPLE, encoding="utf-8")
+    return path
+
+
+def test_get_matches_parse_rest_file(rest_path):
+    index = RestIndex(rest_path)
+    expected = parse_rest_file(SAMPLE, {"host": "ignored"})
+    assert index.names == ["listUsers", "createUser"]
+    assert len(index) == 3
+    assert "createUser" in index and "missing" not in index
+    assert index.get("createUser", env={"host": "ignored"}) == expected[1]
+    assert [index.get(ordinal) for ordinal in range(3)] == parse_rest_file(SAMPLE)
+    assert index.variables == {"host": "example.com", "user": "Ada"}
+    with pytest.raises(KeyError):
+        index.get("missing")
+
+
+def test_sidecar_is_reused(rest_path):
+    RestIndex(rest_path)
+    sidecar = f"{rest_path}.idx"
+    data = json.loads(open(sidecar).read())
+    assert [block[2] for block in data["blocks"]] == ["listUsers", "createUser", None]
+    assert data["source"]["size"] == rest_path.stat().st_size
+
+    built_at = os.stat(sidecar).st_mtime_ns
+    assert RestIndex(rest_path).get("listUsers").url == "https://example.com/users"
+    assert os.stat(sidecar).st_mtime_ns == built_at
+
+
+def test_stale_index_is_rebuilt(rest_path):
+    index = RestIndex(rest_path)
+    stat = rest_path.stat()
+
+    os.utime(rest_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert index.refresh() is False  # touched but unchanged: only the recorded mtime is updated
+
+    rest_path.write_text("### Renamed\n# @name createUser\nDELETE https://x/{{id}}\n", encoding="utf-8")
+    assert index.get("createUser", env={"id": "7"}).url == "https://x/7"
+    assert index.names == ["createUser"]
+
+    reopened = RestIndex(rest_path)
+    assert len(reopened) == 1
+
+
+def test_corrupt_sidecar_is_rebuilt(rest_path, tmp_path):
+    sidecar = tmp_path / "custom.idx"
+    sidecar.write_text("not json")
+    index = RestIndex(rest_path, index_path=sidecar)
+    assert index.get("listUsers").method == "GET"
+    assert json.loads(sidecar.read_text())["format"] == 1
@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from pyrestfile import LatencyHistogram, LoadResult, Stage, parse_rest_file, run_load, shard
+from pyrestfile.load import WeightedChooser, arrival_times
+
+
+def test_histogram_percentiles_within_precision():
+    rng = random.Random(7)
+    values = sorted(rng.uniform(0.001, 2.0) for _ in range(10_000))
+    histogram = LatencyHistogram(significant_figures=2)
+    for value in values:
+        histogram.record(value)
+
+    for percentile in (50, 99, 99.9):
+        exact = values[int(len(values) * percentile / 100) - 1]
+        assert histogram.percentile(percentile) == pytest.approx(exact, rel=0.01)
+    assert histogram.total == 10_000
+    assert histogram.max == int(values[-1] * 1_000_000)
+
+
+def test_histograms_merge_exactly():
+    parts = [LatencyHistogram(), LatencyHistogram()]
+    combined = LatencyHistogram()
+    for index in range(1000):
+        latency = (index % 97) / 1000
+        parts[index % 2].record(latency)
+        combined.record(latency)
+
+    merged = LatencyHistogram.from_dict(parts[0].to_dict())
+    merged.merge(parts[1])
+    assert merged.counts == combined.counts
+    assert (merged.min, merged.max, merged.total) == (combined.min, combined.max, combined.total)
+    with pytest.raises(ValueError):
+        merged.merge(LatencyHistogram(significant_figures=3))
+
+
+def test_arrival_times_follow_the_ramp():
+    constant = list(arrival_times([Stage(duration=2, target_rps=10)], start_rps=10))
+    assert len(constant) == 20
+    assert constant[:3] == pytest.approx([0.0, 0.1, 0.2])
+
+    ramp = list(arrival_times([Stage(duration=10, target_rps=10), Stage(duration=5, target_rps=10)]))
+    assert len(ramp) == 50 + 50
+    assert sum(1 for t in ramp if t < 5) == 13
+    assert ramp == sorted(ramp)
+
+
+def test_weighted_chooser_uses_weight_annotations():
+    requests = parse_rest_file(
+        "# @weight 3\nGET http://a/heavy\n###\nGET http://a/light\n###\n# @weight 0\nGET http://a/never\n"
+    )
+    chooser = WeightedChooser(requests, seed=1)
+    picks = [chooser.choose().url for _ in range(4000)]
+    assert picks.count("http://a/never") == 0
+    assert picks.count("http://a/heavy") / picks.count("http://a/light") == pytest.approx(3, rel=0.15)
+
+
+@pytest.mark.parametrize("weight", ["heavy", "nan", "inf", "-1"])
+def test_invalid_weights_name_the_request(weight):
+    requests = parse_rest_file(f"# @name bad\n# @weight {weight}\nGET http://a/\n")
+    with pytest.raises(ValueError, match="@weight on 'bad'"):
+        WeightedChooser(requests)
+    with pytest.raises(ValueError, match="@weight on 'bad'"):
+        shard(requests, 2, "weight")
+
+
+def test_run_load_against_local_server(http_server):
+    host, port = http_server.server_address
+    sample = f"""### a
+# @name listUsers
+GET http://{host}:{port}/users
+### b
+GET http://{host}:{port}/status/500
+### c
+GET http://127.0.0.1:1/unreachable
+"""
+    result = run_load(parse_rest_file(sample), [Stage(duration=0.5, target_rps=60)], start_rps=60, seed=3)
+
+    summary = result.summary()
+    assert sum(row["count"] + row["errors"] for row in summary.values()) == 30
+    assert summary["listUsers"]["count"] > 0
+    assert summary["listUsers"]["p50"] <= summary["listUsers"]["p99.9"] <= summary["listUsers"]["max"]
+    assert summary["c"]["count"] == 0 and summary["c"]["errors"] > 0
+
+    merged = LoadResult.from_dict(result.to_dict())
+    merged.merge(result)
+    assert merged.summary()["listUsers"]["count"] == 2 * summary["listUsers"]["count"]
+    assert "listUsers" in result.format_summary()
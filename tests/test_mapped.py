@@ -0,0 +1,67 @@
+import pytest
+
+from pyrestfile import map_rest_file, parse_rest_file
+
+SAMPLE = """@token = abc123
+# file comment
+GET https://{{host}}/v1/users HTTP/1.1
+Authorization: Bearer {{token}}
+// ends the headers
+# first body line is a comment
+line with trailing spaces   
+
+last line
+###
+
+### Create user
+post https://{{host}}/v1/users
+Content-Type: application/json
+@inner = declared-in-headers
+X-Inner: {{inner}}
+
+{
+  "name": "{{token}}",
+@skipped = 1
+  "tags": []
+}
+   ### Empty body
+DELETE https://{{host}}/v1/users/1\r
+\r
+"""
+
+
+@pytest.fixture
+def rest_path(tmp_path):
+    path = tmp_path / "api.rest"
+    path.write_bytes(SAMPLE.encode())
+    return path
+
+
+def test_mapped_requests_match_parse_rest_file(rest_path):
+    env = {"host": "api.example.com"}
+    expected = parse_rest_file(rest_path.read_text(), env=env)
+    with map_rest_file(rest_path, env=env) as mapped:
+        assert [request.materialize() for request in mapped] == expected
+        assert mapped[1].headers["X-Inner"] == "declared-in-headers"
+        assert mapped[2].body == ""
+
+
+def test_body_bytes_is_a_view_of_static_bodies(rest_path):
+    with map_rest_file(rest_path) as mapped:
+        view = mapped[0].body_bytes
+        assert isinstance(view, memoryview)
+        assert bytes(view) == b"# first body line is a comment\nline with trailing spaces   \n\nlast line"
+        assert mapped[0].body_size == len(view)
+        view.release()
+
+        rendered = mapped[1].body_bytes
+        assert isinstance(rendered, bytes)
+        assert b'"name": "abc123"' in rendered
+        assert b"@skipped" not in rendered
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty.rest"
+    path.write_bytes(b"")
+    with map_rest_file(path) as mapped:
+        assert len(mapped) == 0
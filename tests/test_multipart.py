@@ -0,0 +1,112 @@
+import pytest
+
+from pyrestfile import MultipartBody, compile_rest_file, iter_wire_chunks, parse_rest_file, parse_rest_path
+from pyrestfile.includes import FileBody
+from pyrestfile.multipart import multipart_boundary, parse_multipart
+
+UPLOAD = """@title = Report
+
+POST https://example.com/upload
+Content-Type: multipart/form-data; boundary=XyZ
+
+--XyZ
+Content-Disposition: form-data; name="title"
+
+{{title}}
+--XyZ
+Content-Disposition: form-data; name="meta"
+Content-Type: application/json
+
+<@ ./meta.json
+--XyZ
+Content-Disposition: form-data; name="file"; filename="big.bin"
+Content-Type: application/octet-stream
+
+< ./big.bin
+--XyZ--
+"""
+
+
+@pytest.fixture
+def upload(tmp_path):
+    (tmp_path / "big.bin").write_bytes(bytes(range(256)) * 1000)
+    (tmp_path / "meta.json").write_text('{"title": "{{title}}"}')
+    (tmp_path / "upload.rest").write_text(UPLOAD)
+    return tmp_path
+
+
+def expected_body(tmp_path) -> bytes:
+    return (
+        b"--XyZ\r\n"
+        b'Content-Disposition: form-data; name="title"\r\n\r\n'
+        b"Report\r\n"
+        b"--XyZ\r\n"
+        b'Content-Disposition: form-data; name="meta"\r\nContent-Type: application/json\r\n\r\n'
+        b'{"title": "Report"}\r\n'
+        b"--XyZ\r\n"
+        b'Content-Disposition: form-data; name="file"; filename="big.bin"\r\n'
+        b"Content-Type: application/octet-stream\r\n\r\n" + (tmp_path / "big.bin").read_bytes() + b"\r\n--XyZ--\r\n"
+    )
+
+
+def test_boundary():
+    assert multipart_boundary("multipart/form-data; boundary=abc") == "abc"
+    assert multipart_boundary('multipart/mixed; charset=utf-8; boundary="a b"') == "a b"
+    assert multipart_boundary("application/json; boundary=abc") is None
+    assert multipart_boundary("multipart/form-data") is None
+
+
+def test_file_parts_are_streamed(upload):
+    request = parse_rest_path(upload / "upload.rest")[0]
+    body = request.body_file
+    assert request.body == "" and isinstance(body, MultipartBody)
+    assert [part.name for part in body.parts] == ["title", "meta", "file"]
+    assert body.parts[2].file == FileBody(str(upload / "big.bin"))
+
+    expected = expected_body(upload)
+    assert body.content_length == len(expected)
+    chunks = list(body.iter_chunks(chunk_size=4096))
+    assert all(len(chunk) <= 4096 for chunk in chunks)
+    assert b"".join(chunks) == body.read() == expected
+
+    wire = list(iter_wire_chunks(request, chunk_size=4096))
+    assert f"Content-Length: {len(expected)}\r\n".encode() in wire[0]
+    assert b"".join(wire[1:]) == expected
+    assert request.to_wire() == b"".join(wire)
+
+
+def test_chunked_transfer_encoding(upload):
+    request = parse_rest_path(upload / "upload.rest")[0]
+    wire = list(iter_wire_chunks(request, chunk_size=10_000, chunked=True))
+    assert wire[0].endswith(b"Transfer-Encoding: chunked\r\n\r\n") and b"Content-Length" not in wire[0]
+    assert wire[-1] == b"0\r\n\r\n"
+
+    decoded = b""
+    for size, chunk, end in zip(wire[1:-1:3], wire[2:-1:3], wire[3:-1:3]):
+        assert int(size[:-2], 16) == len(chunk) <= 10_000 and end == b"\r\n"
+        decoded += chunk
+    assert decoded == expected_body(upload)
+
+    plain = parse_rest_file("POST https://example.com/a\nTransfer-Encoding: chunked\n\nhello")[0]
+    assert b"".join(iter_wire_chunks(plain, chunked=True)).endswith(
+        b"Transfer-Encoding: chunked\r\n\r\n5\r\nhello\r\n0\r\n\r\n"
+    )
+
+
+def test_inline_multipart_bodies_stay_text():
+    text = "POST https://example.com/a\nContent-Type: multipart/form-data; boundary=b\n\n--b\n\nx\n--b--"
+    request = parse_rest_file(text)[0]
+    assert request.body_file is None and request.body.startswith("--b")
+
+    multipart = parse_multipart(request.body, "b")
+    assert multipart.read() == b"--b\r\n\r\nx\r\n--b--\r\n"
+
+
+def test_templates_compile_multipart_bodies(upload):
+    template = compile_rest_file(UPLOAD, base_dir=upload)[0]
+    assert template.is_static
+    assert template.render().body_file.read() == expected_body(upload)
+
+    dynamic = UPLOAD.replace("{{title}}\n--XyZ", "{{$uuid}}\n--XyZ")
+    with pytest.raises(ValueError, match="must be known"):
+        compile_rest_file(dynamic, base_dir=upload)
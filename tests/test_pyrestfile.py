@@ -1,10 +1,13 @@
 # tests/test_parser.py
 
+import io
 import json
+import subprocess
+import sys
 import textwrap
 import pytest
 
-from pyrestfile import parse_rest_file, HTTPRequest
+from pyrestfile import iter_rest_file, parse_rest_file, HTTPRequest
 
 
 def _dedent(s: str) -> str:
@@ -118,3 +121,150 @@ def test_rendered_headers_and_url():
     req = parsed[0]
     assert req.url == "https://api.example.com/v1/foo"
     assert req.headers["Authorization"] == "Bearer abc123"
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Streaming Parser
+# ──────────────────────────────────────────────────────────────────────────────
+
+STREAMING_SAMPLES = [
+    _dedent("""
+        │GET https://api.example.com HTTP/1.1
+        │Content-Type: application/json
+        │Authorization: Bearer abc123
+        │
+        │{"key": "value"}
+        │###
+        │POST https://api.example.com/submit HTTP/1.1
+        │Content-Type: application/json
+        │
+        │{"message": "Hello, world!"}
+    """),
+    _dedent("""
+        │# initial comment
+        │// another comment
+        │patch https://api.example.com/baz http/1.1
+        │X-Foo: bar
+    """),
+    _dedent("""
+        │@token = abc123
+        │GET https://{{host}}/v1/foo HTTP/1.1
+        │Authorization: Bearer {{token}}
+        │
+        │
+        │### Second request
+        │POST https://{{host}}/v1/bar
+        │Content-Type: text/plain
+        │
+        │id={{token}}
+    """),
+]
+
+
+@pytest.mark.parametrize("sample", STREAMING_SAMPLES)
+def test_iter_rest_file_matches_parse_rest_file(sample):
+    env = {"host": "api.example.com"}
+    streamed = list(iter_rest_file(sample, env=env))
+    parsed = parse_rest_file(sample, env=env)
+    assert streamed == parsed
+
+
+def test_iter_rest_file_reads_file_objects_lazily():
+    sample = STREAMING_SAMPLES[0] + "###\nGET https://api.example.com/third\n"
+    stream = io.StringIO(sample)
+    requests = iter_rest_file(stream)
+
+    first = next(requests)
+    assert first.url == "https://api.example.com"
+    assert stream.tell() < len(sample)
+    assert [r.url for r in requests] == ["https://api.example.com/submit", "https://api.example.com/third"]
+
+
+def test_iter_rest_file_raises_on_invalid_json():
+    sample = _dedent("""
+        │POST https://api.example.com/submit HTTP/1.1
+        │Content-Type: application/json
+        │
+        │{"message": "Hello, world!"
+    """)
+    with pytest.raises(ValueError):
+        list(iter_rest_file(sample))
+
+
+def test_builtins_are_rendered():
+    sample = _dedent("""
+        │GET https://api.example.com/items/{{$uuid}}?ts={{$timestamp}}
+    """)
+    req = parse_rest_file(sample)[0]
+    item_id, timestamp = req.url.removeprefix("https://api.example.com/items/").split("?ts=")
+    assert len(item_id) == 36
+    assert timestamp.isdigit()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# JSON Validation Modes
+# ──────────────────────────────────────────────────────────────────────────────
+
+INVALID_JSON_SAMPLE = _dedent("""
+    │POST https://api.example.com/submit HTTP/1.1
+    │Content-Type: application/json
+    │
+    │{"message": "Hello, world!"
+""")
+
+
+@pytest.mark.parametrize("validation", ["lazy", "off"])
+def test_deferred_modes_do_not_raise_while_parsing(validation):
+    req = parse_rest_file(INVALID_JSON_SAMPLE, validation=validation)[0]
+    with pytest.raises(ValueError):
+        req.json_body
+
+
+def test_unknown_validation_mode_is_rejected():
+    with pytest.raises(ValueError):
+        parse_rest_file(INVALID_JSON_SAMPLE, validation="sometimes")
+
+
+def test_strict_validation_runs_after_rendering_placeholders():
+    sample = _dedent("""
+        │POST https://api.example.com/users
+        │Content-Type: application/json
+        │
+        │{"id": {{user_id}}, "name": "{{name}}"}
+    """)
+    req = parse_rest_file(sample, env={"user_id": "42", "name": "jane"})[0]
+    assert req.json_body == {"id": 42, "name": "jane"}
+    with pytest.raises(ValueError):
+        parse_rest_file(sample, env={"name": "jane"})
+
+
+def test_decoded_json_is_kept_on_the_request():
+    sample = _dedent("""
+        │POST https://api.example.com/users
+        │Content-Type: application/json
+        │
+        │{
+        │  "name": "jane",
+        │  "tags": ["a", "é"]
+        │}
+    """)
+    req = parse_rest_file(sample)[0]
+    assert req.json_body is req.json_body
+    assert req.json_bytes == '{"name":"jane","tags":["a","é"]}'.encode()
+
+    req.body = '{"name": "john"}'
+    assert req.json_body == {"name": "john"}
+
+
+def test_network_modules_are_imported_on_first_use():
+    code = (
+        "import sys, pyrestfile\n"
+        "heavy = ['asyncio', 'ssl', 'threading', 'multiprocessing', 'concurrent.futures', 'pyrestfile.runner']\n"
+        "assert not [name for name in heavy if name in sys.modules], sys.modules.keys() & set(heavy)\n"
+        "from pyrestfile import ShardFile, shard, write_shards\n"
+        "assert 'asyncio' not in sys.modules and 'pyrestfile.load' not in sys.modules\n"
+        "from pyrestfile import run_requests, serve\n"
+        "assert 'pyrestfile.runner' in sys.modules and 'pyrestfile.server' in sys.modules\n"
+        "assert all(hasattr(pyrestfile, name) for name in pyrestfile.__all__)\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
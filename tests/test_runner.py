@@ -0,0 +1,56 @@
+import json
+
+from pyrestfile import parse_rest_file, run_requests
+from pyrestfile.cli import main
+
+
+def _base_url(server):
+    host, port = server.server_address
+    return f"http://{host}:{port}"
+
+
+def test_run_requests_reuses_connections(http_server):
+    sample = """### Create
+POST {{base}}/users
+Content-Type: application/json
+
+{"name": "jane"}
+### Chunked
+GET {{base}}/chunked
+### Missing
+GET {{base}}/status/404
+"""
+    requests = parse_rest_file(sample, env={"base": _base_url(http_server)}) * 10
+    results = run_requests(requests, concurrency=2)
+
+    assert [result.index for result in results] == list(range(30))
+    assert [result.status for result in results[:3]] == [200, 200, 404]
+    assert all(result.error is None and result.response_bytes > 0 for result in results)
+    assert http_server.connections <= 4
+
+
+def test_run_requests_reports_timeouts_and_connection_errors(http_server):
+    sample = """GET {{base}}/slow
+###
+GET http://127.0.0.1:1/unreachable
+"""
+    requests = parse_rest_file(sample, env={"base": _base_url(http_server)})
+    streamed = []
+    results = run_requests(requests, timeout=0.1, on_result=streamed.append)
+
+    assert results[0].error.startswith("timed out")
+    assert results[1].error is not None
+    assert sorted(result.index for result in streamed) == [0, 1]
+
+
+def test_cli_run_prints_json_lines(http_server, tmp_path, capsys):
+    path = tmp_path / "api.rest"
+    path.write_text("GET {{base}}/users\n###\nDELETE {{base}}/users/1\n")
+
+    exit_code = main(["run", str(path), "--env", f"base={_base_url(http_server)}", "--repeat", "2"])
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert exit_code == 0
+    assert sorted(line["index"] for line in lines) == [0, 1, 2, 3]
+    assert {line["method"] for line in lines} == {"GET", "DELETE"}
+    assert all(line["status"] == 200 for line in lines)
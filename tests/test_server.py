@@ -0,0 +1,183 @@
+import asyncio
+import json
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from pyrestfile import RouteIndex, parse_rest_file, run_requests
+from pyrestfile.server import StubProtocol, StubResponse, parse_response_annotation, route_path, start_stub_server
+
+API = """@base = http://localhost:8080/v1
+
+### List users
+# @name listUsers
+# @response 200 [{"id": 1}]
+GET {{base}}/users?page=1
+
+### One user
+# @response 200 < ./user.json
+GET {{base}}/users/{{id}}
+
+### Me
+# @response 200 {"id": "me"}
+GET {{base}}/users/me
+
+### Create
+# @response 201 created
+POST {{origin}}/v1/users/{{$uuid}}
+Content-Type: application/json
+
+{"name": "{{name}}"}
+
+### Delete
+DELETE /v1/users/{{id}}
+"""
+
+
+@pytest.fixture
+def routes(tmp_path):
+    (tmp_path / "user.json").write_text('{"id": 7}')
+    return RouteIndex.from_text(API, base_dir=tmp_path)
+
+
+@pytest.fixture
+def stub(routes):
+    """Runs the stub server on a background event loop and yields its port."""
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(start_stub_server(routes, port=0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield server.sockets[0].getsockname()[1]
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    server.close()
+    loop.close()
+
+
+def test_route_paths():
+    assert route_path("https://{{host}}/v1/users/{{id}}?x=1", {}) == "/v1/users/\x00"
+    assert route_path("{{base}}/users", {}) == "/users"
+    assert route_path("{{base}}/users", {"base": "http://h:1/api"}) == "/api/users"
+    assert route_path("/orders/{{id}}-{{rev}}", {}) == "/orders/\x00-\x00"
+
+
+def test_route_index_matches_literals_before_wildcards(routes):
+    assert [route.path for route in routes.routes][:3] == ["/v1/users", "/v1/users/\x00", "/v1/users/me"]
+    assert routes.match(b"GET", b"/v1/users?page=2").name == "listUsers"
+    assert routes.match(b"GET", b"/v1/users/42").response.body == b'{"id": 7}'
+    assert routes.match(b"GET", b"/v1/users/me").response.body == b'{"id": "me"}'
+    assert routes.match(b"GET", b"http://localhost/v1/users/me").response.body == b'{"id": "me"}'
+    assert routes.match(b"POST", b"/v1/users/abc").response.status == 201
+    assert routes.match(b"GET", b"/v1/users/42/orders") is None
+    assert routes.match(b"PUT", b"/v1/users") is None
+
+
+def test_response_annotations(tmp_path):
+    assert parse_response_annotation(None) == StubResponse()
+    assert parse_response_annotation("204") == StubResponse(204)
+    assert parse_response_annotation("200 ok").content_type.startswith("text/plain")
+    (tmp_path / "a.json").write_text("[]")
+    assert parse_response_annotation("200 < a.json", str(tmp_path)) == StubResponse(200, b"[]", "application/json")
+    with pytest.raises(ValueError):
+        parse_response_annotation("ok")
+
+
+def test_serves_parsed_requests_over_keep_alive(stub):
+    base = f"http://127.0.0.1:{stub}"
+    requests = parse_rest_file(API.replace("http://localhost:8080", base), env={"id": "3", "origin": base})
+    requests += parse_rest_file(f"GET {base}/missing")
+    results = run_requests(requests * 5, concurrency=2)
+    assert [result.status for result in results[:6]] == [200, 200, 200, 201, None, 404]
+    assert "Cannot determine where to send" in results[4].error
+    assert all(result.error is None for index, result in enumerate(results) if index % 6 != 4)
+
+
+def _exchange(port: int, payload: bytes) -> bytes:
+    with socket.create_connection(("127.0.0.1", port)) as connection:
+        connection.sendall(payload)
+        connection.shutdown(socket.SHUT_WR)
+        received = b""
+        while chunk := connection.recv(65536):
+            received += chunk
+    return received
+
+
+def test_pipelined_requests_with_bodies(stub):
+    body = b"x" * 300_000
+    payload = (
+        b"GET /v1/users/me HTTP/1.1\r\nHost: a\r\n\r\n"
+        b"POST /v1/users/1 HTTP/1.1\r\nHost: a\r\nContent-Length: %d\r\n\r\n%s"
+        b"POST /v1/users/2 HTTP/1.1\r\nHost: a\r\nTransfer-Encoding: chunked\r\n\r\n3\r\nabc\r\n0\r\n\r\n"
+        b"HEAD /v1/users HTTP/1.1\r\nHost: a\r\n\r\n"
+        b"GET /nowhere HTTP/1.1\r\nHost: a\r\nConnection: close\r\n\r\n"
+        b"GET /v1/users HTTP/1.1\r\nHost: a\r\n\r\n" % (len(body), body)
+    )
+    received = _exchange(stub, payload)
+    assert re.findall(rb"HTTP/1\.1 (\d{3}) ", received) == [b"200", b"201", b"201", b"200", b"404"]
+    assert received.endswith(b'Connection: close\r\n\r\n{"error": "no route"}')
+    assert b'\r\n\r\n[{"id": 1}]' not in received
+
+
+class _Transport:
+    def __init__(self):
+        self.written = b""
+        self.closed = False
+
+    def write(self, data):
+        self.written += data
+
+    def close(self):
+        self.closed = True
+
+
+def test_chunked_bodies_are_discarded_as_they_arrive(routes):
+    protocol = StubProtocol(routes)
+    protocol.connection_made(_Transport())
+    protocol.data_received(b"POST /v1/users/1 HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n")
+    chunk = b"%x\r\n%s\r\n" % (5000, b"x" * 5000)
+    for _ in range(200):
+        for start in range(0, len(chunk), 1500):
+            protocol.data_received(chunk[start : start + 1500])
+            assert len(protocol._buffer) < 1500
+    protocol.data_received(b"0\r\nX-Trailer: 1\r\n")
+    protocol.data_received(b"\r\nGET /v1/users/me HTTP/1.1\r\n\r\n")
+    assert re.findall(rb"HTTP/1\.1 (\d{3}) ", protocol.transport.written) == [b"201", b"200"]
+    assert not protocol._buffer and not protocol.transport.closed
+
+    protocol.data_received(b"POST /v1/users/1 HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\n")
+    assert protocol.transport.closed
+    assert b"400 Bad Request" in protocol.transport.written
+
+
+def test_malformed_request_closes_the_connection(stub):
+    assert _exchange(stub, b"garbage\r\n\r\n").startswith(b"HTTP/1.1 400 Bad Request\r\n")
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="needs SO_REUSEPORT")
+def test_cli_serves_with_several_workers(tmp_path):
+    (tmp_path / "user.json").write_text('{"id": 7}')
+    (tmp_path / "api.rest").write_text(API)
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    command = [sys.executable, "-m", "pyrestfile.cli", "serve", str(tmp_path / "api.rest"), "-p", str(port), "-w", "2"]
+    process = subprocess.Popen(command, stderr=subprocess.PIPE)
+    try:
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                received = _exchange(port, b"GET /v1/users/9 HTTP/1.1\r\nHost: a\r\nConnection: close\r\n\r\n")
+                break
+            except ConnectionRefusedError:
+                assert time.monotonic() < deadline and process.poll() is None
+                time.sleep(0.1)
+        assert received.startswith(b"HTTP/1.1 200 OK\r\n") and json.loads(received.split(b"\r\n\r\n")[1]) == {"id": 7}
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    assert b"Serving 5 routes" in process.stderr.read()
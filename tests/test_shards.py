@@ -0,0 +1,81 @@
+import pytest
+
+from pyrestfile import ShardFile, parse_rest_file, shard, write_shards
+from pyrestfile.cli import main
+from pyrestfile.shards import shard_assignments
+
+
+def _requests(count=20):
+    blocks = []
+    for index in range(count):
+        weight = f"# @weight {1 + index % 5}\n" if index % 2 else ""
+        blocks.append(f"### Request {index}\n# @name r{index % 7}\n{weight}GET https://example.com/{index}\n")
+    return parse_rest_file("".join(blocks))
+
+
+def test_round_robin_keeps_file_order():
+    requests = _requests(10)
+    shards = shard(requests, 3)
+    assert [len(s) for s in shards] == [4, 3, 3]
+    assert shards[1] == [requests[1], requests[4], requests[7]]
+    assert shard_assignments(requests, 3, seed=1)[:3] == [1, 2, 0]
+
+
+def test_hash_groups_requests_by_name():
+    requests = _requests()
+    assignments = shard_assignments(requests, 4, "hash", seed=3)
+    by_name = {}
+    for request, number in zip(requests, assignments):
+        assert by_name.setdefault(request.name, number) == number
+    assert assignments == shard_assignments(requests, 4, "hash", seed=3)
+
+
+def test_weight_strategy_balances_total_weight():
+    requests = _requests()
+    shards = shard(requests, 3, "weight", seed=7)
+    totals = [sum(float(r.annotations.get("weight") or 1) for r in s) for s in shards]
+    assert max(totals) - min(totals) <= 1
+    assert shards == shard(requests, 3, "weight", seed=7)
+
+    with pytest.raises(ValueError, match="Unknown shard strategy"):
+        shard(requests, 3, "random")
+    with pytest.raises(ValueError):
+        shard(requests, 0)
+
+
+def test_shard_files_round_trip_and_are_reproducible(tmp_path):
+    requests = _requests()
+    paths = write_shards(requests, tmp_path / "a", 4, "hash", seed=5)
+    again = write_shards(requests, tmp_path / "b", 4, "hash", seed=5)
+    assert [open(p, "rb").read() for p in paths] == [open(p, "rb").read() for p in again]
+
+    expected = shard(requests, 4, "hash", seed=5)
+    for number, path in enumerate(paths):
+        with ShardFile(path) as shard_file:
+            assert shard_file.header["shard"] == number and shard_file.header["strategy"] == "hash"
+            assert list(shard_file) == expected[number]
+            if expected[number]:
+                assert shard_file[-1] == expected[number][-1]
+                assert shard_file[-1].annotations == expected[number][-1].annotations
+
+    (tmp_path / "bogus.shard").write_bytes(b"not a shard")
+    with pytest.raises(ValueError, match="not a shard file"):
+        ShardFile(tmp_path / "bogus.shard")
+
+
+def test_shard_files_keep_the_content_encoding(tmp_path):
+    requests = parse_rest_file("POST https://example.com/\nContent-Type: text/plain\n\n" + "x" * 500, compress="gzip")
+    [path] = write_shards(requests, tmp_path, 1)
+    with ShardFile(path) as shard_file:
+        [request] = list(shard_file)
+    assert request.content_encoding == "gzip"
+    assert request.to_wire() == requests[0].to_wire()
+
+
+def test_cli_shard(tmp_path, capsys):
+    source = tmp_path / "api.rest"
+    source.write_text("GET https://{{host}}/a\n###\nGET https://{{host}}/b\n###\nGET https://{{host}}/c\n")
+    assert main(["shard", str(source), "-n", "2", "-e", "host=h", "-o", str(tmp_path / "out")]) == 0
+    paths = capsys.readouterr().out.split()
+    with ShardFile(paths[1]) as shard_file:
+        assert [request.url for request in shard_file] == ["https://h/b"]
@@ -0,0 +1,81 @@
+import json
+
+from pyrestfile import ParseStats, parse_rest_file, parse_rest_path
+from pyrestfile.vars import Renderer
+
+SAMPLE = """@tenant = acme
+
+### Create user
+# @name createUser
+POST https://{{host}}/v1/{{tenant}}/users
+Content-Type: application/json
+
+{"id": "{{$uuid}}", "tenant": "{{tenant}}", "missing": "{{nope}}"}
+
+### List users
+GET https://{{host}}/v1/{{tenant}}/users
+"""
+
+
+def test_stats_do_not_change_the_result():
+    sample = SAMPLE.replace("{{$uuid}}", "fixed")
+    for validation in ("strict", "lazy", "off"):
+        expected = parse_rest_file(sample, {"host": "h"}, validation=validation)
+        assert parse_rest_file(sample, {"host": "h"}, validation=validation, stats=ParseStats()) == expected
+
+
+def test_stats_record_phases_counts_and_substitutions():
+    stats = ParseStats()
+    parse_rest_file(SAMPLE, {"host": "h"}, stats=stats)
+
+    assert set(stats.phase_seconds) == {"vars", "split", "parse", "unpack", "render", "validate"}
+    assert all(seconds >= 0 for seconds in stats.phase_seconds.values())
+    assert stats.files == 1
+    assert stats.blocks == 2
+    assert stats.bytes_processed == len(SAMPLE.encode("utf-8"))
+    assert stats.substitutions == 5
+    assert stats.unresolved_placeholders == 1
+    assert stats.builtin_calls == {"$uuid": 1}
+
+    slowest = stats.slowest_blocks
+    assert {(block["index"], block["description"]) for block in slowest} == {(0, "Create user"), (1, "List users")}
+    assert slowest[0]["seconds"] >= slowest[1]["seconds"]
+    json.dumps(stats.as_dict())
+
+
+def test_slowest_blocks_are_bounded():
+    text = "\n".join(f"### r{index}\nGET http://a/{index}\n" for index in range(50))
+    stats = ParseStats(slowest_blocks=3)
+    parse_rest_file(text, stats=stats)
+    assert stats.blocks == 50
+    assert len(stats.slowest_blocks) == 3
+    seconds = [block["seconds"] for block in stats.slowest_blocks]
+    assert seconds == sorted(seconds, reverse=True)
+
+
+def test_renderer_counts_only_when_instrumented():
+    plain = Renderer({"a": "1"})
+    assert "_substitute" not in vars(plain)
+
+    stats = ParseStats()
+    counted = Renderer({"a": "1"}, stats)
+    assert counted.render_string("{{a}} {{a}} {{$timestamp}} {{b}}").startswith("1 1 ")
+    assert (stats.substitutions, stats.unresolved_placeholders, stats.builtin_calls) == (2, 1, {"$timestamp": 1})
+
+
+def test_parse_rest_path_times_the_cache(tmp_path):
+    path = tmp_path / "api.rest"
+    path.write_text(SAMPLE)
+    cache_dir = tmp_path / "cache"
+
+    first = ParseStats()
+    parse_rest_path(path, env={"host": "h"}, cache_dir=cache_dir, stats=first)
+    assert {"cache", "parse", "render"} <= set(first.phase_seconds)
+    assert first.slowest_blocks[0]["source"] == str(path)
+
+    second = ParseStats()
+    requests = parse_rest_path(path, env={"host": "h"}, cache_dir=cache_dir, stats=second)
+    assert "parse" not in second.phase_seconds
+    assert {"cache", "render"} <= set(second.phase_seconds)
+    assert second.blocks == 2 and second.bytes_processed == path.stat().st_size
+    assert requests[1].url == "https://h/v1/acme/users"
@@ -0,0 +1,76 @@
+import pickle
+import textwrap
+
+import pytest
+
+from pyrestfile import compile_rest_file, parse_rest_file
+from pyrestfile.templates import TemplateString, compile_string
+
+SAMPLE = textwrap.dedent("""\
+    @token = abc123
+    ### Create
+    POST https://{{host}}/v1/users HTTP/1.1
+    Content-Type: text/plain
+    Authorization: Bearer {{token}}
+    X-Request-Id: {{$uuid}}
+
+    user={{ user }}&missing={{missing}}
+    ### Static
+    GET https://api.example.com/v1/users HTTP/1.1
+    Authorization: Bearer {{token}}
+""")
+
+
+def test_compile_string_inlines_known_variables():
+    compiled = compile_string("{{a}}/{{b}}/{{c}}", {"a": "1", "c": "3"})
+    assert isinstance(compiled, TemplateString)
+    assert compiled.literals == ("1/", "/3")
+    assert [p.name for p in compiled.placeholders] == ["b"]
+    assert compile_string("{{a}}-{{c}}", {"a": "1", "c": "3"}) == "1-3"
+
+
+def test_render_matches_parse_rest_file():
+    env = {"host": "api.example.com", "user": "jane"}
+    templates = compile_rest_file(SAMPLE)
+    parsed = parse_rest_file(SAMPLE, env=env)
+    rendered = [template.render(env) for template in templates]
+
+    for request in rendered + parsed:
+        assert len(request.headers.pop("X-Request-Id", "x" * 36)) == 36
+    assert rendered == parsed
+    assert rendered[0].body == "user=jane&missing={{missing}}"
+
+
+def test_render_does_not_mutate_the_template():
+    template = compile_rest_file(SAMPLE)[0]
+    first = template.render({"host": "a.example.com", "user": "a"})
+    second = template.render({"host": "b.example.com", "user": "b"})
+    assert first.url == "https://a.example.com/v1/users"
+    assert second.url == "https://b.example.com/v1/users"
+    assert first.headers["X-Request-Id"] != second.headers["X-Request-Id"]
+
+
+def test_rendered_requests_own_their_annotations():
+    template = compile_rest_file("# @name create\nPOST https://{{host}}/users\n")[0]
+    first = template.render({"host": "a"})
+    first.annotations["name"] = "changed"
+    assert template.annotations == {"name": "create"}
+    with pytest.raises(TypeError):
+        template.annotations["name"] = "changed"
+    assert pickle.loads(pickle.dumps(template)) == template
+    assert template.render({"host": "b"}).annotations == {"name": "create"}
+
+
+def test_static_template_returns_shared_request():
+    template = compile_rest_file(SAMPLE)[1]
+    assert template.is_static
+    assert template.render() is template.render({"host": "ignored"})
+    assert template.render().headers == {"Authorization": "Bearer abc123"}
+
+
+def test_nested_variables_are_inlined_and_leave_render_time_placeholders():
+    text = "@base = https://{{host}}/v1\n@users = {{base}}/users\nGET {{users}}?id={{$uuid}}\n"
+    template = compile_rest_file(text)[0]
+    assert template.url.literals == ("https://", "/v1/users?id=", "")
+    assert [p.name for p in template.url.placeholders] == ["host", "$uuid"]
+    assert template.render({"host": "h"}).url.startswith("https://h/v1/users?id=")
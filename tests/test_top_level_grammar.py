@@ -1,4 +1,4 @@
-from pyrestfile.top_level_grammar import parse_rest_file_text
+from pyrestfile.top_level_grammar import iter_request_blocks, parse_rest_file_text
 
 
 def test_empty_text():
@@ -112,3 +112,44 @@ Content-Type: application/json
     assert block.request_line == "GET http://example.com/path HTTP/1.1"
     assert block.headers == "Content-Type: application/json"
     assert block.body == '{"data": "sample"}'
+
+
+def test_iter_request_blocks_matches_parse_rest_file_text():
+    text = """# leading comment
+GET http://example.com/resource HTTP/1.1
+User-Agent: TestClient
+
+{
+  "query": "value"
+}
+
+###
+
+### POST Request to create resource
+POST http://example.com/resource HTTP/1.1
+Content-Type: application/x-www-form-urlencoded
+// trailing comment ends the headers
+
+param1=foo&param2=bar   
+   ### DELETE Request
+DELETE http://example.com/resource/123 HTTP/1.1
+"""
+    streamed = list(iter_request_blocks(text.splitlines(keepends=True)))
+    assert streamed == parse_rest_file_text(text)
+    assert len(streamed) == 3
+    assert streamed[1].description == "POST Request to create resource"
+    assert streamed[1].body == "param1=foo&param2=bar"
+
+
+def test_annotations_before_the_request_line():
+    text = """### Create user
+# @name createUser
+// @weight 5
+# @no-redirect
+# plain comment
+POST http://example.com/users
+# @ignored inside headers
+"""
+    block = parse_rest_file_text(text)[0]
+    assert block.annotations == {"name": "createUser", "weight": "5", "no-redirect": ""}
+    assert block.request_line == "POST http://example.com/users"
@@ -0,0 +1,68 @@
+import pytest
+
+from pyrestfile import iter_rest_file, parse_rest_file
+from pyrestfile.vars import Renderer, VariableCycleError, dynamic_variables, resolve_variables
+
+NESTED = """@host = api.example.com
+@base = https://{{host}}/v1
+@users = {{base}}/users
+@trace = {{base}}/{{$uuid}}
+
+### List users
+GET {{users}}?page={{page}}
+X-Trace: {{trace}}
+"""
+
+
+def test_resolve_variables_expands_nested_references():
+    resolved = resolve_variables({"users": "{{base}}/users", "base": "https://{{host}}", "host": "h", "x": "{{y}}"})
+    assert resolved == {"users": "https://h/users", "base": "https://h", "host": "h", "x": "{{y}}"}
+
+
+def test_cycles_are_reported_with_the_chain():
+    with pytest.raises(VariableCycleError) as excinfo:
+        resolve_variables({"a": "{{b}}", "b": "x{{c}}", "c": "{{a}}", "d": "1"})
+    assert excinfo.value.chain == ["a", "b", "c", "a"]
+    assert "a -> b -> c -> a" in str(excinfo.value)
+
+    with pytest.raises(ValueError, match="self -> self"):
+        parse_rest_file("@self = {{self}}\nGET https://example.com/{{self}}\n")
+
+
+def test_only_variables_with_builtins_are_dynamic():
+    resolved = resolve_variables({"base": "https://h", "trace": "{{base}}/{{$uuid}}", "x": "{{y}}"})
+    assert dynamic_variables(resolved) == {"trace"}
+
+    renderer = Renderer({"base": "https://h", "trace": "{{base}}/{{$uuid}}"})
+    first, second = renderer.render_string("{{trace}}"), renderer.render_string("{{trace}}")
+    assert first.startswith("https://h/") and len(first) == len("https://h/") + 36
+    assert first != second
+
+
+def test_parsers_render_nested_variables():
+    env = {"page": "2"}
+    for request in (parse_rest_file(NESTED, env)[0], next(iter_rest_file(NESTED, env))):
+        assert request.url == "https://api.example.com/v1/users?page=2"
+        assert request.headers["X-Trace"].startswith("https://api.example.com/v1/")
+
+
+def test_renderer_refresh_picks_up_new_declarations():
+    variables = {"host": "a"}
+    renderer = Renderer(variables)
+    variables["base"] = "https://{{host}}"
+    assert renderer.render_string("{{base}}") == "{{base}}"
+    assert renderer.refresh() and not renderer.refresh()
+    assert renderer.render_string("{{base}}") == "https://a"
+
+
+def test_renderer_refresh_retries_after_a_cycle():
+    variables = {"a": "1"}
+    renderer = Renderer(variables)
+    variables["a"] = "{{a}}"
+    with pytest.raises(VariableCycleError):
+        renderer.refresh()
+    with pytest.raises(VariableCycleError):
+        renderer.refresh()
+    variables["a"] = "2"
+    assert renderer.refresh()
+    assert renderer.render_string("{{a}}") == "2"
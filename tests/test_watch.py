@@ -0,0 +1,104 @@
+import os
+import time
+
+import pytest
+
+from pyrestfile import RestFileWatcher
+
+FIRST = "### a\nGET http://example.com/a\n"
+SECOND = "### a\nGET http://example.com/a2\n###\nGET http://example.com/b\n"
+BROKEN = "POST http://example.com/a\nContent-Type: application/json\n\n{oops\n"
+
+
+def write(path, text):
+    """Writes `text` and moves the mtime forward, so the change is seen even on coarse clocks."""
+    stat = path.stat() if path.exists() else None
+    path.write_text(text)
+    if stat is not None:
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+@pytest.fixture
+def rest_files(tmp_path):
+    paths = [tmp_path / "one.rest", tmp_path / "two.rest"]
+    write(paths[0], FIRST)
+    write(paths[1], "DELETE http://example.com/z\n")
+    return paths
+
+
+def test_initial_load_and_reload(rest_files):
+    reloads = []
+    watcher = RestFileWatcher(rest_files, on_reload=reloads.append)
+    first = watcher.current
+    assert [request.url for request in watcher.requests] == ["http://example.com/a", "http://example.com/z"]
+    assert first.version == 1 and not first.errors
+
+    assert watcher.poll() is False
+    write(rest_files[0], SECOND)
+    assert watcher.poll() is True
+    assert [request.url for request in watcher.requests] == [
+        "http://example.com/a2",
+        "http://example.com/b",
+        "http://example.com/z",
+    ]
+    assert watcher.current.by_file[str(rest_files[1])] == first.by_file[str(rest_files[1])]
+    assert [snapshot.version for snapshot in reloads] == [1, 2]
+    assert len(first.requests) == 2  # old snapshots are never mutated
+
+
+def test_noop_save_does_not_reparse(rest_files):
+    watcher = RestFileWatcher(rest_files)
+    snapshot = watcher.current
+    write(rest_files[0], FIRST)
+    assert watcher.poll() is False
+    assert watcher.current is snapshot
+
+
+def test_parse_errors_keep_the_previous_requests(rest_files):
+    errors = []
+    watcher = RestFileWatcher(rest_files, on_error=lambda path, error: errors.append((path, error)))
+    good_requests = watcher.requests
+
+    write(rest_files[0], BROKEN)
+    assert watcher.poll() is True
+    assert watcher.requests == good_requests
+    assert isinstance(watcher.current.errors[str(rest_files[0])], ValueError)
+    assert [path for path, _ in errors] == [str(rest_files[0])]
+    assert watcher.poll() is False
+    assert len(errors) == 1
+
+    rest_files[1].unlink()
+    assert watcher.poll() is True
+    assert isinstance(watcher.current.errors[str(rest_files[1])], FileNotFoundError)
+    assert watcher.requests == good_requests
+
+    write(rest_files[0], SECOND)
+    write(rest_files[1], "DELETE http://example.com/z\n")
+    assert watcher.poll() is True
+    assert not watcher.current.errors
+    assert len(watcher.requests) == 3
+
+
+def test_any_parse_failure_is_reported_and_recovered_from(rest_files):
+    errors = []
+    with RestFileWatcher(rest_files, interval=0.01, on_error=lambda path, error: errors.append(error)) as watcher:
+        write(rest_files[0], "GET http://example.com/x\n###\n# TODO next request\n")
+        deadline = time.monotonic() + 5
+        while not errors and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert errors and not isinstance(errors[0], ValueError)
+        assert str(rest_files[0]) in watcher.current.errors
+
+        write(rest_files[0], SECOND)
+        while len(watcher.requests) != 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(watcher.requests) == 3 and not watcher.current.errors
+
+
+def test_background_polling(rest_files):
+    with RestFileWatcher(rest_files, interval=0.01) as watcher:
+        write(rest_files[0], SECOND)
+        deadline = time.monotonic() + 5
+        while watcher.current.version < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(watcher.requests) == 3
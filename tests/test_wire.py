@@ -0,0 +1,86 @@
+import pytest
+
+from pyrestfile import HTTPRequest, compile_rest_file, iter_wire_chunks, map_rest_file, parse_rest_file
+
+SAMPLE = """### Create
+POST https://{{host}}/v1/users?notify=1 HTTP/1.1
+Content-Type: application/json
+Authorization: Bearer {{token}}
+Content-Length: 999
+
+{"name": "{{name}}"}
+### List
+GET https://api.example.com/v1/users
+Accept: */*
+### Static host, templated path
+DELETE https://api.example.com/v1/users/{{id}}
+"""
+
+ENV = {"host": "api.example.com", "token": "abc", "name": "jané", "id": "7"}
+
+
+def test_to_wire_derives_host_and_content_length():
+    request = parse_rest_file(SAMPLE, env=ENV)[0]
+    body = '{"name": "jané"}'.encode()
+    assert (
+        request.to_wire()
+        == (
+            b"POST /v1/users?notify=1 HTTP/1.1\r\n"
+            b"Host: api.example.com\r\n"
+            b"Authorization: Bearer abc\r\n"
+            b"Content-Type: application/json\r\n"
+            b"Content-Length: %d\r\n\r\n" % len(body)
+        )
+        + body
+    )
+
+
+def test_to_wire_without_body_or_version():
+    request = parse_rest_file(SAMPLE, env=ENV)[1]
+    assert request.to_wire() == b"GET /v1/users HTTP/1.1\r\nHost: api.example.com\r\nAccept: */*\r\n\r\n"
+
+
+def test_to_wire_is_cached_until_the_request_changes():
+    request = parse_rest_file(SAMPLE, env=ENV)[1]
+    assert request.to_wire() is request.to_wire()
+    request.headers["Accept"] = "application/json"
+    assert b"Accept: application/json" in request.to_wire()
+
+
+def test_relative_url_needs_host_header():
+    request = HTTPRequest(description="", method="GET", url="/health")
+    with pytest.raises(ValueError):
+        request.to_wire()
+    request.headers["Host"] = "localhost:8080"
+    assert request.to_wire().startswith(b"GET /health HTTP/1.1\r\nHost: localhost:8080\r\n")
+
+
+def test_template_to_wire_matches_rendered_request():
+    templates = compile_rest_file(SAMPLE)
+    expected = parse_rest_file(SAMPLE, env=ENV)
+    assert [template.wire is not None for template in templates] == [False, False, True]
+    for template, request in zip(templates, expected):
+        assert template.to_wire(ENV) == request.to_wire()
+    assert templates[1].to_wire() is templates[1].to_wire()
+
+
+def test_template_to_wire_validates_json():
+    template = compile_rest_file("POST https://api.example.com/x\nContent-Type: application/json\n\n{{payload}}")[0]
+    assert template.wire is not None
+    assert template.to_wire({"payload": "[1]"}).endswith(b"\r\n\r\n[1]")
+    with pytest.raises(ValueError):
+        template.to_wire({"payload": "[1"})
+
+
+def test_iter_wire_chunks_slices_mapped_bodies(tmp_path):
+    path = tmp_path / "big.rest"
+    payload = "x" * 10_000
+    path.write_text(f"PUT https://api.example.com/blob\nContent-Type: text/plain\n\n{payload}\n")
+    with map_rest_file(path) as mapped:
+        chunks = list(iter_wire_chunks(mapped[0], chunk_size=4096))
+        assert chunks[0].endswith(b"Content-Length: 10000\r\n\r\n")
+        assert [len(chunk) for chunk in chunks[1:]] == [4096, 4096, 1808]
+        assert all(isinstance(chunk, memoryview) for chunk in chunks[1:])
+        assert b"".join(chunks) == mapped[0].to_wire()
+        for chunk in chunks[1:]:
+            chunk.release()